@@ -1,9 +1,18 @@
 # Mom/admin.py
 
+import io
+
 from django.contrib import admin
-from .models import Mother, Pregnancy, Child, Vaccination, ChildVaccination
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.template.response import TemplateResponse
+from django.urls import path
+from .models import Mother, Pregnancy, Child, Vaccination, ChildVaccination, OutboundMessage, HospitalDailyStats, ReminderEvent, MessageTemplate
 from django.utils.html import format_html, mark_safe 
 from django.utils import timezone 
+from .forms import MessageTemplateForm, MotherAdminForm, RegistryImportForm
+from .services import message_templates, next_due, page_cache, reminder_events
+from .services.registry_import import COLUMNS as IMPORT_COLUMNS, RegistryImporter
 
 # --- INLINE CLASSES ---
 class PregnancyInline(admin.TabularInline):
@@ -29,10 +38,18 @@ class ChildVaccinationInline(admin.TabularInline):
 @admin.action(description='Mark selected vaccinations as completed')
 def mark_completed(modeladmin, request, queryset):
     """Marks selected ChildVaccination records as completed today."""
-    queryset.filter(completed=False).update(
-        completed=True,
-        completion_date=timezone.localdate()
-    )
+    rows = list(queryset.values_list('pk', 'child_id'))
+    child_ids = {child_id for _, child_id in rows}
+    with transaction.atomic():
+        queryset.filter(completed=False).update(
+            completed=True,
+            completion_date=timezone.localdate()
+        )
+        # .update() sends no signals, so maintain Child.next_due_* and
+        # cancel the pending reminders here
+        next_due.refresh(child_ids)
+        reminder_events.sync_child_vaccinations([pk for pk, _ in rows])
+    page_cache.bump_children(child_ids)
     modeladmin.message_user(
         request, 
         f"Successfully marked {queryset.count()} vaccinations as completed.", 
@@ -43,8 +60,9 @@ def mark_completed(modeladmin, request, queryset):
 # --- ADMIN CLASSES ---
 @admin.register(Mother)
 class MotherAdmin(admin.ModelAdmin):
+    form = MotherAdminForm
     list_display = ('name', 'phone', 'hospital', 'language', 'consent_display', 'get_current_status', 'created_at')
-    search_fields = ('name', 'phone', 'hospital')
+    search_fields = ('name', 'phone', 'phone_e164', 'hospital')
     list_filter = ('hospital', 'language', 'consent') 
     date_hierarchy = 'created_at' 
     inlines = [PregnancyInline, ChildInline] # <-- ADDED
@@ -66,9 +84,50 @@ class MotherAdmin(admin.ModelAdmin):
         return mark_safe('<span style="color: red;">&#10006; NO</span>')
     consent_display.short_description = 'Consent'
     
+    def get_queryset(self, request):
+        # Status is annotated in SQL instead of costing ~3 queries per row
+        return super().get_queryset(request).with_status()
+
     def get_current_status(self, obj):
         return obj.get_current_status()
     get_current_status.short_description = 'Current Status'
+    get_current_status.admin_order_field = 'current_status'
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='Mom_mother_import'),
+            *super().get_urls(),
+        ]
+
+    def import_view(self, request):
+        """Bulk-import a registry CSV (see the `import_registry` command)."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = RegistryImportForm(request.POST or None, request.FILES or None)
+        report = None
+        if request.method == 'POST' and form.is_valid():
+            upload = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8-sig', newline='')
+            try:
+                report = RegistryImporter().run(upload)
+            except ValueError as exc:
+                form.add_error('file', str(exc))
+            else:
+                self.message_user(
+                    request,
+                    f"Imported {report.mothers} mothers and {report.children} children; "
+                    f"{report.rejected} rows rejected.",
+                    level='warning' if report.rejected else 'success',
+                )
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import registry CSV',
+            'form': form,
+            'report': report,
+            'columns': IMPORT_COLUMNS,
+        }
+        return TemplateResponse(request, 'admin/Mom/mother/import.html', context)
 
 
 @admin.register(Pregnancy)
@@ -139,4 +198,59 @@ class ChildVaccinationAdmin(admin.ModelAdmin):
         if obj.completed:
             return mark_safe('<span style="color: green; font-weight: bold;">YES</span>')
         return mark_safe('<span style="color: red;">NO</span>')
-    completed_display.short_description = 'Completed'
\ No newline at end of file
+    completed_display.short_description = 'Completed'
+
+
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ('to', 'kind', 'status', 'attempts', 'provider_id', 'created_at', 'sent_at')
+    search_fields = ('to', 'provider_id')
+    list_filter = ('status', 'kind')
+    date_hierarchy = 'created_at'
+    readonly_fields = ('lease_token', 'leased_until', 'sent_at', 'created_at')
+
+
+@admin.register(ReminderEvent)
+class ReminderEventAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'mother', 'event_date', 'send_at', 'state', 'sent_at')
+    list_filter = ('state', 'kind')
+    search_fields = ('mother__name', 'mother__phone_e164')
+    date_hierarchy = 'send_at'
+    list_select_related = ('mother',)
+    raw_id_fields = ('mother', 'child_vaccination', 'pregnancy', 'scheduled_vaccination', 'message')
+    readonly_fields = ('created_at', 'sent_at')
+
+
+@admin.register(MessageTemplate)
+class MessageTemplateAdmin(admin.ModelAdmin):
+    form = MessageTemplateForm
+    list_display = ('kind', 'language', 'body', 'updated_at')
+    list_filter = ('language', 'kind')
+    readonly_fields = ('placeholders', 'default_body', 'updated_at')
+
+    def placeholders(self, obj):
+        if not obj.kind:
+            return '-'
+        return ', '.join(f'{{{name}}}' for name in sorted(message_templates.FIELDS[obj.kind]))
+    placeholders.short_description = 'Available placeholders'
+
+    def default_body(self, obj):
+        return message_templates.DEFAULTS.get((obj.language, obj.kind), '-')
+    default_body.short_description = 'Built-in wording'
+
+
+@admin.register(HospitalDailyStats)
+class HospitalDailyStatsAdmin(admin.ModelAdmin):
+    list_display = (
+        'hospital', 'date', 'due_today', 'due_tomorrow', 'overdue',
+        'active_pregnancies', 'deliveries_this_week', 'mothers', 'consenting_mothers', 'refreshed_at',
+    )
+    list_filter = ('hospital',)
+    date_hierarchy = 'date'
+
+    # Rows are written by `refresh_dashboard_stats` only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
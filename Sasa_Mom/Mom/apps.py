@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class MomConfig(AppConfig):
     name = 'Mom'
+
+    def ready(self):
+        # Connect signal receivers
+        from . import signals  # noqa: F401
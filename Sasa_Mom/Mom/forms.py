@@ -1,5 +1,33 @@
+from datetime import timedelta
+
 from django import forms
-from .models import Mother, Pregnancy,Vaccination, ChildVaccination,Child
+from django.db.models.functions import Upper
+from django.utils import timezone
+from django.utils.choices import BaseChoiceIterator
+from .models import Mother, Pregnancy,Vaccination, ChildVaccination,Child, MessageTemplate, prefix_filter
+from .widgets import MotherAutocomplete
+from .utils.phone import format_phone
+from .services import message_templates
+from .services.vaccination_catalog import get_catalog
+
+
+def check_phone(phone, exclude_pk=None):
+    """
+    Reject a number that is not a valid phone number, or that is already
+    registered to another mother. The lookup is an index seek on the
+    normalized phone_e164 column.
+    """
+    phone_e164 = format_phone(phone)
+    if phone_e164 is None:
+        raise forms.ValidationError("Enter a valid phone number, e.g. 0712345678 or +254712345678.")
+    duplicates = Mother.objects.filter(phone_e164=phone_e164)
+    if exclude_pk is not None:
+        duplicates = duplicates.exclude(pk=exclude_pk)
+    existing = duplicates.only('name').first()
+    if existing:
+        raise forms.ValidationError(
+            f"This phone number is already registered to {existing.name}."
+        )
 
 
 class MotherForm(forms.ModelForm):
@@ -14,6 +42,171 @@ class MotherForm(forms.ModelForm):
             'consent': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
 
+    def clean_phone(self):
+        phone = self.cleaned_data['phone']
+        check_phone(phone, exclude_pk=self.instance.pk)
+        return phone
+
+
+class MotherAdminForm(forms.ModelForm):
+    """
+    The admin's Mother form: default admin widgets, same phone checks as
+    MotherForm.
+    """
+    class Meta:
+        model = Mother
+        fields = '__all__'
+
+    clean_phone = MotherForm.clean_phone
+
+
+class ExportForm(forms.Form):
+    """
+    Filters shared by the export views and the `export_data` command.
+    """
+    FORMAT_CHOICES = [('csv', 'CSV'), ('json', 'JSON')]
+
+    hospital = forms.CharField(required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    format = forms.ChoiceField(required=False, choices=FORMAT_CHOICES)
+    gzip = forms.BooleanField(required=False)
+
+    def clean(self):
+        data = super().clean()
+        if data.get('date_from') and data.get('date_to') and data['date_from'] > data['date_to']:
+            raise forms.ValidationError("date_from must not be after date_to.")
+        return data
+
+    def export_options(self):
+        data = self.cleaned_data
+        return {
+            'fmt': data.get('format') or 'csv',
+            'compress': data.get('gzip', False),
+            'hospital': (data.get('hospital') or '').strip() or None,
+            'date_from': data.get('date_from'),
+            'date_to': data.get('date_to'),
+        }
+
+
+class RegistryImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV, UTF-8")
+
+
+class MessageTemplateForm(forms.ModelForm):
+    """
+    Admin form for reminder wording; rejects placeholders the message kind
+    does not provide so a bad edit cannot break sending.
+    """
+
+    class Meta:
+        model = MessageTemplate
+        fields = ['language', 'kind', 'body']
+        widgets = {
+            'body': forms.Textarea(attrs={'rows': 4}),
+        }
+
+    def clean(self):
+        data = super().clean()
+        if data.get('kind') and data.get('body'):
+            try:
+                message_templates.check(data['kind'], data['body'])
+            except ValueError as e:
+                self.add_error('body', str(e))
+        return data
+
+
+class MotherSearchForm(forms.Form):
+    """
+    Server-side filters for the staff dashboard. Every filter is a prefix or
+    equality match so it can be answered from an index.
+    """
+    CONSENT_CHOICES = [('', 'Any consent'), ('yes', 'Consented'), ('no', 'No consent')]
+
+    q = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Name or phone starts with...'}),
+    )
+    hospital = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Hospital'}),
+    )
+    consent = forms.ChoiceField(
+        required=False, choices=CONSENT_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+
+    def filter(self, queryset):
+        data = self.cleaned_data
+        if data.get('q'):
+            queryset = queryset.prefix_search(data['q'])
+        if data.get('hospital'):
+            queryset = queryset.filter(hospital=data['hospital'].strip())
+        if data.get('consent'):
+            queryset = queryset.filter(consent=data['consent'] == 'yes')
+        return queryset
+
+
+class ChildSearchForm(forms.Form):
+    """
+    Server-side filters for the children list: child or mother name prefix,
+    a date-of-birth range and next-dose status, all answerable from indexes.
+    """
+    DUE_CHOICES = [
+        ('', 'Any dose status'),
+        ('week', 'Due this week'),
+        ('overdue', 'Overdue'),
+        ('up_to_date', 'Up to date'),
+    ]
+
+    name = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Child name starts with...'}),
+    )
+    mother = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Mother name starts with...'}),
+    )
+    dob_from = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+    )
+    dob_to = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
+    )
+    due = forms.ChoiceField(
+        required=False, choices=DUE_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+
+    def filter(self, queryset):
+        data = self.cleaned_data
+        # Case-insensitive prefixes as ranges on child_name_upper_idx and
+        # mother_name_upper_idx (see prefix_filter)
+        if data.get('name', '').strip():
+            queryset = queryset.alias(name_upper=Upper('name')).filter(
+                **prefix_filter('name_upper', data['name'].strip().upper()),
+            )
+        if data.get('mother', '').strip():
+            queryset = queryset.alias(mother_name_upper=Upper('mother__name')).filter(
+                **prefix_filter('mother_name_upper', data['mother'].strip().upper()),
+            )
+        if data.get('dob_from'):
+            queryset = queryset.filter(dob__gte=data['dob_from'])
+        if data.get('dob_to'):
+            queryset = queryset.filter(dob__lte=data['dob_to'])
+        if data.get('due'):
+            today = timezone.localdate()
+            if data['due'] == 'week':
+                queryset = queryset.due_between(today, today + timedelta(days=6))
+            elif data['due'] == 'overdue':
+                queryset = queryset.defaulters(today)
+            elif data['due'] == 'up_to_date':
+                queryset = queryset.up_to_date(today)
+        return queryset
+
+
 class PregnancyForm(forms.ModelForm):
     # Added a non-model field for staff to indicate immediate child registration
     given_birth = forms.BooleanField(
@@ -79,6 +272,11 @@ class MotherPregnancyForm(forms.Form):
         widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
     )
 
+    def clean_phone(self):
+        phone = self.cleaned_data['phone']
+        check_phone(phone)
+        return phone
+
     def clean(self):
         cleaned_data = super().clean()
         due_date = cleaned_data.get('due_date')
@@ -136,7 +334,7 @@ class ChildForm(forms.ModelForm):
         model = Child
         fields = ['mother', 'name', 'dob', 'gender']
         widgets = {
-            'mother': forms.Select(attrs={'class': 'form-control'}),
+            'mother': MotherAutocomplete(attrs={'class': 'form-control'}),
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'dob': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'gender': forms.Select(attrs={'class': 'form-control'}),
@@ -154,12 +352,65 @@ class VaccinationForm(forms.ModelForm):
         }
 
 
+class CatalogChoiceIterator(BaseChoiceIterator):
+    """
+    Lazily yields vaccination choices from the cached catalog. Subclassing
+    BaseChoiceIterator keeps widgets from evaluating it at import time.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for vac in get_catalog().by_dose_order:
+            yield (vac.pk, self.field.label_from_instance(vac))
+
+    def __len__(self):
+        return len(get_catalog()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return True
+
+
+class CatalogVaccinationField(forms.ModelChoiceField):
+    """
+    Vaccination picker that renders and validates against the cached
+    catalog instead of querying the Vaccination table.
+    """
+    iterator = CatalogChoiceIterator
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=Vaccination.objects.all(), **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return get_catalog().by_id[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+
 class ChildVaccinationForm(forms.ModelForm):
+    vaccination = CatalogVaccinationField(widget=forms.Select(attrs={'class': 'form-control'}))
+
     class Meta:
         model = ChildVaccination
         fields = ['vaccination', 'scheduled_date', 'completed']
         widgets = {
-            'vaccination': forms.Select(attrs={'class': 'form-control'}),
             'scheduled_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'completed': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
         }
+
+    def clean_vaccination(self):
+        # `child` is not a form field, so ModelForm skips the (child, vaccination)
+        # constraint; pass instance=ChildVaccination(child=...) to have it checked
+        vaccination = self.cleaned_data['vaccination']
+        child_id = self.instance.child_id
+        if child_id and ChildVaccination.objects.filter(child_id=child_id, vaccination=vaccination).exclude(
+            pk=self.instance.pk,
+        ).exists():
+            raise forms.ValidationError(f"{vaccination.name} is already on this child's schedule.")
+        return vaccination
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from Mom.services.sms_delivery import OutgoingMessage
+from Mom.utils.sms import get_connection
+
+
+class Command(BaseCommand):
+    help = "Benchmark the SMS delivery stage offline against a fake provider"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=50000)
+        parser.add_argument("--workers", type=int, default=32)
+        parser.add_argument(
+            "--rate", type=float, default=0,
+            help="Messages per second quota; 0 disables the limiter",
+        )
+        parser.add_argument(
+            "--latency", type=float, default=0.05,
+            help="Simulated provider round-trip in seconds",
+        )
+        parser.add_argument("--failure-rate", type=float, default=0.01)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        connection = get_connection(
+            "Mom.utils.sms_backends.FakeBackend",
+            latency=options["latency"],
+            failure_rate=options["failure_rate"],
+            seed=options["seed"],
+        )
+        messages = (
+            OutgoingMessage(key=i, to=f"+2547{i:08d}", body="Benchmark reminder")
+            for i in range(options["messages"])
+        )
+        batches = []
+
+        report = connection.send_many(
+            messages,
+            workers=options["workers"],
+            rate=options["rate"],
+            backoff=0.01,
+            on_batch=lambda results: batches.append(len(results)),
+        )
+
+        self.stdout.write(
+            f"{report.sent} sent, {report.failed} failed in {report.elapsed:.2f}s "
+            f"({report.rate:.0f} msg/s, {len(batches)} write-back batches)"
+        )
@@ -1,59 +1,182 @@
-from django.core.management.base import BaseCommand
+import csv
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
 from django.utils import timezone
-from datetime import timedelta
 from Mom.models import ChildVaccination
 
+COLUMNS = [
+    ("id", "id"),
+    ("scheduled_date", "scheduled_date"),
+    ("completed", "completed"),
+    ("hospital", "child__mother__hospital"),
+    ("mother", "child__mother__name"),
+    ("phone", "child__mother__phone"),
+    ("child", "child__name"),
+    ("vaccine", "vaccination__name"),
+    ("day_before_sent", "reminder_day_before_sent"),
+    ("on_day_sent", "reminder_on_day_sent"),
+]
+# Output columns: the projection above with `completed` turned into a status
+HEADER = ["id", "scheduled_date", "status", "hospital", "mother", "phone",
+          "child", "vaccine", "day_before_sent", "on_day_sent"]
+SUMMARY_HEADER = ["hospital", "total", "completed", "overdue", "due",
+                  "upcoming", "day_before_unsent", "on_day_unsent"]
+TABLE_WIDTHS = [8, 10, 9, 18, 22, 14, 18, 18, 6, 6]
+
+STATUSES = ["completed", "pending", "overdue", "due", "upcoming"]
+UNSENT = {
+    "day_before": Q(reminder_day_before_sent=False),
+    "on_day": Q(reminder_on_day_sent=False),
+    "any": Q(reminder_day_before_sent=False) | Q(reminder_on_day_sent=False),
+}
+
+
 class Command(BaseCommand):
-    help = "Check all scheduled child vaccinations (auto-detect reminder fields)"
+    help = (
+        "Report scheduled child vaccinations, streamed row by row. "
+        "Status: completed, overdue (pending, date passed), due (pending, "
+        "today or tomorrow), upcoming (pending, later); pending = not completed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", help="Scheduled on or after YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", help="Scheduled on or before YYYY-MM-DD")
+        parser.add_argument("--hospital")
+        parser.add_argument("--status", choices=STATUSES)
+        parser.add_argument(
+            "--unsent", choices=sorted(UNSENT),
+            help="Only pending doses whose day-before / on-day (or any) reminder is unsent",
+        )
+        parser.add_argument("--format", choices=["table", "csv", "jsonl"], default="table")
+        parser.add_argument(
+            "--summary", action="store_true",
+            help="Print per-hospital counts (one GROUP BY) instead of rows",
+        )
+        parser.add_argument("--limit", type=int, help="Stop after this many rows")
 
     def handle(self, *args, **options):
-        today = timezone.now().date()
-        tomorrow = today + timedelta(days=1)
+        today = timezone.localdate()
+        self.today, self.tomorrow = today, today + timedelta(days=1)
+        queryset = self.filter(ChildVaccination.objects.all(), options)
 
-        vaccinations = ChildVaccination.objects.select_related(
-            "child", "child__mother", "vaccination"
-        )
+        if options["summary"]:
+            rows = self.summary(queryset)
+            header = SUMMARY_HEADER
+            widths = [24] + [10] * (len(SUMMARY_HEADER) - 1)
+        else:
+            rows = self.report(queryset, options["limit"])
+            header = HEADER
+            widths = TABLE_WIDTHS
+
+        write = getattr(self, f"write_{options['format']}")
+        count = write(header, rows, widths)
+        if options["format"] == "table":
+            self.stderr.write(f"\n{count} rows")
+
+    def parse_date(self, value, name):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Invalid --{name}: {value}")
 
-        if not vaccinations.exists():
-            self.stdout.write("❌ No scheduled vaccinations found.")
-            return
-
-        self.stdout.write("\n📋 ALL SCHEDULED VACCINATIONS\n")
-
-        for cv in vaccinations:
-            status = "✅ COMPLETED" if cv.completed else "⏳ PENDING"
-
-            # 🔁 AUTO-DETECT REMINDER FIELDS
-            if hasattr(cv, "reminder_day_before_sent"):
-                reminder_status = (
-                    f"Day-before: {'📨 SENT' if cv.reminder_day_before_sent else '❌ NOT SENT'} | "
-                    f"On-day: {'📨 SENT' if cv.reminder_on_day_sent else '❌ NOT SENT'}"
-                )
-            elif hasattr(cv, "reminder_sent"):
-                reminder_status = "📨 SENT" if cv.reminder_sent else "❌ NOT SENT"
-            else:
-                reminder_status = "⚠️ No reminder fields"
-
-            due_flag = ""
-            if cv.scheduled_date in [today, tomorrow] and not cv.completed:
-                due_flag = "🔥 DUE NOW"
-
-            self.stdout.write(
-                f"""
-Child: {cv.child.name or 'Child'}
-Mother: {cv.child.mother.name} ({cv.child.mother.phone})
-Vaccine: {cv.vaccination.name}
-Scheduled Date: {cv.scheduled_date}
-Status: {status}
-Reminder: {reminder_status}
-{due_flag}
-----------------------------------------
-"""
+    def filter(self, queryset, options):
+        if options["date_from"]:
+            queryset = queryset.filter(scheduled_date__gte=self.parse_date(options["date_from"], "from"))
+        if options["date_to"]:
+            queryset = queryset.filter(scheduled_date__lte=self.parse_date(options["date_to"], "to"))
+        if options["hospital"]:
+            queryset = queryset.filter(child__mother__hospital=options["hospital"])
+
+        status = options["status"]
+        if status == "completed":
+            queryset = queryset.filter(completed=True)
+        elif status:
+            queryset = queryset.filter(completed=False)
+            if status == "overdue":
+                queryset = queryset.filter(scheduled_date__lt=self.today)
+            elif status == "due":
+                queryset = queryset.filter(scheduled_date__in=[self.today, self.tomorrow])
+            elif status == "upcoming":
+                queryset = queryset.filter(scheduled_date__gt=self.tomorrow)
+
+        if options["unsent"]:
+            queryset = queryset.filter(UNSENT[options["unsent"]], completed=False)
+        return queryset
+
+    def status(self, completed, scheduled_date):
+        if completed:
+            return "completed"
+        if scheduled_date is None or scheduled_date > self.tomorrow:
+            return "upcoming"
+        if scheduled_date < self.today:
+            return "overdue"
+        return "due"
+
+    def report(self, queryset, limit=None):
+        """Yield output rows from a values_list projection, one chunk at a time."""
+        rows = queryset.order_by("scheduled_date", "id").values_list(*[lookup for _, lookup in COLUMNS])
+        if limit:
+            rows = rows[:limit]
+        for pk, scheduled_date, completed, *rest in rows.iterator(chunk_size=2000):
+            yield (pk, scheduled_date, self.status(completed, scheduled_date), *rest)
+
+    def summary(self, queryset):
+        pending = Q(completed=False)
+        rows = (
+            queryset.values_list("child__mother__hospital")
+            .annotate(
+                total=Count("id"),
+                completed_count=Count("id", filter=Q(completed=True)),
+                overdue=Count("id", filter=pending & Q(scheduled_date__lt=self.today)),
+                due=Count("id", filter=pending & Q(scheduled_date__in=[self.today, self.tomorrow])),
+                upcoming=Count("id", filter=pending & (Q(scheduled_date__gt=self.tomorrow) | Q(scheduled_date__isnull=True))),
+                day_before_unsent=Count("id", filter=pending & Q(reminder_day_before_sent=False)),
+                on_day_unsent=Count("id", filter=pending & Q(reminder_on_day_sent=False)),
             )
+            .order_by("child__mother__hospital")
+        )
+        return iter(rows)
+
+    def write_table(self, header, rows, widths):
+        widths = [max(width, len(name)) for name, width in zip(header, widths)]
+
+        def line(values):
+            return " ".join(
+                self.cell(value)[:width].ljust(width) for value, width in zip(values, widths)
+            ).rstrip()
+
+        self.stdout.write(line(header))
+        self.stdout.write(" ".join("-" * width for width in widths))
+        count = 0
+        for row in rows:
+            self.stdout.write(line(row))
+            count += 1
+        return count
+
+    def write_csv(self, header, rows, widths):
+        writer = csv.writer(self.stdout, lineterminator="\n")
+        writer.writerow(header)
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
 
-        due_count = vaccinations.filter(
-            scheduled_date__in=[today, tomorrow],
-            completed=False
-        ).count()
+    def write_jsonl(self, header, rows, widths):
+        encoder = DjangoJSONEncoder()
+        count = 0
+        for row in rows:
+            self.stdout.write(encoder.encode(dict(zip(header, row))))
+            count += 1
+        return count
 
-        self.stdout.write(f"\n🔔 Vaccinations due today or tomorrow: {due_count}")
+    @staticmethod
+    def cell(value):
+        if value is None:
+            return "-"
+        if isinstance(value, bool):
+            return "yes" if value else "no"
+        return str(value)
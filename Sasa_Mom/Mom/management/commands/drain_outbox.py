@@ -0,0 +1,54 @@
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from Mom.services import outbox
+from Mom.utils.metrics import write_textfile
+from Mom.utils.sms import get_connection
+
+
+class Command(BaseCommand):
+    help = "Deliver pending SMS from the outbox in leased batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--lease-seconds", type=int, default=300,
+            help="How long a batch stays reserved before another worker may retry it",
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep running, polling for new messages every --interval seconds",
+        )
+        parser.add_argument("--interval", type=float, default=10.0)
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument("--rate", type=float, default=None)
+        parser.add_argument(
+            "--metrics-file",
+            help="Write Prometheus metrics here after each pass (e.g. for the node exporter textfile collector)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            connection = get_connection()
+        except ImproperlyConfigured as e:
+            raise CommandError(f"SMS backend is not configured: {e}")
+
+        while True:
+            started = time.monotonic()
+            sent, failed = outbox.drain(
+                connection,
+                batch_size=options["batch_size"],
+                lease_seconds=options["lease_seconds"],
+                workers=options["workers"],
+                rate=options["rate"],
+            )
+            if sent or failed:
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"📨 {sent} sent, {failed} failed in {elapsed:.1f}s")
+            if options["metrics_file"]:
+                write_textfile(options["metrics_file"])
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
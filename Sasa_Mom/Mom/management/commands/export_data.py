@@ -0,0 +1,55 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from Mom.forms import ExportForm
+from Mom.services import exports
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV/JSON extract of mothers, children or vaccination records"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(exports.EXPORTS))
+        parser.add_argument("--format", choices=["csv", "json"], default="csv")
+        parser.add_argument("--hospital")
+        parser.add_argument("--from", dest="date_from", help="YYYY-MM-DD")
+        parser.add_argument("--to", dest="date_to", help="YYYY-MM-DD")
+        parser.add_argument("--gzip", action="store_true", help="Compress the output on the fly")
+        parser.add_argument(
+            "--output", "-o",
+            help="File to write (default: the generated filename; '-' for stdout)",
+        )
+
+    def handle(self, *args, **options):
+        form = ExportForm({
+            "format": options["format"],
+            "hospital": options["hospital"],
+            "date_from": options["date_from"],
+            "date_to": options["date_to"],
+            "gzip": options["gzip"],
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        chunks, _, filename = exports.stream_export(options["kind"], **form.export_options())
+        output = options["output"] or filename
+
+        started = time.monotonic()
+        written = 0
+        if output == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+                written += len(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        with open(output, "wb") as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                written += len(chunk)
+
+        elapsed = time.monotonic() - started
+        self.stderr.write(self.style.SUCCESS(
+            f"📦 Wrote {written / 1024:.0f} KiB to {output} in {elapsed:.1f}s"
+        ))
@@ -0,0 +1,67 @@
+from datetime import date
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from Mom.models import Vaccination
+from Mom.services.fake_registry import HOSPITALS, FakeRegistryGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create a synthetic registry (mothers, pregnancies, children and "
+        "vaccination histories) for load testing. The same --seed, --today and "
+        "--phone-start always produce the same data. Never run against production."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mothers", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--hospitals", type=int, default=len(HOSPITALS),
+            help=f"How many hospitals to spread mothers over (max {len(HOSPITALS)})",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000,
+            help="Mothers created per transaction (default 1000)",
+        )
+        parser.add_argument(
+            "--phone-start", type=int, default=0,
+            help="First synthetic phone number (07XXXXXXXX); raise it to add a second batch",
+        )
+        parser.add_argument("--today", help="Generate relative to this YYYY-MM-DD (default today)")
+
+    def handle(self, *args, **options):
+        today = None
+        if options["today"]:
+            try:
+                today = date.fromisoformat(options["today"])
+            except ValueError:
+                raise CommandError(f"Invalid --today: {options['today']}")
+
+        if not Vaccination.objects.exists():
+            self.stdout.write("💉 No vaccinations yet, seeding the catalog first")
+            call_command("seed_vaccinations", stdout=self.stdout)
+
+        generator = FakeRegistryGenerator(
+            options["mothers"],
+            seed=options["seed"],
+            hospitals=options["hospitals"],
+            chunk_size=options["chunk_size"],
+            phone_start=options["phone_start"],
+            today=today,
+        )
+        clashes = generator.clashes()
+        if clashes:
+            raise CommandError(
+                f"{clashes} mothers already use phones in this range; pass a higher --phone-start"
+            )
+
+        report = generator.run(progress=self.progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Generated {report.mothers} mothers, {report.pregnancies} pregnancies, "
+            f"{report.children} children and {report.vaccinations} vaccinations "
+            f"in {report.elapsed:.1f}s ({report.rate:.0f} mothers/s)"
+        ))
+
+    def progress(self, report):
+        self.stdout.write(f"{report.mothers} mothers created ({report.rate:.0f}/s)")
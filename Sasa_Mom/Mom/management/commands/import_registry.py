@@ -0,0 +1,55 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from Mom.services.registry_import import COLUMNS, RegistryImporter, make_reject_writer
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import mothers, pregnancies and children from a CSV file. "
+        f"Columns: {', '.join(COLUMNS)}. Invalid rows are written to a reject file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000,
+            help="Rows validated and inserted per transaction (default 1000)",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="Where to write rejected rows (default: <csv_path>.rejects.csv)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["csv_path"]
+        if not os.path.exists(path):
+            raise CommandError(f"No such file: {path}")
+        rejects_path = options["rejects"] or f"{os.path.splitext(path)[0]}.rejects.csv"
+
+        with open(path, newline="", encoding="utf-8-sig") as src, \
+                open(rejects_path, "w", newline="", encoding="utf-8") as rejects:
+            importer = RegistryImporter(
+                chunk_size=options["chunk_size"],
+                reject_writer=make_reject_writer(rejects),
+            )
+            try:
+                report = importer.run(src, progress=self.progress)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+
+        if report.rejected:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {report.rejected} rows rejected, see {rejects_path}"
+            ))
+        else:
+            os.remove(rejects_path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Imported {report.mothers} mothers, {report.pregnancies} pregnancies, "
+            f"{report.children} children and scheduled {report.vaccinations} vaccinations "
+            f"from {report.rows} rows in {report.elapsed:.1f}s ({report.rate:.0f} rows/s)"
+        ))
+
+    def progress(self, report):
+        self.stdout.write(f"{report.rows} rows processed ({report.rate:.0f} rows/s)")
@@ -0,0 +1,31 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from Mom.services import dashboard_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-hospital dashboard statistics for a day (default today)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Day to refresh, YYYY-MM-DD")
+        parser.add_argument(
+            "--hospital", action="append", dest="hospitals",
+            help="Only refresh this hospital (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        day = None
+        if options["date"]:
+            try:
+                day = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError(f"Invalid --date: {options['date']}")
+
+        started = time.monotonic()
+        count = dashboard_stats.refresh(day, options["hospitals"])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"📊 Refreshed stats for {count} hospitals in {elapsed:.2f}s"
+        ))
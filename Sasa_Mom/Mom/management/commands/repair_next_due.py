@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from Mom.models import Child
+from Mom.services import next_due, page_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Child.next_due_date, next_due_vaccination and overdue_count "
+        "from ChildVaccination. Run daily so overdue counts roll over, or after "
+        "bulk changes that bypassed the usual maintenance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000,
+            help="Children recomputed per transaction (default 2000)",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        today = timezone.localdate()
+        started = time.monotonic()
+        last_id = 0
+        seen = updated = 0
+
+        while True:
+            ids = list(
+                Child.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                changed = next_due.refresh(ids, today)
+            # bulk_update sends no signals, so refresh the cached pages here
+            page_cache.bump_children(changed)
+            updated += len(changed)
+            seen += len(ids)
+            last_id = ids[-1]
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"🔧 Checked {seen} children, updated {updated} in {elapsed:.1f}s"
+        ))
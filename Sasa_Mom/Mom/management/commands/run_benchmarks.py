@@ -0,0 +1,101 @@
+import json
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from Mom.services.benchmarks import BenchmarkSuite, compare, environment
+
+# Benchmarks never touch the shared cache or SMS provider.
+BENCHMARK_SETTINGS = {
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "mom-benchmarks"}},
+    "SMS_BACKEND": "Mom.utils.sms_backends.FakeBackend",
+    "SMS_MESSAGES_PER_SECOND": 0,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a synthetic registry in a throwaway test database and time the "
+        "staff dashboard, mother and child pages, send_vaccine_reminders and "
+        "schedule_initial_vaccinations. Records median wall time and query "
+        "counts as JSON, and can compare them against an earlier baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mothers", type=int, default=2000, help="Registry size (default 2000)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark (default 5)")
+        parser.add_argument(
+            "--sms-latency", type=float, default=0.0,
+            help="Simulated provider round-trip in seconds (default 0)",
+        )
+        parser.add_argument("-o", "--output", help="Write the results as a JSON baseline to this file")
+        parser.add_argument("--compare", help="Baseline JSON to compare the results against")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.25,
+            help="Allowed median wall-time growth against --compare (default 0.25 = 25%%)",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"], encoding="utf-8") as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {e}")
+            if not isinstance(baseline, dict) or "results" not in baseline:
+                raise CommandError(f"{options['compare']} is not a run_benchmarks baseline")
+
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(SMS_FAKE_LATENCY=options["sms_latency"], **BENCHMARK_SETTINGS):
+                self.stdout.write(f"🏗️ Generating {options['mothers']} mothers (seed {options['seed']})")
+                call_command(
+                    "generate_fake_registry",
+                    mothers=options["mothers"], seed=options["seed"], stdout=self.stdout,
+                )
+                suite = BenchmarkSuite(repeat=options["repeat"])
+                results = suite.run(progress=self.progress)
+                report = {
+                    "meta": environment(
+                        mothers=options["mothers"], seed=options["seed"], repeat=options["repeat"],
+                    ),
+                    "results": results,
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write("\n")
+            self.stdout.write(self.style.SUCCESS(f"✅ Results written to {options['output']}"))
+
+        if baseline is not None:
+            if baseline.get("meta", {}).get("mothers") != options["mothers"]:
+                self.stdout.write(self.style.WARNING(
+                    "⚠️ The baseline was recorded at a different --mothers scale"
+                ))
+            self.report_comparison(baseline["results"], results, options["tolerance"])
+
+    def progress(self, name, result):
+        self.stdout.write(
+            f"⏱️ {name:<40} {result['wall_ms']:>9.1f} ms  {result['queries']:>5} queries"
+        )
+
+    def report_comparison(self, baseline, results, tolerance):
+        regressions = 0
+        for name, message, regressed in compare(baseline, results, tolerance):
+            if regressed:
+                regressions += 1
+                self.stdout.write(self.style.ERROR(f"❌ {name}: {message}"))
+            else:
+                self.stdout.write(f"   {name}: {message}")
+        if regressions:
+            raise CommandError(f"{regressions} benchmarks regressed against the baseline")
+        self.stdout.write(self.style.SUCCESS("✅ No regressions against the baseline"))
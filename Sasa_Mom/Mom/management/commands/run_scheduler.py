@@ -0,0 +1,71 @@
+import signal
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from Mom.services.scheduler import ReminderScheduler
+from Mom.utils.sms import get_connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the reminder scheduler in the foreground: sends reminders at their "
+        "send time, retries the SMS outbox and refreshes dashboard stats. Only "
+        "one instance is active at a time (SchedulerLock); extras stand by. "
+        "Stops cleanly on SIGTERM or Ctrl-C."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--refresh-interval", type=int, default=60,
+            help="Seconds between reads of upcoming reminder times (default 60)",
+        )
+        parser.add_argument(
+            "--horizon", type=int, default=3600,
+            help="How far ahead, in seconds, reminder times are loaded (default 3600)",
+        )
+        parser.add_argument(
+            "--drain-interval", type=int, default=60,
+            help="Seconds between outbox retry passes (default 60)",
+        )
+        parser.add_argument(
+            "--stats-interval", type=int, default=900,
+            help="Seconds between dashboard stats refreshes (default 900)",
+        )
+        parser.add_argument(
+            "--lock-ttl", type=int, default=120,
+            help="Lease length in seconds; renewed every third of it (default 120)",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Concurrent provider calls (default settings.SMS_DELIVERY_WORKERS)",
+        )
+        parser.add_argument(
+            "--rate", type=float, default=None,
+            help="Messages per second quota (default settings.SMS_MESSAGES_PER_SECOND)",
+        )
+        parser.add_argument(
+            "--metrics-file",
+            help="Write Prometheus metrics here after every job (e.g. for the node exporter textfile collector)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            sms_connection = get_connection()
+        except ImproperlyConfigured as e:
+            self.stdout.write(f"❌ {e}")
+            return
+
+        scheduler = ReminderScheduler(
+            sms_connection,
+            log=self.stdout.write,
+            refresh_interval=options["refresh_interval"],
+            horizon=options["horizon"],
+            drain_interval=options["drain_interval"],
+            stats_interval=options["stats_interval"],
+            lock_ttl=options["lock_ttl"],
+            delivery_options={"workers": options["workers"], "rate": options["rate"]},
+            metrics_file=options["metrics_file"],
+        )
+        signal.signal(signal.SIGTERM, scheduler.stop)
+        signal.signal(signal.SIGINT, scheduler.stop)
+        scheduler.run()
@@ -1,46 +1,106 @@
+import json
+import os
+import time
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from Mom.models import Child, Vaccination, ChildVaccination
+from Mom.models import Child
+from Mom.services.vaccination_catalog import get_catalog
+from Mom.services.vaccination_schedule import schedule_many
+
 
 class Command(BaseCommand):
-    help = "Automatically schedule all vaccinations for all children based on DOB"
+    help = (
+        "Backfill vaccination schedules for all children based on DOB. "
+        "Walks children in primary-key chunks and checkpoints after each one, "
+        "so an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000,
+            help="Number of children planned and inserted per transaction (default 2000)",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=os.path.join(settings.BASE_DIR, "schedule_vaccinations.checkpoint"),
+            help="File recording the last child id processed",
+        )
+        parser.add_argument(
+            "--reset", action="store_true",
+            help="Ignore any existing checkpoint and start from the first child",
+        )
 
     def handle(self, *args, **options):
-        today = timezone.now().date()
-        children = Child.objects.all()
-        vaccinations = Vaccination.objects.all()
+        chunk_size = options["chunk_size"]
+        checkpoint = options["checkpoint"]
+
+        if options["reset"] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        last_id = self.read_checkpoint(checkpoint)
+        if last_id:
+            self.stdout.write(f"Resuming after child id {last_id}")
+
+        today = timezone.localdate()
+        catalog = get_catalog()
+        started = time.monotonic()
+        children_seen = 0
         created_count = 0
 
-        for child in children:
-            if not child.dob:
-                self.stdout.write(f"Skipping {child.name or 'Child'}: no DOB")
-                continue
-
-            for vac in vaccinations:
-                # Calculate scheduled date based on recommended_age_days
-                scheduled_date = child.dob + timezone.timedelta(days=vac.recommended_age_days)
-
-                # Skip if date is in the past
-                if scheduled_date < today:
-                    continue
-
-                # Check if already scheduled
-                exists = ChildVaccination.objects.filter(
-                    child=child,
-                    vaccination=vac
-                ).exists()
-
-                if not exists:
-                    ChildVaccination.objects.create(
-                        child=child,
-                        vaccination=vac,
-                        scheduled_date=scheduled_date,
-                        completed=False,
-                        reminder_sent=False
-                    )
-                    created_count += 1
-                    self.stdout.write(
-                        f"Scheduled {vac.name} for {child.name or 'Child'} on {scheduled_date}"
-                    )
-
-        self.stdout.write(f"Total new vaccinations scheduled: {created_count}")
+        while True:
+            chunk = list(
+                Child.objects.filter(pk__gt=last_id, dob__isnull=False)
+                .order_by("pk")
+                .values_list("pk", "dob")[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            chunk_started = time.monotonic()
+            created = schedule_many(chunk, catalog, today)
+            last_id = chunk[-1][0]
+            self.write_checkpoint(checkpoint, last_id)
+
+            children_seen += len(chunk)
+            created_count += created
+            elapsed = time.monotonic() - chunk_started
+            self.stdout.write(
+                f"Children up to id {last_id}: {created} rows scheduled "
+                f"({self.rate(created, elapsed):.0f} rows/s)"
+            )
+
+        # A finished run leaves nothing to resume
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        total_elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"Total new vaccinations scheduled: {created_count} "
+            f"for {children_seen} children in {total_elapsed:.1f}s "
+            f"({self.rate(created_count, total_elapsed):.0f} rows/s)"
+        )
+
+    @staticmethod
+    def rate(count, elapsed):
+        return count / elapsed if elapsed > 0 else 0.0
+
+    def read_checkpoint(self, path):
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path) as fh:
+                return int(json.load(fh)["last_child_id"])
+        except (OSError, ValueError, KeyError, TypeError):
+            # Rescheduling is idempotent, so starting over only costs time
+            self.stderr.write(f"Ignoring unreadable checkpoint {path}, starting from the first child")
+            return 0
+
+    @staticmethod
+    def write_checkpoint(path, last_id):
+        # Write-then-rename so a kill mid-write never leaves a corrupt checkpoint
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump({"last_child_id": last_id}, fh)
+        os.replace(tmp_path, path)
@@ -1,63 +1,57 @@
+from django.core.exceptions import ImproperlyConfigured
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from datetime import timedelta
-from django.db import transaction
-from twilio.rest import Client
-from django.conf import settings
-from Mom.models import ChildVaccination
+from Mom.services import outbox
+from Mom.services.reminder_events import dispatch_due, end_of_day
+from Mom.utils.metrics import write_textfile
+from Mom.utils.sms import get_connection
 
 class Command(BaseCommand):
-    help = "Send vaccination reminders safely (no duplicates, auto-detect fields)"
+    help = (
+        "Queue every due reminder (child vaccinations, antenatal visits, maternal "
+        "vaccinations) in the SMS outbox, no duplicates, then deliver them "
+        "unless --no-drain is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--no-drain", action="store_true",
+            help="Only queue reminders; leave delivery to the drain_outbox worker",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Concurrent provider calls (default settings.SMS_DELIVERY_WORKERS)",
+        )
+        parser.add_argument(
+            "--rate", type=float, default=None,
+            help="Messages per second quota (default settings.SMS_MESSAGES_PER_SECOND)",
+        )
+        parser.add_argument(
+            "--metrics-file",
+            help="Write Prometheus metrics here when done (e.g. for the node exporter textfile collector)",
+        )
 
     def handle(self, *args, **options):
-        today = timezone.localdate()
-        tomorrow = today + timedelta(days=1)
-
-        account_sid = settings.TWILIO_ACCOUNT_SID
-        auth_token = settings.TWILIO_AUTH_TOKEN
-        from_number = settings.TWILIO_PHONE_NUMBER
-
-        if not all([account_sid, auth_token, from_number]):
-            self.stdout.write("❌ Twilio credentials missing")
+        try:
+            self.send(options)
+        finally:
+            if options["metrics_file"]:
+                write_textfile(options["metrics_file"])
+
+    def send(self, options):
+        # A once-a-day cron run may fire before REMINDER_SEND_HOUR: send all of
+        # today's reminders now, or tomorrow's run would expire them unsent
+        queued = dispatch_due(due_by=end_of_day(timezone.localdate()))
+        self.stdout.write(f"📥 {queued} due reminders queued")
+
+        if options["no_drain"]:
             return
 
-        client = Client(account_sid, auth_token)
-
-        vaccinations = ChildVaccination.objects.select_related(
-            "child", "child__mother", "vaccination"
-        ).filter(completed=False)
-
-        for cv in vaccinations:
-            mother = cv.child.mother
-
-            if hasattr(mother, "consent") and not mother.consent:
-                continue
-
-            phone = mother.phone.strip()
-            if phone.startswith("07") or phone.startswith("01"):
-                phone = "+254" + phone[1:]
-
-            with transaction.atomic():
-                cv = ChildVaccination.objects.select_for_update().get(id=cv.id)
-
-                # Day-before reminder
-                if cv.scheduled_date == tomorrow and not cv.reminder_day_before_sent:
-                    message = f"Reminder: {cv.vaccination.name} vaccination for {cv.child.name or 'your child'} is TOMORROW."
-                    try:
-                        client.messages.create(body=message, from_=from_number, to=phone)
-                        cv.reminder_day_before_sent = True
-                        cv.save()
-                        self.stdout.write(f"📨 Day-before reminder sent to {phone}")
-                    except Exception as e:
-                        self.stdout.write(f"❌ Failed to send SMS to {phone}: {e}")
+        try:
+            connection = get_connection()
+        except ImproperlyConfigured as e:
+            self.stdout.write(f"❌ {e}")
+            return
 
-                # On-day reminder
-                elif cv.scheduled_date == today and not cv.reminder_on_day_sent:
-                    message = f"Today is vaccination day for {cv.child.name or 'your child'} ({cv.vaccination.name})."
-                    try:
-                        client.messages.create(body=message, from_=from_number, to=phone)
-                        cv.reminder_on_day_sent = True
-                        cv.save()
-                        self.stdout.write(f"📨 On-day reminder sent to {phone}")
-                    except Exception as e:
-                        self.stdout.write(f"❌ Failed to send SMS to {phone}: {e}")
+        sent, failed = outbox.drain(connection, workers=options["workers"], rate=options["rate"])
+        self.stdout.write(f"📨 {sent} reminders sent, {failed} failed")
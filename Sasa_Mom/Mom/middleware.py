@@ -0,0 +1,88 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+
+from .utils.metrics import VIEW_SECONDS
+from .utils.query_stats import budget_for, install_render_timer, track_queries
+
+logger = logging.getLogger('Mom.query_stats')
+
+
+class QueryStatsMiddleware:
+    """
+    Opt-in per-request instrumentation: SQL query count, DB time, duplicate
+    statements (the usual sign of an N+1) and template render time.
+
+    Every request is logged to the 'Mom.query_stats' logger as one JSON
+    object; requests over their query budget (settings.QUERY_BUDGETS by URL
+    name, else settings.QUERY_BUDGET) are logged at WARNING with
+    "over_budget": true. In DEBUG the numbers are also sent as X-DB-* /
+    X-Render-Time response headers.
+
+    Streaming responses are measured up to the point the view returns; rows
+    fetched while the body streams are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_render_timer()
+
+    def __call__(self, request):
+        with track_queries() as stats:
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else None
+        budget = budget_for(url_name)
+        over_budget = stats.queries > budget
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'budget': budget,
+            'over_budget': over_budget,
+            **stats.as_dict(),
+        }
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(record), extra={'query_stats': record})
+
+        if settings.DEBUG:
+            response['X-DB-Query-Count'] = str(stats.queries)
+            response['X-DB-Time-Ms'] = f"{stats.db_time * 1000:.1f}"
+            response['X-DB-Duplicate-Queries'] = str(record['duplicate_queries'])
+            response['X-Render-Time-Ms'] = f"{stats.render_time * 1000:.1f}"
+            response['X-Response-Time-Ms'] = f"{stats.total_time * 1000:.1f}"
+            if over_budget:
+                response['X-DB-Query-Budget-Exceeded'] = f"{stats.queries}/{budget}"
+        return response
+
+
+# Anything else is counted as OTHER so arbitrary methods cannot add series
+METRIC_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class MetricsMiddleware:
+    """
+    Record every request's latency in the mom_view_seconds histogram,
+    labelled by URL name (not path, which would add a series per object),
+    method and status class. Costs one timer read and one histogram update,
+    so it stays on in production.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        VIEW_SECONDS.observe(
+            time.perf_counter() - started,
+            view=match.view_name if match else 'unmatched',
+            method=request.method if request.method in METRIC_METHODS else 'OTHER',
+            status=f"{response.status_code // 100}xx",
+        )
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0005_childvaccination_completion_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='childvaccination',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['scheduled_date', 'reminder_day_before_sent', 'reminder_on_day_sent'], name='childvacc_reminder_due_idx'),
+        ),
+    ]
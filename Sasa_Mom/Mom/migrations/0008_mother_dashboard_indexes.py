@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 11:05
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0007_outboundmessage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mother',
+            index=models.Index(fields=['-created_at', '-id'], name='mother_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mother',
+            index=models.Index(fields=['hospital', '-created_at', '-id'], name='mother_hospital_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mother',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='mother_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mother',
+            index=models.Index(fields=['phone'], name='mother_phone_idx'),
+        ),
+    ]
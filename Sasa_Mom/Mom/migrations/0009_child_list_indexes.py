@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-18 11:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0008_mother_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(fields=['name', 'id'], name='child_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(django.db.models.functions.text.Upper('name'), name='child_name_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(fields=['dob'], name='child_dob_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+from Mom.utils.phone import normalize_phone
+
+BATCH_SIZE = 2000
+
+
+def backfill_phone_e164(apps, schema_editor):
+    Mother = apps.get_model('Mom', 'Mother')
+    last_id = 0
+    while True:
+        batch = list(
+            Mother.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .only('pk', 'phone')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for mother in batch:
+            mother.phone_e164 = normalize_phone(mother.phone)
+        Mother.objects.bulk_update(batch, ['phone_e164'])
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0009_child_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mother',
+            name='mother_phone_idx',
+        ),
+        # Add the column unindexed, backfill it, then build the index once
+        migrations.AddField(
+            model_name='mother',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_phone_e164, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='mother',
+            name='phone_e164',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 14:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0010_mother_phone_e164'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HospitalDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hospital', models.CharField(max_length=255)),
+                ('date', models.DateField()),
+                ('due_today', models.PositiveIntegerField(default=0)),
+                ('due_tomorrow', models.PositiveIntegerField(default=0)),
+                ('overdue', models.PositiveIntegerField(default=0)),
+                ('active_pregnancies', models.PositiveIntegerField(default=0)),
+                ('deliveries_this_week', models.PositiveIntegerField(default=0)),
+                ('mothers', models.PositiveIntegerField(default=0)),
+                ('consenting_mothers', models.PositiveIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'hospital daily stats',
+                'constraints': [models.UniqueConstraint(fields=('date', 'hospital'), name='hospital_stats_date_hospital_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+
+def backfill_next_due(apps, schema_editor):
+    """Same rules as Mom.services.next_due, on the historical models."""
+    Child = apps.get_model('Mom', 'Child')
+    ChildVaccination = apps.get_model('Mom', 'ChildVaccination')
+    today = timezone.localdate()
+    last_id = 0
+    while True:
+        batch = list(Child.objects.filter(pk__gt=last_id).order_by('pk').only('pk')[:BATCH_SIZE])
+        if not batch:
+            break
+        by_id = {child.pk: child for child in batch}
+        pending = (
+            ChildVaccination.objects.filter(child_id__in=by_id, completed=False, scheduled_date__isnull=False)
+            .order_by('child_id', 'scheduled_date', 'id')
+            .values_list('child_id', 'scheduled_date', 'vaccination_id')
+        )
+        for child_id, scheduled_date, vaccination_id in pending:
+            child = by_id[child_id]
+            if child.next_due_date is None:
+                child.next_due_date = scheduled_date
+                child.next_due_vaccination_id = vaccination_id
+            if scheduled_date < today:
+                child.overdue_count += 1
+        Child.objects.bulk_update(batch, ['next_due_date', 'next_due_vaccination', 'overdue_count'])
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0011_hospitaldailystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='child',
+            name='next_due_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='child',
+            name='next_due_vaccination',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='Mom.vaccination'),
+        ),
+        migrations.AddField(
+            model_name='child',
+            name='overdue_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_next_due, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(fields=['next_due_date', 'id'], name='child_next_due_idx'),
+        ),
+    ]
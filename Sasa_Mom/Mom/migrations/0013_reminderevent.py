@@ -0,0 +1,97 @@
+# Generated by Django 6.0 on 2026-10-18 16:02
+
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+
+def backfill_reminder_events(apps, schema_editor):
+    """
+    Create events for every upcoming appointment, with the same rules as
+    Mom.services.reminder_events. Past appointments get none.
+    """
+    ReminderEvent = apps.get_model('Mom', 'ReminderEvent')
+    ChildVaccination = apps.get_model('Mom', 'ChildVaccination')
+    Pregnancy = apps.get_model('Mom', 'Pregnancy')
+    ScheduledVaccination = apps.get_model('Mom', 'ScheduledVaccination')
+    today = timezone.localdate()
+    hour = getattr(settings, 'REMINDER_SEND_HOUR', 8)
+
+    def event(kind, offset, mother_id, event_date, sent=False, **source):
+        send_at = timezone.make_aware(datetime.datetime.combine(
+            event_date - datetime.timedelta(days=offset), datetime.time(hour),
+        ))
+        if timezone.localdate(send_at) < today:
+            return None
+        return ReminderEvent(
+            kind=kind, state='sent' if sent else 'pending', mother_id=mother_id,
+            event_date=event_date, send_at=send_at, **source,
+        )
+
+    def walk(queryset, fields):
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', *fields)[:BATCH_SIZE])
+            if not batch:
+                break
+            yield batch
+            last_id = batch[-1][0]
+
+    upcoming = ChildVaccination.objects.filter(completed=False, scheduled_date__gte=today)
+    for batch in walk(upcoming, ['child__mother_id', 'scheduled_date', 'reminder_day_before_sent', 'reminder_on_day_sent']):
+        events = []
+        for pk, mother_id, scheduled_date, day_before_sent, on_day_sent in batch:
+            events.append(event('vaccine_day_before', 1, mother_id, scheduled_date, day_before_sent, child_vaccination_id=pk))
+            events.append(event('vaccine_on_day', 0, mother_id, scheduled_date, on_day_sent, child_vaccination_id=pk))
+        ReminderEvent.objects.bulk_create([e for e in events if e])
+
+    visits = Pregnancy.objects.filter(next_visit__gt=today)
+    for batch in walk(visits, ['mother_id', 'next_visit']):
+        ReminderEvent.objects.bulk_create([
+            event('visit_day_before', 1, mother_id, next_visit, pregnancy_id=pk)
+            for pk, mother_id, next_visit in batch
+        ])
+
+    maternal = ScheduledVaccination.objects.filter(notified=False, due_date__gt=today)
+    for batch in walk(maternal, ['mother_id', 'due_date']):
+        ReminderEvent.objects.bulk_create([
+            event('maternal_vaccine_day_before', 1, mother_id, due_date, scheduled_vaccination_id=pk)
+            for pk, mother_id, due_date in batch
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0012_child_next_due'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('vaccine_day_before', 'Child vaccination, day before'), ('vaccine_on_day', 'Child vaccination, on the day'), ('visit_day_before', 'Antenatal visit, day before'), ('maternal_vaccine_day_before', 'Maternal vaccination, day before')], max_length=40)),
+                ('state', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('skipped', 'Skipped (no consent)'), ('expired', 'Expired'), ('cancelled', 'Cancelled')], default='pending', max_length=10)),
+                ('event_date', models.DateField()),
+                ('send_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('child_vaccination', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminder_events', to='Mom.childvaccination')),
+                ('message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reminder_events', to='Mom.outboundmessage')),
+                ('mother', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_events', to='Mom.mother')),
+                ('pregnancy', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminder_events', to='Mom.pregnancy')),
+                ('scheduled_vaccination', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reminder_events', to='Mom.scheduledvaccination')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('state', 'pending')), fields=['send_at', 'mother'], name='reminder_pending_send_at_idx')],
+                'constraints': [models.UniqueConstraint(fields=('child_vaccination', 'kind'), name='reminder_child_vaccination_uniq'), models.UniqueConstraint(fields=('pregnancy', 'kind'), name='reminder_pregnancy_uniq'), models.UniqueConstraint(fields=('scheduled_vaccination', 'kind'), name='reminder_scheduled_vaccination_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_reminder_events, migrations.RunPython.noop),
+    ]
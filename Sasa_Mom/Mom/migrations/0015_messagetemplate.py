@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0014_schedulerlock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(choices=[('en', 'English'), ('sw', 'Kiswahili')], max_length=10)),
+                ('kind', models.CharField(choices=[('vaccine_day_before', 'Child vaccination, day before'), ('vaccine_on_day', 'Child vaccination, on the day'), ('visit_day_before', 'Antenatal visit, day before'), ('maternal_vaccine_day_before', 'Maternal vaccination, day before')], max_length=40)),
+                ('body', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['kind', 'language'],
+                'constraints': [models.UniqueConstraint(fields=('language', 'kind'), name='message_template_language_kind_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-18 17:05
+
+from django.db import migrations
+from django.db.models import Count
+
+BATCH_SIZE = 2000
+
+
+def dedupe_child_vaccinations(apps, schema_editor):
+    """
+    Keep one ChildVaccination per (child, vaccination) before the unique
+    constraint goes on: a completed row if there is one, else the oldest.
+    Reminder events of the dropped rows go with them (CASCADE).
+    """
+    ChildVaccination = apps.get_model('Mom', 'ChildVaccination')
+    child_ids = list(
+        ChildVaccination.objects.values('child_id', 'vaccination_id')
+        .annotate(rows=Count('id'))
+        .filter(rows__gt=1)
+        .order_by('child_id')
+        .values_list('child_id', flat=True)
+        .distinct()
+    )
+    for start in range(0, len(child_ids), BATCH_SIZE):
+        rows = (
+            ChildVaccination.objects.filter(child_id__in=child_ids[start:start + BATCH_SIZE])
+            .order_by('child_id', 'vaccination_id', '-completed', 'id')
+            .values_list('pk', 'child_id', 'vaccination_id')
+        )
+        seen, extra = set(), []
+        for pk, child_id, vaccination_id in rows:
+            if (child_id, vaccination_id) in seen:
+                extra.append(pk)
+            else:
+                seen.add((child_id, vaccination_id))
+        ChildVaccination.objects.filter(pk__in=extra).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0015_messagetemplate'),
+    ]
+
+    # The constraint is added by the next migration, in its own transaction:
+    # PostgreSQL refuses ALTER TABLE while this one's deferred FK checks are pending
+    operations = [
+        migrations.RunPython(dedupe_child_vaccinations, migrations.RunPython.noop),
+    ]
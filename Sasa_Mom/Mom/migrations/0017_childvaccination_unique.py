@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0016_childvaccination_dedupe'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='childvaccination',
+            constraint=models.UniqueConstraint(fields=('child', 'vaccination'), name='childvacc_child_vaccination_uniq'),
+        ),
+    ]
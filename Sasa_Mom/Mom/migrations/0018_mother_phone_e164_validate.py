@@ -0,0 +1,66 @@
+# Generated by Django 6.0 on 2026-10-18 18:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+from Mom.utils.phone import format_phone
+
+BATCH_SIZE = 2000
+
+
+def validate_phone_e164(apps, schema_editor):
+    """
+    Recompute phone_e164 with the stricter format_phone(): numbers that are
+    not valid E.164 are stored as '' and their reminders are skipped. Stops
+    if two mothers share a phone, since merging them needs a person.
+    """
+    Mother = apps.get_model('Mom', 'Mother')
+    last_id = 0
+    while True:
+        batch = list(
+            Mother.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .only('pk', 'phone', 'phone_e164')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        changed = []
+        for mother in batch:
+            phone_e164 = format_phone(mother.phone) or ''
+            if phone_e164 != mother.phone_e164:
+                mother.phone_e164 = phone_e164
+                changed.append(mother)
+        Mother.objects.bulk_update(changed, ['phone_e164'])
+        last_id = batch[-1].pk
+
+    duplicates = list(
+        Mother.objects.exclude(phone_e164='')
+        .values('phone_e164')
+        .annotate(mothers=Count('id'))
+        .filter(mothers__gt=1)
+        .order_by('phone_e164')
+        .values_list('phone_e164', flat=True)[:20]
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Several mothers are registered with these phones; merge or correct them "
+            f"in the admin, then migrate again: {', '.join(duplicates)}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0017_childvaccination_unique'),
+    ]
+
+    # The constraint is added by the next migration, in its own transaction,
+    # as for 0016/0017
+    operations = [
+        migrations.RunPython(validate_phone_e164, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reminderevent',
+            name='state',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('skipped', 'Skipped (no consent or no valid phone)'), ('expired', 'Expired'), ('cancelled', 'Cancelled')], default='pending', max_length=10),
+        ),
+    ]
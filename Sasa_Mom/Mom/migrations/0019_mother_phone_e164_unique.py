@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0018_mother_phone_e164_validate'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='mother',
+            constraint=models.UniqueConstraint(condition=models.Q(('phone_e164', ''), _negated=True), fields=('phone_e164',), name='mother_phone_e164_uniq'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Mom', '0019_mother_phone_e164_unique'),
+    ]
+
+    # Reminder selection reads ReminderEvent since 0013, so the old index on
+    # the legacy sent flags served no query
+    operations = [
+        migrations.RemoveIndex(
+            model_name='childvaccination',
+            name='childvacc_reminder_due_idx',
+        ),
+        migrations.AddIndex(
+            model_name='childvaccination',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['scheduled_date'], name='childvacc_pending_date_idx'),
+        ),
+    ]
@@ -1,38 +1,155 @@
+import sys
+
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.db.models.functions import Upper
+from .utils.phone import format_phone, normalize_phone
 # Create your models here.
   
 from django.db import models
 from django.utils import timezone
 
+def prefix_range(prefix):
+    """
+    (lower, upper) bounds of the strings starting with `prefix`: upper is
+    `prefix` with its last character bumped to the next code point, so it is
+    the first string past every match. Filtering with __gte/__lt on them is a
+    plain index range scan on every backend, where LIKE 'x%' (startswith) is
+    not: PostgreSQL only uses a btree index for LIKE under the C collation or
+    with pattern_ops.
+
+    The bounds assume the column sorts by code point, as SQLite and the C
+    (binary) collation do. Under a locale or ICU collation, characters do not
+    sort by code point and the range can miss or gain rows; give those
+    columns and their indexes a "C" collation (db_collation / Collate())
+    before filtering them this way.
+
+    upper is None when there is no such string (an empty prefix, or one made
+    only of U+10FFFF): every string from `lower` on matches.
+    """
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return prefix, None
+    return prefix, stem[:-1] + chr(ord(stem[-1]) + 1)
+
+
+def prefix_filter(field, prefix):
+    """filter() kwargs restricting `field` to the strings starting with `prefix`."""
+    lower, upper = prefix_range(prefix)
+    lookups = {f'{field}__gte': lower}
+    if upper is not None:
+        lookups[f'{field}__lt'] = upper
+    return lookups
+
+
+class MotherQuerySet(models.QuerySet):
+    def prefix_search(self, term):
+        """
+        Mothers whose phone (for terms starting with a digit or '+') or name
+        (case-insensitively) starts with `term`. Both are range scans, on
+        phone_e164's index and on mother_name_upper_idx.
+        """
+        term = term.strip()
+        if not term:
+            return self
+        if term[0].isdigit() or term[0] == '+':
+            return self.filter(**prefix_filter('phone_e164', normalize_phone(term)))
+        return self.alias(name_upper=Upper('name')).filter(**prefix_filter('name_upper', term.upper()))
+
+    def with_status(self):
+        """
+        Annotate each mother with `current_status`, computed in SQL with the
+        same rules as Mother.get_current_status(), so listing any number of
+        mothers costs a single query.
+        """
+        today = timezone.localdate()
+        latest_due = Pregnancy.objects.filter(mother=models.OuterRef('pk')).order_by('-id').values('due_date')[:1]
+
+        return self.annotate(
+            latest_due_date=models.Subquery(latest_due),
+            has_children=models.Exists(Child.objects.filter(mother=models.OuterRef('pk'))),
+            born_on_due_date=models.Exists(Child.objects.filter(
+                mother=models.OuterRef('pk'), dob=models.OuterRef('latest_due_date'),
+            )),
+        ).annotate(
+            current_status=models.Case(
+                models.When(latest_due_date__gte=today, then=models.Value(Mother.STATUS_PREGNANT)),
+                models.When(
+                    latest_due_date__lt=today, born_on_due_date=False,
+                    then=models.Value(Mother.STATUS_DUE_DATE_PASSED),
+                ),
+                models.When(has_children=True, then=models.Value(Mother.STATUS_CHILD_BORN)),
+                default=models.Value(Mother.STATUS_PENDING),
+                output_field=models.CharField(),
+            ),
+        )
+
+
 class Mother(models.Model):
+    STATUS_PREGNANT = "Pregnant (Antenatal Care)"
+    STATUS_DUE_DATE_PASSED = "Due Date Passed / Post-Natal Checkup"
+    STATUS_CHILD_BORN = "Child Born (Active Post-Natal Care)"
+    STATUS_PENDING = "New Registration / Status Pending"
+
     name = models.CharField(max_length=255)
     phone = models.CharField(max_length=20, help_text="Format 07..or 01...or +254....")
+    # Normalized copy of `phone`, kept in sync on save; used for reminders and
+    # duplicate checks. Empty when `phone` is not a valid number.
+    phone_e164 = models.CharField(max_length=20, blank=True, db_index=True, editable=False)
     language = models.CharField(max_length=50, default='en')
     consent = models.BooleanField(db_default=False)
     hospital = models.CharField(max_length=255)
     created_at = models.DateTimeField(default=timezone.now)
+
+    objects = MotherQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Staff dashboard: keyset pagination, optionally within one hospital
+            models.Index(fields=['-created_at', '-id'], name='mother_created_id_idx'),
+            models.Index(fields=['hospital', '-created_at', '-id'], name='mother_hospital_created_idx'),
+            # Prefix search on name (case-insensitive); phone uses phone_e164's index
+            models.Index(Upper('name'), name='mother_name_upper_idx'),
+        ]
+        constraints = [
+            # One registration per phone, whichever way it was typed
+            models.UniqueConstraint(
+                fields=['phone_e164'], condition=~models.Q(phone_e164=''), name='mother_phone_e164_uniq',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} — {self.phone}"
+
+    def save(self, *args, **kwargs):
+        self.phone_e164 = format_phone(self.phone) or ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_e164'}
+        super().save(*args, **kwargs)
         
     def get_current_status(self):
+        # Already computed in SQL by Mother.objects.with_status()
+        if hasattr(self, 'current_status'):
+            return self.current_status
+
         today = timezone.localdate()
         
         latest_pregnancy = self.pregnancies.order_by('-id').first() 
         
         if latest_pregnancy:
             if latest_pregnancy.due_date and latest_pregnancy.due_date >= today:
-                return "Pregnant (Antenatal Care)"
+                return self.STATUS_PREGNANT
             
-            if latest_pregnancy.due_date and latest_pregnancy.due_date < today and not self.children.filter(dob__date=latest_pregnancy.due_date).exists():
-                return "Due Date Passed / Post-Natal Checkup"
+            if latest_pregnancy.due_date and latest_pregnancy.due_date < today and not self.children.filter(dob=latest_pregnancy.due_date).exists():
+                return self.STATUS_DUE_DATE_PASSED
 
         if self.children.exists():
-            return "Child Born (Active Post-Natal Care)"
+            return self.STATUS_CHILD_BORN
+
+        return self.STATUS_PENDING
 
-        return "New Registration / Status Pending"
 class Pregnancy(models.Model):
     mother = models.ForeignKey(Mother, on_delete=models.CASCADE, related_name='pregnancies')
     due_date = models.DateField(null=True, blank=True)
@@ -43,6 +160,21 @@ class Pregnancy(models.Model):
     def __str__(self):
         return f"Pregnancy for {self.mother.name} (due {self.due_date})"
     
+class ChildQuerySet(models.QuerySet):
+    """
+    Due-list lookups on the denormalized next-due fields; each is a range
+    read on child_next_due_idx instead of a scan of ChildVaccination.
+    """
+    def due_between(self, start, end):
+        return self.filter(next_due_date__range=(start, end))
+
+    def defaulters(self, today=None):
+        return self.filter(next_due_date__lt=today or timezone.localdate())
+
+    def up_to_date(self, today=None):
+        return self.exclude(next_due_date__lt=today or timezone.localdate())
+
+
 class Child(models.Model):
     GENDER_CHOICES=[
         ('Male','Male'),
@@ -55,6 +187,28 @@ class Child(models.Model):
     gender = models.CharField(max_length=10,choices=GENDER_CHOICES,default='Female')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized from ChildVaccination by Mom/services/next_due.py: the
+    # earliest pending dose (past or future) and how many pending doses were
+    # already overdue when last refreshed. NULL next_due_date = nothing pending.
+    next_due_date = models.DateField(null=True, blank=True, editable=False)
+    next_due_vaccination = models.ForeignKey(
+        'Vaccination', on_delete=models.SET_NULL, null=True, blank=True,
+        editable=False, related_name='+',
+    )
+    overdue_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ChildQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Children list: keyset pagination by name and prefix/DOB search
+            models.Index(fields=['name', 'id'], name='child_name_id_idx'),
+            models.Index(Upper('name'), name='child_name_upper_idx'),
+            models.Index(fields=['dob'], name='child_dob_idx'),
+            # Due lists and defaulter lists
+            models.Index(fields=['next_due_date', 'id'], name='child_next_due_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name or 'Child'} — {self.mother.name}"
     
@@ -79,9 +233,213 @@ class ChildVaccination(models.Model):
     reminder_on_day_sent = models.BooleanField(default=False)
     completion_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        indexes = [
+            # Pending doses by date: dashboard stats (due/overdue counts) and
+            # the check_scheduled_vaccinations status filters
+            models.Index(
+                fields=['scheduled_date'],
+                condition=models.Q(completed=False),
+                name='childvacc_pending_date_idx',
+            ),
+        ]
+        constraints = [
+            # One dose row per vaccine, even when two requests schedule a child at once
+            models.UniqueConstraint(fields=['child', 'vaccination'], name='childvacc_child_vaccination_uniq'),
+        ]
+
 class ScheduledVaccination(models.Model):
     mother = models.ForeignKey(Mother, on_delete=models.CASCADE)
     vaccination = models.ForeignKey(Vaccination, on_delete=models.CASCADE)
     due_date = models.DateField()
     notified = models.BooleanField(default=False)
+
+class OutboundMessage(models.Model):
+    """
+    Transactional outbox for SMS. Rows are written in the same transaction
+    that marks a reminder as sent and delivered later by `drain_outbox`.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_LEASED = 'leased'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_LEASED, 'Leased'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    mother = models.ForeignKey(Mother, on_delete=models.SET_NULL, null=True, blank=True, related_name='messages')
+    kind = models.CharField(max_length=50, blank=True)
+    to = models.CharField(max_length=20)
+    body = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    provider_id = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+
+    available_at = models.DateTimeField(default=timezone.now)
+    lease_token = models.UUIDField(null=True, blank=True)
+    leased_until = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbound_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind or 'SMS'} to {self.to} ({self.status})"
+
+
+class HospitalDailyStats(models.Model):
+    """
+    Headline dashboard numbers for one hospital on one day, materialized by
+    `refresh_dashboard_stats` so the dashboard never aggregates live tables.
+    """
+    hospital = models.CharField(max_length=255)
+    date = models.DateField()
+
+    due_today = models.PositiveIntegerField(default=0)
+    due_tomorrow = models.PositiveIntegerField(default=0)
+    overdue = models.PositiveIntegerField(default=0)
+    active_pregnancies = models.PositiveIntegerField(default=0)
+    deliveries_this_week = models.PositiveIntegerField(default=0)
+    mothers = models.PositiveIntegerField(default=0)
+    consenting_mothers = models.PositiveIntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            # Also serves the dashboard's "all hospitals for a day" read
+            models.UniqueConstraint(fields=['date', 'hospital'], name='hospital_stats_date_hospital_uniq'),
+        ]
+        verbose_name_plural = 'hospital daily stats'
+
+    def __str__(self):
+        return f"{self.hospital} — {self.date}"
+
+    @property
+    def consent_rate(self):
+        if not self.mothers:
+            return None
+        return self.consenting_mothers / self.mothers
+
+
+class ReminderEvent(models.Model):
+    """
+    One reminder to send to a mother at `send_at`, for any source: a child's
+    vaccination, an antenatal visit or a maternal vaccination. Rows are kept
+    in sync with their source by Mom/services/reminder_events.py, and the
+    dispatcher reads them with one range scan on send_at.
+    """
+    KIND_VACCINE_DAY_BEFORE = 'vaccine_day_before'
+    KIND_VACCINE_ON_DAY = 'vaccine_on_day'
+    KIND_VISIT_DAY_BEFORE = 'visit_day_before'
+    KIND_MATERNAL_VACCINE_DAY_BEFORE = 'maternal_vaccine_day_before'
+    KIND_CHOICES = [
+        (KIND_VACCINE_DAY_BEFORE, 'Child vaccination, day before'),
+        (KIND_VACCINE_ON_DAY, 'Child vaccination, on the day'),
+        (KIND_VISIT_DAY_BEFORE, 'Antenatal visit, day before'),
+        (KIND_MATERNAL_VACCINE_DAY_BEFORE, 'Maternal vaccination, day before'),
+    ]
+
+    STATE_PENDING = 'pending'
+    STATE_SENT = 'sent'
+    STATE_SKIPPED = 'skipped'
+    STATE_EXPIRED = 'expired'
+    STATE_CANCELLED = 'cancelled'
+    STATE_CHOICES = [
+        (STATE_PENDING, 'Pending'),
+        (STATE_SENT, 'Sent'),
+        (STATE_SKIPPED, 'Skipped (no consent or no valid phone)'),
+        (STATE_EXPIRED, 'Expired'),
+        (STATE_CANCELLED, 'Cancelled'),
+    ]
+
+    kind = models.CharField(max_length=40, choices=KIND_CHOICES)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default=STATE_PENDING)
+    mother = models.ForeignKey(Mother, on_delete=models.CASCADE, related_name='reminder_events')
+    event_date = models.DateField()
+    send_at = models.DateTimeField()
+
+    # Exactly one source is set, depending on `kind`
+    child_vaccination = models.ForeignKey(
+        ChildVaccination, on_delete=models.CASCADE, null=True, blank=True, related_name='reminder_events',
+    )
+    pregnancy = models.ForeignKey(
+        Pregnancy, on_delete=models.CASCADE, null=True, blank=True, related_name='reminder_events',
+    )
+    scheduled_vaccination = models.ForeignKey(
+        ScheduledVaccination, on_delete=models.CASCADE, null=True, blank=True, related_name='reminder_events',
+    )
+
+    message = models.ForeignKey(
+        OutboundMessage, on_delete=models.SET_NULL, null=True, blank=True, related_name='reminder_events',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Dispatcher: pending reminders in send order
+            models.Index(
+                fields=['send_at', 'mother'],
+                condition=models.Q(state='pending'),
+                name='reminder_pending_send_at_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['child_vaccination', 'kind'], name='reminder_child_vaccination_uniq'),
+            models.UniqueConstraint(fields=['pregnancy', 'kind'], name='reminder_pregnancy_uniq'),
+            models.UniqueConstraint(fields=['scheduled_vaccination', 'kind'], name='reminder_scheduled_vaccination_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.mother_id} at {self.send_at} ({self.state})"
+
+
+class SchedulerLock(models.Model):
+    """
+    Lease held by the running `run_scheduler` process so only one instance
+    dispatches reminders. A lease that is not renewed before `expires_at`
+    may be taken over by a standby instance.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    owner = models.CharField(max_length=255, blank=True)
+    expires_at = models.DateTimeField(default=timezone.now)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} held by {self.owner or 'nobody'} until {self.expires_at}"
+
+
+class MessageTemplate(models.Model):
+    """
+    Admin-edited wording of one reminder kind in one language. Rows override
+    the built-in defaults in Mom/services/message_templates.py, which also
+    lists the {placeholders} each kind may use.
+    """
+    LANGUAGE_CHOICES = [
+        ('en', 'English'),
+        ('sw', 'Kiswahili'),
+    ]
+
+    language = models.CharField(max_length=10, choices=LANGUAGE_CHOICES)
+    kind = models.CharField(max_length=40, choices=ReminderEvent.KIND_CHOICES)
+    body = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['kind', 'language']
+        constraints = [
+            models.UniqueConstraint(fields=['language', 'kind'], name='message_template_language_kind_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} ({self.get_language_display()})"
@@ -0,0 +1,185 @@
+import datetime
+import io
+import platform
+import statistics
+import time
+from dataclasses import dataclass
+
+import django
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from Mom.models import Child, ChildVaccination, Mother, OutboundMessage, ReminderEvent
+from Mom.services import page_cache
+from Mom.utils import schedule_initial_vaccinations
+
+# Fresh children scheduled per run of the schedule_initial_vaccinations case
+SCHEDULE_CHILDREN = 50
+
+
+@dataclass
+class Case:
+    """
+    One benchmark. `setup` runs untimed before every repetition; `run` is
+    timed with its queries counted.
+    """
+    name: str
+    run: object
+    setup: object = None
+
+
+def measure(case, repeat):
+    # One untimed warm-up so imports and first-use caches are not measured
+    if case.setup:
+        case.setup()
+    case.run()
+
+    timings, queries = [], []
+    for _ in range(repeat):
+        if case.setup:
+            case.setup()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            case.run()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+    return {
+        'wall_ms': round(statistics.median(timings), 2),
+        'wall_ms_min': round(min(timings), 2),
+        'wall_ms_max': round(max(timings), 2),
+        'queries': max(queries),
+    }
+
+
+class BenchmarkSuite:
+    """
+    Times the staff-facing views and the reminder and scheduling paths
+    against whatever registry is in the current database (normally one
+    built by `generate_fake_registry`). Views go through the test Client as
+    a logged-in staff user, so middleware and templates are included.
+    """
+
+    def __init__(self, repeat=5):
+        self.repeat = repeat
+        self.client = Client()
+        user, _ = User.objects.get_or_create(username='benchmark', defaults={'is_staff': True})
+        self.client.force_login(user)
+
+        # The busiest mother and her first child make the heaviest detail pages
+        self.mother = (
+            Mother.objects.annotate(child_count=Count('children'))
+            .order_by('-child_count', 'pk')
+            .first()
+        )
+        self.child = Child.objects.filter(mother=self.mother).order_by('pk').first()
+        self.due_events = []
+        self.new_children = []
+
+    def cases(self):
+        mother_url = reverse('motherPage', args=[self.mother.pk])
+        cases = [
+            Case('staff_dashboard', lambda: self.get(reverse('staff_dashboard'))),
+            Case('motherPage', lambda: self.get(mother_url),
+                 setup=lambda: page_cache.bump('mother', [self.mother.pk])),
+            Case('motherPage (cached)', lambda: self.get(mother_url)),
+            Case('child_list', lambda: self.get(reverse('child_list'))),
+        ]
+        if self.child is not None:
+            child_url = reverse('child_detail', args=[self.child.pk])
+            cases += [
+                Case('child_detail', lambda: self.get(child_url),
+                     setup=lambda: page_cache.bump('child', [self.child.pk])),
+                Case('child_detail (cached)', lambda: self.get(child_url)),
+            ]
+        cases += [
+            Case('send_vaccine_reminders', self.send_reminders, setup=self.reset_reminders),
+            Case(f'schedule_initial_vaccinations x{SCHEDULE_CHILDREN}', self.schedule_children,
+                 setup=self.add_children),
+        ]
+        return cases
+
+    def run(self, progress=None):
+        self.due_events = list(
+            ReminderEvent.objects.filter(state=ReminderEvent.STATE_PENDING, send_at__lte=timezone.now())
+            .values_list('pk', flat=True)
+        )
+        results = {}
+        for case in self.cases():
+            results[case.name] = measure(case, self.repeat)
+            if progress:
+                progress(case.name, results[case.name])
+        return results
+
+    def get(self, url):
+        response = self.client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+        return response
+
+    # send_vaccine_reminders: every repetition sends the same due reminders
+
+    def reset_reminders(self):
+        ReminderEvent.objects.filter(pk__in=self.due_events).update(
+            state=ReminderEvent.STATE_PENDING, message=None, sent_at=None,
+        )
+        OutboundMessage.objects.all().delete()
+
+    def send_reminders(self):
+        call_command('send_vaccine_reminders', stdout=io.StringIO())
+
+    # schedule_initial_vaccinations: fresh, unscheduled children each time
+
+    def add_children(self):
+        if self.new_children:
+            Child.objects.filter(pk__in=[child.pk for child in self.new_children]).delete()
+        today = timezone.localdate()
+        self.new_children = Child.objects.bulk_create([
+            Child(mother=self.mother, name=f"Benchmark {i}", dob=today - datetime.timedelta(days=i))
+            for i in range(SCHEDULE_CHILDREN)
+        ])
+
+    def schedule_children(self):
+        for child in self.new_children:
+            schedule_initial_vaccinations(child)
+
+
+def environment(**extra):
+    return {
+        'created_at': timezone.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'rows': {
+            'mothers': Mother.objects.count(),
+            'children': Child.objects.count(),
+            'vaccinations': ChildVaccination.objects.count(),
+            'reminder_events': ReminderEvent.objects.count(),
+        },
+        **extra,
+    }
+
+
+def compare(baseline, current, tolerance):
+    """
+    Yield (name, message, regressed) for each benchmark in `current`. A
+    benchmark regresses when it runs more queries than the baseline or its
+    median wall time grows by more than `tolerance` (0.25 = 25%).
+    """
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            yield name, 'new', False
+            continue
+        ratio = result['wall_ms'] / before['wall_ms'] if before['wall_ms'] else 1.0
+        query_delta = result['queries'] - before['queries']
+        regressed = query_delta > 0 or ratio > 1 + tolerance
+        yield name, (
+            f"{before['wall_ms']:.1f} -> {result['wall_ms']:.1f} ms ({ratio - 1:+.0%}), "
+            f"{before['queries']} -> {result['queries']} queries"
+        ), regressed
@@ -0,0 +1,105 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from Mom.models import ChildVaccination, HospitalDailyStats, Mother, Pregnancy
+
+COUNTER_FIELDS = [
+    'due_today', 'due_tomorrow', 'overdue',
+    'active_pregnancies', 'deliveries_this_week',
+    'mothers', 'consenting_mothers',
+]
+
+
+def compute(day, hospitals=None):
+    """
+    Aggregate the dashboard counters for `day`, per hospital.
+
+    Three grouped queries in total (doses, pregnancies, mothers), however
+    many hospitals there are. Returns {hospital: {field: count}}.
+    """
+    tomorrow = day + timedelta(days=1)
+    week_end = day + timedelta(days=6)
+    stats = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+
+    mothers = Mother.objects.all()
+    doses = ChildVaccination.objects.filter(completed=False, scheduled_date__lte=tomorrow)
+    pregnancies = Pregnancy.objects.filter(due_date__gte=day)
+    if hospitals is not None:
+        # Hospitals that emptied out still get a row of zeroes
+        for hospital in hospitals:
+            stats[hospital]
+        mothers = mothers.filter(hospital__in=hospitals)
+        doses = doses.filter(child__mother__hospital__in=hospitals)
+        pregnancies = pregnancies.filter(mother__hospital__in=hospitals)
+
+    for row in mothers.values('hospital').annotate(
+        mothers=Count('id'),
+        consenting_mothers=Count('id', filter=Q(consent=True)),
+    ).order_by():
+        stats[row.pop('hospital')].update(row)
+
+    for row in doses.values(hospital=F('child__mother__hospital')).annotate(
+        due_today=Count('id', filter=Q(scheduled_date=day)),
+        due_tomorrow=Count('id', filter=Q(scheduled_date=tomorrow)),
+        overdue=Count('id', filter=Q(scheduled_date__lt=day)),
+    ).order_by():
+        stats[row.pop('hospital')].update(row)
+
+    for row in pregnancies.values(hospital=F('mother__hospital')).annotate(
+        active_pregnancies=Count('id'),
+        deliveries_this_week=Count('id', filter=Q(due_date__lte=week_end)),
+    ).order_by():
+        stats[row.pop('hospital')].update(row)
+
+    return stats
+
+
+def refresh(day=None, hospitals=None):
+    """
+    Recompute and upsert the HospitalDailyStats rows for `day` (default
+    today), zeroing hospitals that no longer have any records. Rows for
+    other days are left alone as history. Returns the number of rows
+    written.
+    """
+    day = day or timezone.localdate()
+    now = timezone.now()
+    stats = compute(day, hospitals)
+    if hospitals is None:
+        # Hospitals with a row for `day` that have since emptied out are
+        # absent from compute(); overwrite their counters with zeroes
+        for hospital in HospitalDailyStats.objects.filter(date=day).values_list('hospital', flat=True):
+            stats[hospital]
+
+    rows = [
+        HospitalDailyStats(hospital=hospital, date=day, refreshed_at=now, **counters)
+        for hospital, counters in stats.items()
+    ]
+    HospitalDailyStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['date', 'hospital'],
+        update_fields=[*COUNTER_FIELDS, 'refreshed_at'],
+    )
+    return len(rows)
+
+
+def for_day(day=None, hospital=None):
+    """
+    The materialized rows for `day`, plus an unsaved row holding their
+    totals. One indexed read on (date, hospital).
+    """
+    day = day or timezone.localdate()
+    rows = HospitalDailyStats.objects.filter(date=day).order_by('hospital')
+    if hospital:
+        rows = rows.filter(hospital=hospital)
+    rows = list(rows)
+
+    totals = HospitalDailyStats(hospital='All hospitals', date=day, refreshed_at=None)
+    for field in COUNTER_FIELDS:
+        setattr(totals, field, sum(getattr(row, field) for row in rows))
+    if rows:
+        totals.refreshed_at = min(row.refreshed_at for row in rows)
+    return rows, totals
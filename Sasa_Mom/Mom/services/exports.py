@@ -0,0 +1,231 @@
+import csv
+import datetime
+import zlib
+from dataclasses import dataclass
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+from Mom.models import Child, ChildVaccination, Mother
+
+CHUNK_SIZE = 2000
+# Rows are coalesced into writes of about this size before being sent
+BUFFER_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    """
+    What one export contains: the model, the (header, lookup) columns
+    projected with values_list, and the lookups the hospital and date-range
+    filters apply to. `free_text` names the columns typed in by mothers or
+    staff, which CSV output guards against formula injection.
+    """
+    model: type
+    columns: tuple
+    hospital_field: str
+    date_field: str
+    free_text: tuple = ()
+
+    @property
+    def header(self):
+        return [name for name, _ in self.columns]
+
+    @property
+    def lookups(self):
+        return [lookup for _, lookup in self.columns]
+
+
+EXPORTS = {
+    'mothers': ExportSpec(
+        model=Mother,
+        columns=(
+            ('id', 'id'),
+            ('name', 'name'),
+            ('phone', 'phone_e164'),
+            ('language', 'language'),
+            ('consent', 'consent'),
+            ('hospital', 'hospital'),
+            ('registered_at', 'created_at'),
+        ),
+        hospital_field='hospital',
+        date_field='created_at',
+        free_text=('name', 'language', 'hospital'),
+    ),
+    'children': ExportSpec(
+        model=Child,
+        columns=(
+            ('id', 'id'),
+            ('mother_id', 'mother_id'),
+            ('hospital', 'mother__hospital'),
+            ('name', 'name'),
+            ('dob', 'dob'),
+            ('gender', 'gender'),
+        ),
+        hospital_field='mother__hospital',
+        date_field='dob',
+        free_text=('hospital', 'name'),
+    ),
+    'vaccinations': ExportSpec(
+        model=ChildVaccination,
+        columns=(
+            ('id', 'id'),
+            ('child_id', 'child_id'),
+            ('mother_id', 'child__mother_id'),
+            ('hospital', 'child__mother__hospital'),
+            ('vaccine', 'vaccination__name'),
+            ('dose_order', 'vaccination__dose_order'),
+            ('scheduled_date', 'scheduled_date'),
+            ('completed', 'completed'),
+            ('completion_date', 'completion_date'),
+        ),
+        hospital_field='child__mother__hospital',
+        date_field='scheduled_date',
+        free_text=('hospital', 'vaccine'),
+    ),
+}
+
+
+def _day_bounds(field, date_from, date_to):
+    """
+    Range filters for `field`. DateTimeFields are compared against the
+    local start of day rather than with __date, so an index still applies.
+    """
+    filters = {}
+    if isinstance(field, models.DateTimeField):
+        if date_from:
+            filters[f'{field.name}__gte'] = _start_of_day(date_from)
+        if date_to:
+            filters[f'{field.name}__lt'] = _start_of_day(date_to + datetime.timedelta(days=1))
+    else:
+        if date_from:
+            filters[f'{field.name}__gte'] = date_from
+        if date_to:
+            filters[f'{field.name}__lte'] = date_to
+    return filters
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def export_rows(kind, hospital=None, date_from=None, date_to=None, chunk_size=CHUNK_SIZE):
+    """
+    Lazily yield tuples for export `kind`, ordered by primary key.
+
+    Rows are projected with values_list and fetched with a server-side
+    cursor where the database supports it, so memory stays flat however
+    many rows match.
+    """
+    spec = EXPORTS[kind]
+    queryset = spec.model.objects.all()
+    if hospital:
+        queryset = queryset.filter(**{spec.hospital_field: hospital})
+    queryset = queryset.filter(**_day_bounds(spec.model._meta.get_field(spec.date_field), date_from, date_to))
+    return queryset.order_by('pk').values_list(*spec.lookups).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object whose write() hands the line straight back."""
+    def write(self, value):
+        return value
+
+
+# Leading characters that make a spreadsheet read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def escape_formulas(rows, columns):
+    """
+    Prefix free-text cells that a spreadsheet would evaluate with a quote,
+    e.g. a name typed as =HYPERLINK(...). `columns` are row indexes.
+    """
+    for row in rows:
+        row = list(row)
+        for index in columns:
+            value = row[index]
+            if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+                row[index] = "'" + value
+        yield row
+
+
+def render_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header).encode()
+    for row in rows:
+        yield writer.writerow(row).encode()
+
+
+def render_json(header, rows):
+    """Stream a JSON array of objects, one row at a time."""
+    encoder = DjangoJSONEncoder()
+    yield b'['
+    separator = b''
+    for row in rows:
+        yield separator + encoder.encode(dict(zip(header, row))).encode()
+        separator = b',\n'
+    yield b']\n'
+
+
+RENDERERS = {
+    'csv': (render_csv, 'text/csv'),
+    'json': (render_json, 'application/json'),
+}
+
+
+def buffered(chunks, size=BUFFER_SIZE):
+    """
+    Join small byte strings into writes of roughly `size` bytes. The first
+    chunk (the header) goes out on its own, so the download starts before
+    the first rows are read.
+    """
+    chunks = iter(chunks)
+    for chunk in chunks:
+        yield chunk
+        break
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzip_stream(chunks, level=6):
+    """
+    Gzip an iterable of byte strings on the fly. The first chunk is flushed
+    straight through rather than held in the compressor's window.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    first = True
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if first:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            first = False
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(kind, fmt='csv', compress=False, **filters):
+    """
+    Return (chunks, content_type, filename) for an export. `chunks` is a
+    generator of bytes suitable for StreamingHttpResponse or a file.
+    """
+    spec = EXPORTS[kind]
+    render, content_type = RENDERERS[fmt]
+    rows = export_rows(kind, **filters)
+    if fmt == 'csv':
+        rows = escape_formulas(rows, [spec.header.index(name) for name in spec.free_text])
+    chunks = buffered(render(spec.header, rows))
+    filename = f"{kind}-{timezone.localdate():%Y%m%d}.{fmt}"
+    if compress:
+        chunks = gzip_stream(chunks)
+        content_type = 'application/gzip'
+        filename += '.gz'
+    return chunks, content_type, filename
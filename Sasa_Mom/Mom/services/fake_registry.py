@@ -0,0 +1,170 @@
+import datetime
+import random
+import time
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.utils import timezone
+
+from Mom.models import Child, ChildVaccination, Mother, Pregnancy
+from Mom.services import dashboard_stats, next_due, reminder_events
+from Mom.services.vaccination_catalog import get_catalog
+
+HOSPITALS = [
+    'Kenyatta National Hospital',
+    'Moi Teaching and Referral Hospital',
+    'Coast General Hospital',
+    'Jaramogi Oginga Odinga Teaching and Referral Hospital',
+    'Nakuru Level 5 Hospital',
+    'Machakos Level 5 Hospital',
+    'Thika Level 5 Hospital',
+    'Kakamega County General Hospital',
+    'Nyeri County Referral Hospital',
+    'Garissa County Referral Hospital',
+]
+FIRST_NAMES = [
+    'Achieng', 'Akinyi', 'Amina', 'Atieno', 'Chebet', 'Faith', 'Grace', 'Halima',
+    'Jepchirchir', 'Kawira', 'Mercy', 'Mwanaisha', 'Nafula', 'Njeri', 'Nyambura',
+    'Wairimu', 'Wanjiku', 'Wambui', 'Zawadi', 'Zuhura',
+]
+SURNAMES = [
+    'Kamau', 'Otieno', 'Mwangi', 'Ochieng', 'Wafula', 'Kiprono', 'Mutua', 'Njoroge',
+    'Omondi', 'Wekesa', 'Chege', 'Barasa', 'Kariuki', 'Hassan', 'Mohamed',
+]
+CHILD_NAMES = [
+    'Baraka', 'Imani', 'Neema', 'Tumaini', 'Amani', 'Jabari', 'Makena', 'Kito',
+    'Nia', 'Juma', 'Pendo', 'Bahati', 'Furaha', 'Riziki', 'Zuri', '',
+]
+
+# Share of mothers with an active pregnancy, and of past doses completed
+PREGNANT_SHARE = 0.4
+COMPLETED_SHARE = 0.9
+
+
+@dataclass
+class GenerateReport:
+    mothers: int = 0
+    pregnancies: int = 0
+    children: int = 0
+    vaccinations: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self):
+        return self.mothers / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def phone_for(index):
+    """Synthetic numbers are sequential, so a range query finds clashes."""
+    local = f"07{index:08d}"
+    return local, f"+254{local[1:]}"
+
+
+class FakeRegistryGenerator:
+    """
+    Bulk-create a synthetic registry of `mothers` mothers with pregnancies,
+    children and full vaccination histories.
+
+    Each mother, with her pregnancy, children and doses, is drawn from her
+    own Random seeded by (seed, phone index), so the same seed, `today` and
+    `phone_start` give the same rows whatever the chunk size. Past doses are
+    mostly completed and the rest left overdue; derived data (next-due
+    columns, reminder events, dashboard stats) is maintained the same way
+    the bulk import does it.
+    """
+
+    def __init__(self, mothers, seed=0, hospitals=len(HOSPITALS), chunk_size=1000,
+                 phone_start=0, today=None):
+        self.mothers = mothers
+        self.seed = seed
+        self.hospitals = HOSPITALS[:max(1, hospitals)]
+        self.chunk_size = chunk_size
+        self.phone_start = phone_start
+        self.today = today or timezone.localdate()
+        self.catalog = get_catalog()
+        self.report = GenerateReport()
+
+    def clashes(self):
+        """Number of existing mothers inside this run's phone range."""
+        first = phone_for(self.phone_start)[1]
+        last = phone_for(self.phone_start + self.mothers - 1)[1]
+        return Mother.objects.filter(phone_e164__gte=first, phone_e164__lte=last).count()
+
+    def run(self, progress=None):
+        started = time.monotonic()
+        for offset in range(0, self.mothers, self.chunk_size):
+            count = min(self.chunk_size, self.mothers - offset)
+            self.create_chunk(self.phone_start + offset, count)
+            self.report.elapsed = time.monotonic() - started
+            if progress:
+                progress(self.report)
+        dashboard_stats.refresh(self.today)
+        self.report.elapsed = time.monotonic() - started
+        return self.report
+
+    def create_chunk(self, first_index, count):
+        now = timezone.now()
+        mothers, rngs = [], []
+        for index in range(first_index, first_index + count):
+            rng = random.Random(f"{self.seed}:{index}")
+            rngs.append(rng)
+            phone, phone_e164 = phone_for(index)
+            mothers.append(Mother(
+                name=f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}",
+                phone=phone,
+                phone_e164=phone_e164,
+                language='sw' if rng.random() < 0.3 else 'en',
+                consent=rng.random() < 0.85,
+                hospital=rng.choice(self.hospitals),
+                created_at=now - datetime.timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60)),
+            ))
+
+        with transaction.atomic():
+            Mother.objects.bulk_create(mothers, batch_size=1000)
+            pregnancies, children, doses = [], [], []
+            for mother, rng in zip(mothers, rngs):
+                if rng.random() < PREGNANT_SHARE:
+                    pregnancies.append(Pregnancy(
+                        mother=mother,
+                        due_date=self.today + datetime.timedelta(days=rng.randint(0, 280)),
+                        next_visit=self.today + datetime.timedelta(days=rng.randint(0, 30)),
+                    ))
+                for _ in range(rng.choice([0, 0, 1, 1, 1, 2, 2, 3])):
+                    child = Child(
+                        mother=mother,
+                        name=rng.choice(CHILD_NAMES),
+                        dob=self.today - datetime.timedelta(days=rng.randint(0, 5 * 365)),
+                        gender=rng.choice(['Male', 'Female']),
+                    )
+                    children.append(child)
+                    doses.extend(self.plan_doses(child, rng))
+            Pregnancy.objects.bulk_create(pregnancies, batch_size=1000)
+            Child.objects.bulk_create(children, batch_size=1000)
+            ChildVaccination.objects.bulk_create(doses, batch_size=2000)
+
+            next_due.refresh([child.pk for child in children], self.today)
+            reminder_events.sync_pregnancies([pregnancy.pk for pregnancy in pregnancies])
+            reminder_events.sync_child_vaccinations([
+                dose.pk for dose in doses if not dose.completed and dose.scheduled_date >= self.today
+            ])
+
+        self.report.mothers += len(mothers)
+        self.report.pregnancies += len(pregnancies)
+        self.report.children += len(children)
+        self.report.vaccinations += len(doses)
+
+    def plan_doses(self, child, rng):
+        rows = []
+        for vac in self.catalog:
+            scheduled_date = child.dob + datetime.timedelta(days=vac.recommended_age_days)
+            row = ChildVaccination(child=child, vaccination=vac, scheduled_date=scheduled_date)
+            if scheduled_date < self.today and rng.random() < COMPLETED_SHARE:
+                completion_date = min(self.today, scheduled_date + datetime.timedelta(days=rng.randint(0, 7)))
+                row.completed = True
+                row.completion_date = completion_date
+                row.completed_at = timezone.make_aware(
+                    datetime.datetime.combine(completion_date, datetime.time(10))
+                )
+                row.reminder_day_before_sent = row.reminder_on_day_sent = True
+            rows.append(row)
+        return rows
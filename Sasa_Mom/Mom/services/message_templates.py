@@ -0,0 +1,139 @@
+import string
+import uuid
+
+from django.core.cache import cache
+
+from Mom.models import MessageTemplate, ReminderEvent
+
+VERSION_KEY = 'Mom:message_templates:version'
+DATA_KEY = 'Mom:message_templates:data'
+
+DEFAULT_LANGUAGE = 'en'
+
+# Free-text Mother.language values mapped to a template language
+ALIASES = {
+    'english': 'en',
+    'kiswahili': 'sw',
+    'swahili': 'sw',
+}
+
+# Words used when building the {doses} placeholder
+WORDS = {
+    'en': {'and': 'and', 'your_child': 'your child'},
+    'sw': {'and': 'na', 'your_child': 'mtoto wako'},
+}
+
+# Placeholders each kind's context provides
+FIELDS = {
+    ReminderEvent.KIND_VACCINE_DAY_BEFORE: {'name', 'hospital', 'doses', 'verb'},
+    ReminderEvent.KIND_VACCINE_ON_DAY: {'name', 'hospital', 'doses'},
+    ReminderEvent.KIND_VISIT_DAY_BEFORE: {'name', 'hospital'},
+    ReminderEvent.KIND_MATERNAL_VACCINE_DAY_BEFORE: {'name', 'hospital', 'vaccines'},
+}
+
+DEFAULTS = {
+    ('en', ReminderEvent.KIND_VACCINE_DAY_BEFORE):
+        "Hello {name}, reminder: {doses} {verb} due for vaccination tomorrow.",
+    ('en', ReminderEvent.KIND_VACCINE_ON_DAY):
+        "Hello {name}, today is the vaccination day for {doses}. Please visit {hospital}.",
+    ('en', ReminderEvent.KIND_VISIT_DAY_BEFORE):
+        "Hello {name}, reminder: you have an antenatal clinic visit at {hospital} tomorrow.",
+    ('en', ReminderEvent.KIND_MATERNAL_VACCINE_DAY_BEFORE):
+        "Hello {name}, reminder: your {vaccines} vaccination is due tomorrow. Please visit {hospital}.",
+    ('sw', ReminderEvent.KIND_VACCINE_DAY_BEFORE):
+        "Habari {name}, ukumbusho: chanjo ya {doses} ni kesho.",
+    ('sw', ReminderEvent.KIND_VACCINE_ON_DAY):
+        "Habari {name}, leo ni siku ya chanjo ya {doses}. Tafadhali tembelea {hospital}.",
+    ('sw', ReminderEvent.KIND_VISIT_DAY_BEFORE):
+        "Habari {name}, ukumbusho: una miadi ya kliniki ya wajawazito katika {hospital} kesho.",
+    ('sw', ReminderEvent.KIND_MATERNAL_VACCINE_DAY_BEFORE):
+        "Habari {name}, ukumbusho: chanjo yako ya {vaccines} ni kesho. Tafadhali tembelea {hospital}.",
+}
+
+# This process's copy, reused for as long as the shared version matches
+_local = {'version': None, 'registry': None}
+
+
+def check(kind, body):
+    """
+    Raise ValueError unless `body` only uses plain {placeholders} that
+    `kind` provides. Attribute/index lookups, conversions and format specs
+    are refused so a template cannot reach past the flat context.
+    """
+    allowed = FIELDS[kind]
+    try:
+        parsed = list(string.Formatter().parse(body))
+    except ValueError as exc:
+        raise ValueError(f"Invalid template: {exc}")
+    for _, field, spec, conversion in parsed:
+        if field is None:
+            continue
+        if field not in allowed:
+            names = ', '.join(f'{{{name}}}' for name in sorted(allowed))
+            raise ValueError(f"Unknown placeholder {{{field}}}; this message can use {names}")
+        if spec or conversion:
+            raise ValueError(f"Write {{{field}}} without a format spec or conversion")
+
+
+def normalize_language(value):
+    value = (value or '').strip().lower()
+    value = ALIASES.get(value, value)
+    if value not in WORDS:
+        # 'sw-KE', 'en_GB'
+        value = value.replace('_', '-').split('-')[0]
+    return value if value in WORDS else DEFAULT_LANGUAGE
+
+
+class TemplateRegistry:
+    """
+    Every (language, kind) template, checked once and bound to
+    `str.format_map` so rendering is a dict lookup and a format call.
+    """
+
+    def __init__(self, overrides):
+        bodies = dict(DEFAULTS)
+        for language, kind, body in overrides:
+            try:
+                check(kind, body)
+            except (KeyError, ValueError):
+                # Saved before a placeholder was retired; keep the default
+                continue
+            bodies[(language, kind)] = body
+        self.formatters = {key: body.format_map for key, body in bodies.items()}
+
+    def words(self, language):
+        return WORDS[normalize_language(language)]
+
+    def render(self, language, kind, context):
+        """`context` is a flat dict of strings holding FIELDS[kind]."""
+        formatter = self.formatters.get((normalize_language(language), kind))
+        if formatter is None:
+            formatter = self.formatters[(DEFAULT_LANGUAGE, kind)]
+        return formatter(context)
+
+
+def get_registry():
+    """
+    Return the template registry, reading MessageTemplate only after
+    `invalidate()` or a cache eviction; otherwise each call costs one cache
+    read. Fetch it once per batch rather than once per message.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is not None and version == _local['version']:
+        return _local['registry']
+
+    overrides = cache.get(DATA_KEY) if version is not None else None
+    if overrides is None:
+        overrides = list(MessageTemplate.objects.values_list('language', 'kind', 'body'))
+        version = uuid.uuid4().hex
+        cache.set_many({DATA_KEY: overrides, VERSION_KEY: version}, timeout=None)
+
+    _local['registry'] = TemplateRegistry(overrides)
+    _local['version'] = version
+    return _local['registry']
+
+
+def invalidate():
+    cache.delete_many([VERSION_KEY, DATA_KEY])
+    _local['version'] = None
+    _local['registry'] = None
@@ -0,0 +1,56 @@
+from django.utils import timezone
+
+from Mom.models import Child, ChildVaccination
+
+FIELDS = ['next_due_date', 'next_due_vaccination', 'overdue_count']
+
+
+def compute(child_ids, today):
+    """
+    {child_id: (next_due_date, next_due_vaccination_id, overdue_count)} for
+    `child_ids`, from one ordered read of their pending doses.
+    """
+    state = {pk: [None, None, 0] for pk in child_ids}
+    pending = (
+        ChildVaccination.objects.filter(child_id__in=state, completed=False, scheduled_date__isnull=False)
+        .order_by('child_id', 'scheduled_date', 'id')
+        .values_list('child_id', 'scheduled_date', 'vaccination_id')
+    )
+    for child_id, scheduled_date, vaccination_id in pending:
+        values = state[child_id]
+        if values[0] is None:
+            values[0], values[1] = scheduled_date, vaccination_id
+        if scheduled_date < today:
+            values[2] += 1
+    return {pk: tuple(values) for pk, values in state.items()}
+
+
+def refresh(child_ids, today=None):
+    """
+    Recompute Child.next_due_date / next_due_vaccination / overdue_count for
+    `child_ids` and write back only the rows that changed. Costs three
+    queries however many children are passed; call it inside the
+    transaction that changed their ChildVaccination rows.
+    Returns the ids of the children that were updated.
+    """
+    child_ids = set(child_ids)
+    if not child_ids:
+        return []
+    today = today or timezone.localdate()
+    computed = compute(child_ids, today)
+
+    changed = []
+    current = Child.objects.filter(pk__in=child_ids).values_list(
+        'pk', 'next_due_date', 'next_due_vaccination_id', 'overdue_count',
+    )
+    for pk, *values in current:
+        if tuple(values) != computed[pk]:
+            next_due_date, vaccination_id, overdue_count = computed[pk]
+            changed.append(Child(
+                pk=pk, next_due_date=next_due_date,
+                next_due_vaccination_id=vaccination_id, overdue_count=overdue_count,
+            ))
+
+    if changed:
+        Child.objects.bulk_update(changed, FIELDS, batch_size=1000)
+    return [child.pk for child in changed]
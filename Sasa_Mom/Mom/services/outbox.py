@@ -0,0 +1,130 @@
+import logging
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from Mom.models import OutboundMessage
+from Mom.services.sms_delivery import OutgoingMessage
+from Mom.utils.metrics import OUTBOX_LOST_RESULTS
+from Mom.utils.sms import get_connection
+
+logger = logging.getLogger('Mom.outbox')
+
+
+def enqueue(messages):
+    """
+    Write unsent OutboundMessage instances to the outbox in one INSERT.
+
+    Call this inside the transaction that records the business change (for
+    example flipping a reminder flag) so both commit or neither does.
+    """
+    return OutboundMessage.objects.bulk_create(messages, batch_size=1000)
+
+
+def lease_batch(batch_size, lease_seconds=300):
+    """
+    Lease up to `batch_size` deliverable messages and return them.
+
+    Pending messages whose retry time has come, and leased messages whose
+    lease expired (a worker died mid-batch), are eligible. The lease is taken
+    with one conditional UPDATE tagged with a fresh token, so concurrent
+    workers never receive the same row.
+    """
+    now = timezone.now()
+    deliverable = (
+        Q(status=OutboundMessage.STATUS_PENDING, available_at__lte=now)
+        | Q(status=OutboundMessage.STATUS_LEASED, leased_until__lt=now)
+    )
+    ids = list(
+        OutboundMessage.objects.filter(deliverable)
+        .order_by('id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    token = uuid.uuid4()
+    OutboundMessage.objects.filter(deliverable, id__in=ids).update(
+        status=OutboundMessage.STATUS_LEASED,
+        lease_token=token,
+        leased_until=now + timedelta(seconds=lease_seconds),
+    )
+    return list(OutboundMessage.objects.filter(lease_token=token).order_by('id'))
+
+
+def record_results(rows_by_id, results, max_attempts=None):
+    """
+    Write a batch of delivery results back to their outbox rows with one
+    bulk UPDATE. Failed messages go back to pending with a growing delay
+    until they run out of attempts.
+
+    Only rows still holding the lease they were sent under are written: if
+    the lease expired mid-send and another worker re-leased a row, that
+    worker's outcome wins. Returns the number of results dropped that way.
+    """
+    max_attempts = max_attempts or getattr(settings, 'SMS_OUTBOX_MAX_ATTEMPTS', 5)
+    now = timezone.now()
+    rows_by_token = defaultdict(list)
+
+    for result in results:
+        row = rows_by_id[result.message.key]
+        rows_by_token[row.lease_token].append(row)
+        row.attempts += result.attempts
+        row.lease_token = None
+        row.leased_until = None
+        if result.ok:
+            row.status = OutboundMessage.STATUS_SENT
+            row.provider_id = result.provider_id or ''
+            row.last_error = ''
+            row.sent_at = now
+        else:
+            row.last_error = result.error or ''
+            if row.attempts >= max_attempts:
+                row.status = OutboundMessage.STATUS_FAILED
+            else:
+                row.status = OutboundMessage.STATUS_PENDING
+                row.available_at = now + timedelta(minutes=2 ** row.attempts)
+
+    lost = 0
+    for token, rows in rows_by_token.items():
+        lost += len(rows) - OutboundMessage.objects.filter(lease_token=token).bulk_update(rows, [
+            'status', 'attempts', 'provider_id', 'last_error',
+            'available_at', 'lease_token', 'leased_until', 'sent_at',
+        ])
+    if lost:
+        OUTBOX_LOST_RESULTS.inc(lost)
+        logger.warning("Dropped %d delivery results whose outbox lease was taken over", lost)
+    return lost
+
+
+def drain(connection=None, batch_size=500, lease_seconds=300, max_batches=None, on_batch=None, **delivery_options):
+    """
+    Lease and deliver outbox batches until none are left (or `max_batches`
+    have been processed). Returns (sent, failed) totals. `on_batch(sent,
+    failed)` is called after each batch, e.g. to renew a lock; an exception
+    from it stops the drain.
+    """
+    connection = connection or get_connection()
+    sent = failed = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        rows = lease_batch(batch_size, lease_seconds)
+        if not rows:
+            break
+        rows_by_id = {row.id: row for row in rows}
+        report = connection.send_many(
+            [OutgoingMessage(key=row.id, to=row.to, body=row.body) for row in rows],
+            on_batch=lambda results: record_results(rows_by_id, results),
+            **delivery_options,
+        )
+        sent += report.sent
+        failed += report.failed
+        batches += 1
+        if on_batch:
+            on_batch(report.sent, report.failed)
+
+    return sent, failed
@@ -0,0 +1,45 @@
+import uuid
+
+from django.core.cache import cache
+
+from Mom.models import Child
+
+
+def version_key(kind, pk):
+    return f'Mom:page_version:{kind}:{pk}'
+
+
+def get_version(kind, pk):
+    """
+    Current cache version for one object's page, e.g. ('mother', 12).
+
+    Versions are random tokens rather than counters so a bump for many
+    objects is a single set_many, with no read-modify-write.
+    They live in the shared cache (settings.CACHES), so a bump made by a
+    management command reaches every web worker.
+    """
+    key = version_key(kind, pk)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(key, version, timeout=None)
+    return version
+
+
+def bump(kind, pks):
+    """
+    Invalidate the cached pages of every object in `pks`.
+    """
+    pks = {pk for pk in pks if pk is not None}
+    if pks:
+        cache.set_many({version_key(kind, pk): uuid.uuid4().hex for pk in pks}, timeout=None)
+
+
+def bump_children(child_ids):
+    """
+    Invalidate the child pages of `child_ids` and their mothers' pages, e.g.
+    after their vaccinations changed.
+    """
+    child_ids = set(child_ids)
+    bump('child', child_ids)
+    bump('mother', Child.objects.filter(pk__in=child_ids).values_list('mother_id', flat=True))
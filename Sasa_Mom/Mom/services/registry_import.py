@@ -0,0 +1,237 @@
+import csv
+import datetime
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from Mom.models import Child, Mother, Pregnancy
+from Mom.services import reminder_events
+from Mom.services.vaccination_catalog import get_catalog
+from Mom.services.vaccination_schedule import schedule_many
+from Mom.utils.phone import format_phone
+
+COLUMNS = [
+    'name', 'phone', 'language', 'hospital', 'consent',
+    'due_date', 'next_visit',
+    'child_name', 'child_dob', 'child_gender',
+]
+REQUIRED = ['name', 'phone', 'hospital']
+REJECT_COLUMNS = ['line', 'error', *COLUMNS]
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+GENDERS = {value.lower(): value for value, _ in Child.GENDER_CHOICES}
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    mothers: int = 0
+    pregnancies: int = 0
+    children: int = 0
+    vaccinations: int = 0
+    rejected: int = 0
+    elapsed: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class ImportRow:
+    line: int
+    raw: dict
+    phone_e164: str
+    name: str
+    language: str
+    hospital: str
+    consent: bool
+    due_date: datetime.date = None
+    next_visit: datetime.date = None
+    child_name: str = ''
+    child_dob: datetime.date = None
+    child_gender: str = ''
+
+
+def parse_date(value):
+    value = (value or '').strip()
+    if not value:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"invalid date {value!r}")
+
+
+def clean_row(line, raw):
+    """
+    Validate and normalize one CSV row. Raises ValueError with a message
+    suitable for the reject file.
+    """
+    values = {key: (raw.get(key) or '').strip() for key in COLUMNS}
+    missing = [key for key in REQUIRED if not values[key]]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+
+    phone_e164 = format_phone(values['phone'])
+    if phone_e164 is None:
+        raise ValueError(f"invalid phone {values['phone']!r}")
+
+    gender = values['child_gender']
+    if gender and gender.lower() not in GENDERS:
+        raise ValueError(f"invalid child_gender {gender!r}")
+
+    row = ImportRow(
+        line=line,
+        raw=raw,
+        phone_e164=phone_e164,
+        name=values['name'],
+        language=values['language'] or 'en',
+        hospital=values['hospital'],
+        consent=values['consent'].lower() in TRUE_VALUES,
+        due_date=parse_date(values['due_date']),
+        next_visit=parse_date(values['next_visit']),
+        child_name=values['child_name'],
+        child_dob=parse_date(values['child_dob']),
+        child_gender=GENDERS.get(gender.lower(), 'Female') if gender else '',
+    )
+    if row.child_dob and row.child_dob > timezone.localdate():
+        raise ValueError("child_dob is in the future")
+    return row
+
+
+class RegistryImporter:
+    """
+    Import mothers, pregnancies and children from CSV in chunks.
+
+    Each chunk is validated in memory, checked against existing phones with
+    one query, and written with bulk_create inside its own transaction,
+    followed by the children's vaccination schedules. A phone may appear on
+    several rows (one per child); the first row creates the mother and later
+    rows attach to her. Phones already registered before the import are
+    rejected, matching the registration form.
+    """
+
+    def __init__(self, chunk_size=1000, reject_writer=None, today=None):
+        self.chunk_size = chunk_size
+        self.reject_writer = reject_writer
+        self.today = today or timezone.localdate()
+        self.catalog = get_catalog()
+        # phone_e164 -> mother id for mothers created by this import
+        self.created_mothers = {}
+        self.seen_pregnancies = set()
+        self.report = ImportReport()
+
+    def run(self, lines, progress=None):
+        started = time.monotonic()
+        reader = csv.DictReader(lines)
+        missing = [key for key in REQUIRED if key not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header is missing: {', '.join(missing)}")
+
+        # Line 1 is the header
+        numbered = enumerate(reader, start=2)
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+            self.report.elapsed = time.monotonic() - started
+            if progress:
+                progress(self.report)
+
+        self.report.elapsed = time.monotonic() - started
+        return self.report
+
+    def reject(self, line, raw, error):
+        self.report.rejected += 1
+        if len(self.report.errors) < 100:
+            self.report.errors.append((line, error))
+        if self.reject_writer is not None:
+            self.reject_writer.writerow({'line': line, 'error': error, **{k: raw.get(k, '') for k in COLUMNS}})
+
+    def import_chunk(self, chunk):
+        self.report.rows += len(chunk)
+        rows = []
+        for line, raw in chunk:
+            try:
+                rows.append(clean_row(line, raw))
+            except ValueError as exc:
+                self.reject(line, raw, str(exc))
+
+        # One query for phones that were registered before this import
+        phones = {row.phone_e164 for row in rows} - self.created_mothers.keys()
+        registered = set(
+            Mother.objects.filter(phone_e164__in=phones).values_list('phone_e164', flat=True)
+        )
+
+        accepted = []
+        for row in rows:
+            if row.phone_e164 in registered:
+                self.reject(row.line, row.raw, f"phone {row.phone_e164} is already registered")
+            else:
+                accepted.append(row)
+        if not accepted:
+            return
+
+        with transaction.atomic():
+            self.create_mothers(accepted)
+            self.create_pregnancies(accepted)
+            children = self.create_children(accepted)
+            self.report.vaccinations += schedule_many(
+                [(child.pk, child.dob) for child in children], self.catalog, self.today,
+            )
+
+    def create_mothers(self, rows):
+        new = {}
+        for row in rows:
+            if row.phone_e164 not in self.created_mothers and row.phone_e164 not in new:
+                # bulk_create skips Mother.save(), so set phone_e164 here
+                new[row.phone_e164] = Mother(
+                    name=row.name, phone=row.raw['phone'].strip(), phone_e164=row.phone_e164,
+                    language=row.language, hospital=row.hospital, consent=row.consent,
+                )
+        created = Mother.objects.bulk_create(new.values(), batch_size=1000)
+        self.created_mothers.update((mother.phone_e164, mother.pk) for mother in created)
+        self.report.mothers += len(created)
+
+    def create_pregnancies(self, rows):
+        pregnancies = []
+        for row in rows:
+            key = (row.phone_e164, row.due_date, row.next_visit)
+            if (row.due_date or row.next_visit) and key not in self.seen_pregnancies:
+                self.seen_pregnancies.add(key)
+                pregnancies.append(Pregnancy(
+                    mother_id=self.created_mothers[row.phone_e164],
+                    due_date=row.due_date, next_visit=row.next_visit,
+                ))
+        Pregnancy.objects.bulk_create(pregnancies, batch_size=1000)
+        reminder_events.sync_pregnancies([pregnancy.pk for pregnancy in pregnancies])
+        self.report.pregnancies += len(pregnancies)
+
+    def create_children(self, rows):
+        children = [
+            Child(
+                mother_id=self.created_mothers[row.phone_e164],
+                name=row.child_name, dob=row.child_dob,
+                gender=row.child_gender or 'Female',
+            )
+            for row in rows
+            if row.child_name or row.child_dob
+        ]
+        created = Child.objects.bulk_create(children, batch_size=1000)
+        self.report.children += len(created)
+        return created
+
+
+def make_reject_writer(fileobj):
+    writer = csv.DictWriter(fileobj, fieldnames=REJECT_COLUMNS)
+    writer.writeheader()
+    return writer
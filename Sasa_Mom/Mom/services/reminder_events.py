@@ -0,0 +1,265 @@
+import datetime
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from Mom.models import ChildVaccination, Mother, OutboundMessage, Pregnancy, ReminderEvent, ScheduledVaccination
+from Mom.services import message_templates, outbox
+from Mom.services.vaccination_reminders import DAY_BEFORE, ON_DAY, build_context
+from Mom.utils.metrics import REMINDER_DISPATCH_SECONDS, REMINDER_EVENTS, REMINDER_SELECT_SECONDS
+
+# Days between the reminder and the appointment it is about
+OFFSETS = {
+    ReminderEvent.KIND_VACCINE_DAY_BEFORE: 1,
+    ReminderEvent.KIND_VACCINE_ON_DAY: 0,
+    ReminderEvent.KIND_VISIT_DAY_BEFORE: 1,
+    ReminderEvent.KIND_MATERNAL_VACCINE_DAY_BEFORE: 1,
+}
+VACCINE_KINDS = [ReminderEvent.KIND_VACCINE_DAY_BEFORE, ReminderEvent.KIND_VACCINE_ON_DAY]
+VISIT_KINDS = [ReminderEvent.KIND_VISIT_DAY_BEFORE]
+MATERNAL_VACCINE_KINDS = [ReminderEvent.KIND_MATERNAL_VACCINE_DAY_BEFORE]
+
+# ChildVaccination flag kept in step with each child vaccination reminder
+SENT_FLAGS = {
+    ReminderEvent.KIND_VACCINE_DAY_BEFORE: DAY_BEFORE,
+    ReminderEvent.KIND_VACCINE_ON_DAY: ON_DAY,
+}
+
+
+def send_time(event_date, kind):
+    """When the `kind` reminder for an appointment on `event_date` goes out."""
+    day = event_date - datetime.timedelta(days=OFFSETS[kind])
+    hour = getattr(settings, 'REMINDER_SEND_HOUR', 8)
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour)))
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def end_of_day(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.max))
+
+
+# --- Keeping events in sync with their sources ---
+
+def _sync(source_field, targets, kinds, already_sent=()):
+    """
+    Upsert the `kinds` events of each source in `targets`, a dict of
+    {source_id: (mother_id, event_date or None)}. A None date (completed,
+    cleared) cancels pending events; a changed date reschedules them.
+    Reminders whose send day has already passed are not created.
+    `already_sent` holds (source_id, kind) pairs to record as sent.
+    """
+    if not targets:
+        return
+    today = timezone.localdate()
+    existing = {
+        (getattr(event, f'{source_field}_id'), event.kind): event
+        for event in ReminderEvent.objects.filter(**{f'{source_field}_id__in': targets.keys()})
+    }
+
+    created, updated = [], []
+    for source_id, (mother_id, event_date) in targets.items():
+        for kind in kinds:
+            event = existing.get((source_id, kind))
+            if event_date is None:
+                if event is not None and event.state == ReminderEvent.STATE_PENDING:
+                    event.state = ReminderEvent.STATE_CANCELLED
+                    updated.append(event)
+                continue
+
+            send_at = send_time(event_date, kind)
+            if event is None:
+                if timezone.localdate(send_at) < today:
+                    continue
+                state = ReminderEvent.STATE_SENT if (source_id, kind) in already_sent else ReminderEvent.STATE_PENDING
+                created.append(ReminderEvent(
+                    kind=kind, state=state, mother_id=mother_id,
+                    event_date=event_date, send_at=send_at,
+                    **{f'{source_field}_id': source_id},
+                ))
+            elif (event.event_date, event.mother_id) != (event_date, mother_id) or event.state == ReminderEvent.STATE_CANCELLED:
+                event.event_date, event.send_at, event.mother_id = event_date, send_at, mother_id
+                event.state = ReminderEvent.STATE_PENDING
+                updated.append(event)
+
+    ReminderEvent.objects.bulk_create(created, batch_size=1000)
+    ReminderEvent.objects.bulk_update(updated, ['state', 'event_date', 'send_at', 'mother'], batch_size=1000)
+
+
+def sync_child_vaccinations(ids):
+    targets, sent = {}, set()
+    rows = ChildVaccination.objects.filter(pk__in=set(ids)).values_list(
+        'pk', 'child__mother_id', 'scheduled_date', 'completed', DAY_BEFORE, ON_DAY,
+    )
+    for pk, mother_id, scheduled_date, completed, day_before_sent, on_day_sent in rows:
+        targets[pk] = (mother_id, None if completed else scheduled_date)
+        if day_before_sent:
+            sent.add((pk, ReminderEvent.KIND_VACCINE_DAY_BEFORE))
+        if on_day_sent:
+            sent.add((pk, ReminderEvent.KIND_VACCINE_ON_DAY))
+    _sync('child_vaccination', targets, VACCINE_KINDS, sent)
+
+
+def sync_pregnancies(ids):
+    targets = {
+        pk: (mother_id, next_visit)
+        for pk, mother_id, next_visit in Pregnancy.objects.filter(pk__in=set(ids)).values_list('pk', 'mother_id', 'next_visit')
+    }
+    _sync('pregnancy', targets, VISIT_KINDS)
+
+
+def sync_scheduled_vaccinations(ids):
+    targets = {
+        pk: (mother_id, None if notified else due_date)
+        for pk, mother_id, due_date, notified in ScheduledVaccination.objects.filter(pk__in=set(ids)).values_list(
+            'pk', 'mother_id', 'due_date', 'notified',
+        )
+    }
+    _sync('scheduled_vaccination', targets, MATERNAL_VACCINE_KINDS)
+
+
+# --- Dispatching ---
+
+def build_event_message(registry, mother, kind, events):
+    """
+    One SMS covering every `kind` event of `mother` in this batch, in the
+    mother's language. Reads only rows loaded by the dispatcher's
+    select_related.
+    """
+    if kind in SENT_FLAGS:
+        children = {}
+        for event in events:
+            cv = event.child_vaccination
+            children.setdefault(cv.child_id, (cv.child.name, []))[1].append(cv.vaccination.name)
+        context = build_context(mother.name, mother.hospital, children, registry.words(mother.language))
+    elif kind == ReminderEvent.KIND_VISIT_DAY_BEFORE:
+        context = {'name': mother.name, 'hospital': mother.hospital}
+    else:
+        context = {
+            'name': mother.name,
+            'hospital': mother.hospital,
+            'vaccines': ', '.join(event.scheduled_vaccination.vaccination.name for event in events),
+        }
+    return registry.render(mother.language, kind, context)
+
+
+def expire_missed(today=None):
+    """Mark pending reminders whose send day has passed as expired."""
+    today = today or timezone.localdate()
+    return ReminderEvent.objects.filter(
+        state=ReminderEvent.STATE_PENDING, send_at__lt=start_of_day(today),
+    ).update(state=ReminderEvent.STATE_EXPIRED)
+
+
+def dispatch_batch(now, batch_size, due_by=None):
+    """
+    Lock up to `batch_size` mothers with reminders due by `due_by` (default
+    `now`), write one outbox message per (mother, kind) covering all of
+    them and mark them sent, in one transaction. Returns the number of
+    events handled.
+
+    Batches are cut on whole mothers, so same-day doses are never split
+    across two messages. Mother rows locked by a concurrent dispatcher are
+    skipped, and with them all of that mother's reminders. Reminders of
+    mothers without consent or a valid phone are marked skipped.
+    """
+    due_by = due_by or now
+    due = ReminderEvent.objects.filter(state=ReminderEvent.STATE_PENDING, send_at__lte=due_by)
+    with transaction.atomic():
+        with REMINDER_SELECT_SECONDS.time():
+            mother_ids = list(
+                Mother.objects.select_for_update(skip_locked=True)
+                .filter(pk__in=due.values('mother_id'))
+                .order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not mother_ids:
+                return 0
+            events = list(
+                due.select_for_update(of=('self',))
+                .filter(mother_id__in=mother_ids)
+                .select_related(
+                    'mother',
+                    'child_vaccination__child', 'child_vaccination__vaccination',
+                    'scheduled_vaccination__vaccination',
+                )
+                .order_by(
+                    'mother_id', 'child_vaccination__child_id',
+                    # Vaccines in schedule order within each child
+                    'child_vaccination__vaccination__recommended_age_days',
+                    'child_vaccination__vaccination__dose_order',
+                    'scheduled_vaccination__vaccination__recommended_age_days',
+                    'scheduled_vaccination__vaccination__dose_order',
+                    'id',
+                )
+            )
+        if not events:
+            return 0
+
+        groups, skipped = {}, []
+        for event in events:
+            # No consent, or a phone that failed E.164 normalization
+            if not event.mother.consent or not event.mother.phone_e164:
+                skipped.append(event)
+                continue
+            groups.setdefault((event.mother_id, event.kind), []).append(event)
+
+        registry = message_templates.get_registry()
+        messages = outbox.enqueue([
+            OutboundMessage(
+                mother=group[0].mother,
+                kind=kind,
+                to=group[0].mother.phone_e164,
+                body=build_event_message(registry, group[0].mother, kind, group),
+            )
+            for (_, kind), group in groups.items()
+        ])
+
+        sent = []
+        for message, group in zip(messages, groups.values()):
+            for event in group:
+                event.state = ReminderEvent.STATE_SENT
+                event.message = message
+                event.sent_at = now
+                sent.append(event)
+        ReminderEvent.objects.bulk_update(sent, ['state', 'message', 'sent_at'], batch_size=1000)
+        ReminderEvent.objects.filter(pk__in=[event.pk for event in skipped]).update(state=ReminderEvent.STATE_SKIPPED)
+
+        # Keep the legacy per-source flags readable by reports and the admin
+        for kind, flag in SENT_FLAGS.items():
+            ids = [event.child_vaccination_id for event in sent if event.kind == kind]
+            if ids:
+                ChildVaccination.objects.filter(pk__in=ids).update(**{flag: True})
+        ids = [event.scheduled_vaccination_id for event in sent if event.kind in MATERNAL_VACCINE_KINDS]
+        if ids:
+            ScheduledVaccination.objects.filter(pk__in=ids).update(notified=True)
+
+    for state, handled in ((ReminderEvent.STATE_SENT, sent), (ReminderEvent.STATE_SKIPPED, skipped)):
+        for kind, count in Counter(event.kind for event in handled).items():
+            REMINDER_EVENTS.inc(count, kind=kind, state=state)
+    return len(events)
+
+
+def dispatch_due(now=None, batch_size=1000, due_by=None, on_batch=None):
+    """
+    Queue every reminder due by `due_by` (default `now`) in the SMS outbox
+    and return how many events were handled. Delivery is left to
+    `outbox.drain`. `on_batch(handled)` is called after each committed
+    batch; an exception from it stops the run.
+    """
+    now = now or timezone.now()
+    with REMINDER_DISPATCH_SECONDS.time():
+        expire_missed(timezone.localdate(now))
+        total = 0
+        while True:
+            handled = dispatch_batch(now, batch_size, due_by)
+            if not handled:
+                break
+            total += handled
+            if on_batch:
+                on_batch(handled)
+    return total
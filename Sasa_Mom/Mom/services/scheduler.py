@@ -0,0 +1,248 @@
+import heapq
+import io
+import itertools
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, close_old_connections, connection
+from django.db.models import Q
+from django.utils import timezone
+
+from Mom.models import ReminderEvent, SchedulerLock
+from Mom.services import dashboard_stats, outbox, reminder_events
+from Mom.utils.metrics import write_textfile
+
+LOCK_NAME = 'reminder-scheduler'
+
+
+def make_owner():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def acquire_lock(owner, ttl, name=LOCK_NAME):
+    """
+    Take or renew the scheduler lease with one conditional UPDATE. Returns
+    True if `owner` now holds it for the next `ttl` seconds.
+    """
+    try:
+        SchedulerLock.objects.get_or_create(name=name)
+    except IntegrityError:
+        # Another instance created the row first; the UPDATE below decides
+        pass
+    now = timezone.now()
+    return SchedulerLock.objects.filter(
+        Q(owner=owner) | Q(expires_at__lte=now), name=name,
+    ).update(owner=owner, expires_at=now + timedelta(seconds=ttl), heartbeat_at=now) == 1
+
+
+def release_lock(owner, name=LOCK_NAME):
+    SchedulerLock.objects.filter(name=name, owner=owner).update(owner='', expires_at=timezone.now())
+
+
+class LeaseLost(Exception):
+    """The scheduler lease went to another instance while a job was running."""
+
+
+class ReminderScheduler:
+    """
+    Resident replacement for cron-driven `send_vaccine_reminders`.
+
+    Jobs live in an in-memory heap ordered by run time:
+
+    - ``refresh`` reads the distinct send_at values of pending reminders
+      within `horizon` seconds (an index-only read on the partial send_at
+      index) and pushes a ``dispatch`` job for each one not yet queued;
+    - ``dispatch`` queues due reminders in the outbox and drains it;
+    - ``drain`` retries outbox messages whose backoff has elapsed;
+    - ``stats`` refreshes the dashboard statistics;
+    - ``nightly`` rolls the denormalized next-due counters over.
+
+    An error fails only the job that raised it: the job is retried after
+    `retry_delay`, and on a database error the connection is dropped first.
+    Only the holder of the SchedulerLock lease runs jobs; other instances
+    wait on standby. Long jobs renew the lease between dispatch and outbox
+    batches and stop as soon as a renewal fails.
+
+    `log` takes one line of output, e.g. a command's self.stdout.write.
+    """
+
+    def __init__(self, sms_connection, log, refresh_interval=60, horizon=3600, drain_interval=60,
+                 stats_interval=900, nightly_hour=0, lock_ttl=120, retry_delay=15,
+                 delivery_options=None, metrics_file=None):
+        self.sms_connection = sms_connection
+        self.log = log
+        self.refresh_interval = refresh_interval
+        self.horizon = horizon
+        self.drain_interval = drain_interval
+        self.stats_interval = stats_interval
+        self.nightly_hour = nightly_hour
+        self.lock_ttl = lock_ttl
+        self.retry_delay = retry_delay
+        self.delivery_options = delivery_options or {}
+        self.metrics_file = metrics_file
+
+        self.owner = make_owner()
+        self.stopping = threading.Event()
+        self.heap = []
+        self.counter = itertools.count()
+        self.queued_dispatches = set()
+        self.has_lock = False
+        self.next_heartbeat = 0.0
+
+    # --- Heap ---
+
+    def push(self, run_at, job, payload=None):
+        heapq.heappush(self.heap, (run_at, next(self.counter), job, payload))
+
+    def seed(self):
+        now = timezone.now()
+        self.heap.clear()
+        self.queued_dispatches.clear()
+        self.push(now, 'refresh')
+        self.push(now, 'drain')
+        self.push(now, 'stats')
+        self.push(self.next_nightly(now), 'nightly')
+
+    def next_nightly(self, now):
+        local = timezone.localtime(now)
+        run_at = local.replace(hour=self.nightly_hour, minute=10, second=0, microsecond=0)
+        if run_at <= local:
+            run_at += timedelta(days=1)
+        return run_at
+
+    # --- Jobs ---
+
+    def job_refresh(self, now, payload):
+        upcoming = (
+            ReminderEvent.objects.filter(
+                state=ReminderEvent.STATE_PENDING,
+                send_at__lte=now + timedelta(seconds=self.horizon),
+            )
+            .order_by('send_at')
+            .values_list('send_at', flat=True)
+            .distinct()
+        )
+        added = 0
+        for send_at in upcoming:
+            if send_at not in self.queued_dispatches:
+                self.queued_dispatches.add(send_at)
+                self.push(max(send_at, now), 'dispatch', send_at)
+                added += 1
+        if added:
+            self.log(f"⏰ {added} new reminder times within the next {self.horizon // 60} min")
+        self.push(now + timedelta(seconds=self.refresh_interval), 'refresh')
+
+    def job_dispatch(self, now, send_at):
+        queued = reminder_events.dispatch_due(now, on_batch=self.renew_lease)
+        self.queued_dispatches.discard(send_at)
+        if queued:
+            self.log(f"📥 {queued} due reminders queued")
+            self.drain()
+
+    def job_drain(self, now, payload):
+        self.drain()
+        self.push(now + timedelta(seconds=self.drain_interval), 'drain')
+
+    def job_stats(self, now, payload):
+        dashboard_stats.refresh()
+        self.push(now + timedelta(seconds=self.stats_interval), 'stats')
+
+    def job_nightly(self, now, payload):
+        call_command('repair_next_due', stdout=io.StringIO())
+        dashboard_stats.refresh()
+        self.push(self.next_nightly(now), 'nightly')
+
+    def drain(self):
+        sent, failed = outbox.drain(self.sms_connection, on_batch=self.renew_lease, **self.delivery_options)
+        if sent or failed:
+            self.log(f"📨 {sent} sent, {failed} failed")
+
+    # --- Main loop ---
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self):
+        self.log(f"🗓️ Scheduler {self.owner} starting")
+        try:
+            while not self.stopping.is_set():
+                if time.monotonic() >= self.next_heartbeat:
+                    self.heartbeat()
+                if not self.has_lock:
+                    self.stopping.wait(self.lock_ttl / 3)
+                    continue
+
+                self.run_due_jobs()
+
+                wait = self.next_heartbeat - time.monotonic()
+                if self.heap:
+                    wait = min(wait, (self.heap[0][0] - timezone.now()).total_seconds())
+                self.stopping.wait(max(wait, 0.1))
+        finally:
+            if self.has_lock:
+                try:
+                    release_lock(self.owner)
+                except DatabaseError:
+                    pass
+            connection.close()
+            self.log("🛑 Scheduler stopped")
+
+    def heartbeat(self):
+        self.next_heartbeat = time.monotonic() + self.lock_ttl / 3
+        try:
+            held = acquire_lock(self.owner, self.lock_ttl)
+        except DatabaseError as exc:
+            self.reset_connection(exc)
+            # Keep running on a blip; the lease outlives a few missed heartbeats
+            return
+        if held and not self.has_lock:
+            self.log("🔒 Lock acquired, scheduling reminders")
+            self.seed()
+        elif not held and self.has_lock:
+            self.log("⚠️ Lock lost to another scheduler, standing by")
+        self.has_lock = held
+
+    def renew_lease(self, *batch_counts):
+        """
+        Called between batches of a running job: renew the lease once a
+        third of its ttl has passed, and raise LeaseLost if another
+        scheduler has taken it.
+        """
+        if time.monotonic() < self.next_heartbeat:
+            return
+        self.next_heartbeat = time.monotonic() + self.lock_ttl / 3
+        if not acquire_lock(self.owner, self.lock_ttl):
+            raise LeaseLost(self.owner)
+
+    def run_due_jobs(self):
+        while self.heap and not self.stopping.is_set():
+            now = timezone.now()
+            run_at, _, job, payload = self.heap[0]
+            if run_at > now:
+                return
+            heapq.heappop(self.heap)
+            try:
+                getattr(self, f'job_{job}')(now, payload)
+            except LeaseLost:
+                self.log(f"⚠️ Lock lost to another scheduler during {job}, standing by")
+                self.has_lock = False
+                return
+            except Exception as exc:
+                if isinstance(exc, DatabaseError):
+                    self.reset_connection(exc)
+                else:
+                    self.log(f"❌ {job} failed, retrying in {self.retry_delay}s: {exc!r}")
+                self.push(now + timedelta(seconds=self.retry_delay), job, payload)
+                return
+            if self.metrics_file:
+                write_textfile(self.metrics_file)
+
+    def reset_connection(self, exc):
+        self.log(f"⚠️ Database error, retrying in {self.retry_delay}s: {exc}")
+        connection.close()
+        close_old_connections()
@@ -0,0 +1,159 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+from Mom.utils.metrics import SMS_MESSAGES, SMS_SEND_SECONDS
+
+
+@dataclass
+class OutgoingMessage:
+    """
+    One SMS to deliver. `key` is opaque to the delivery stage and is handed
+    back with the result so callers can write outcomes to their own rows.
+    """
+    key: object
+    to: str
+    body: str
+
+
+@dataclass
+class DeliveryResult:
+    message: OutgoingMessage
+    ok: bool
+    attempts: int
+    provider_id: str = None
+    error: str = None
+
+
+@dataclass
+class DeliveryReport:
+    sent: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    failures: list = field(default_factory=list)
+    # One DeliveryResult per message in input order, unless results were
+    # streamed to an on_batch callback instead
+    results: list = field(default_factory=list)
+
+    @property
+    def rate(self):
+        total = self.sent + self.failed
+        return total / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket matching the provider's messages-per-second
+    quota. A rate of 0 or less disables limiting. `clock` and `sleep` can be
+    replaced, e.g. by a fake clock in tests.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            self.sleep(wait_for)
+
+
+def is_retryable(exc):
+    """
+    Provider errors with a 4xx status (bad number, unsubscribed...) will fail
+    the same way again; throttling, server errors and network errors will not.
+    """
+    status = getattr(exc, "status", None)
+    return status is None or status == 429 or status >= 500
+
+
+def send_with_retry(message, send, bucket, max_attempts, backoff):
+    for attempt in range(1, max_attempts + 1):
+        bucket.acquire()
+        started = time.perf_counter()
+        try:
+            provider_id = send(message.to, message.body)
+            SMS_SEND_SECONDS.observe(time.perf_counter() - started, outcome='ok')
+            return DeliveryResult(message, True, attempt, provider_id=provider_id)
+        except Exception as e:
+            SMS_SEND_SECONDS.observe(time.perf_counter() - started, outcome='error')
+            if attempt == max_attempts or not is_retryable(e):
+                return DeliveryResult(message, False, attempt, error=str(e))
+            # Exponential backoff with jitter so retries do not arrive in lockstep
+            time.sleep(backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+
+def deliver(messages, send, workers=None, rate=None, max_attempts=None,
+            backoff=0.5, batch_size=500, on_batch=None):
+    """
+    Fan `messages` out over a bounded thread pool and return a DeliveryReport.
+
+    `send(to, body)` performs one provider call and returns its message id.
+    Sends are throttled by a shared token bucket, retried with exponential
+    backoff and their results handed to `on_batch` in lists of up to
+    `batch_size`, in completion order, so callers can write outcomes back
+    with bulk queries. Without `on_batch` the report's `results` holds one
+    result per message in input order.
+    """
+    workers = workers or getattr(settings, "SMS_DELIVERY_WORKERS", 8)
+    rate = getattr(settings, "SMS_MESSAGES_PER_SECOND", 10) if rate is None else rate
+    max_attempts = max_attempts or getattr(settings, "SMS_MAX_ATTEMPTS", 3)
+
+    bucket = TokenBucket(rate)
+    report = DeliveryReport()
+    pending = []
+    started = time.monotonic()
+
+    def collect(index, result):
+        if result.ok:
+            report.sent += 1
+            SMS_MESSAGES.inc(outcome='sent')
+        else:
+            report.failed += 1
+            SMS_MESSAGES.inc(outcome='failed')
+            report.failures.append(result)
+        if not on_batch:
+            report.results[index] = result
+            return
+        pending.append(result)
+        if len(pending) >= batch_size:
+            on_batch(list(pending))
+            pending.clear()
+
+    # Keep a bounded number of sends in flight instead of queueing every message
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, message in enumerate(messages):
+            if len(in_flight) >= workers * 4:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(in_flight.pop(future), future.result())
+            if not on_batch:
+                report.results.append(None)
+            in_flight[pool.submit(send_with_retry, message, send, bucket, max_attempts, backoff)] = index
+        for future, index in in_flight.items():
+            collect(index, future.result())
+
+    if on_batch and pending:
+        on_batch(pending)
+
+    report.elapsed = time.monotonic() - started
+    return report
@@ -0,0 +1,66 @@
+import uuid
+from collections import defaultdict
+
+from django.core.cache import cache
+
+from Mom.models import Vaccination
+
+VERSION_KEY = 'Mom:vaccination_catalog:version'
+DATA_KEY = 'Mom:vaccination_catalog:data'
+
+# This process's copy, reused for as long as the shared version matches
+_local = {'version': None, 'catalog': None}
+
+
+class VaccinationCatalog:
+    """
+    Immutable snapshot of the Vaccination table with precomputed lookups.
+    """
+
+    def __init__(self, vaccinations):
+        self.by_dose_order = sorted(
+            vaccinations, key=lambda v: (v.dose_order, v.recommended_age_days, v.pk)
+        )
+        self.by_id = {v.pk: v for v in vaccinations}
+
+        by_age = defaultdict(list)
+        for vac in sorted(vaccinations, key=lambda v: (v.recommended_age_days, v.pk)):
+            by_age[vac.recommended_age_days].append(vac)
+        self.by_age = dict(by_age)
+
+    def __iter__(self):
+        return iter(self.by_dose_order)
+
+    def __len__(self):
+        return len(self.by_id)
+
+
+def get_catalog():
+    """
+    Return the vaccination catalog without touching the database on the
+    hot path.
+
+    The catalog is stored in the shared cache (settings.CACHES) under a
+    version stamp and this process keeps its own unpickled copy; each call
+    costs one cache read of the version. The database is only read after `invalidate()` (called from
+    Vaccination save/delete signals) or a cache eviction.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is not None and version == _local['version']:
+        return _local['catalog']
+
+    vaccinations = cache.get(DATA_KEY) if version is not None else None
+    if vaccinations is None:
+        vaccinations = list(Vaccination.objects.all())
+        version = uuid.uuid4().hex
+        cache.set_many({DATA_KEY: vaccinations, VERSION_KEY: version}, timeout=None)
+
+    _local['catalog'] = VaccinationCatalog(vaccinations)
+    _local['version'] = version
+    return _local['catalog']
+
+
+def invalidate():
+    cache.delete_many([VERSION_KEY, DATA_KEY])
+    _local['version'] = None
+    _local['catalog'] = None
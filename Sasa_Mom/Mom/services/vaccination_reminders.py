@@ -1,38 +1,34 @@
-from datetime import timedelta
-from django.utils import timezone
-from Mom.models import ChildVaccination
-from Mom.utils.sms import send_sms
-from Mom.utils.phone import format_phone
+# Context for child vaccination reminders; the wording lives in
+# Mom/services/message_templates.py and queueing in
+# Mom/services/reminder_events.py
 
-def send_vaccination_reminders():
-    today = timezone.localdate()
-    tomorrow = today + timedelta(days=1)
+# ChildVaccination flags recording which reminders went out
+DAY_BEFORE = 'reminder_day_before_sent'
+ON_DAY = 'reminder_on_day_sent'
 
-    vaccinations = ChildVaccination.objects.select_related(
-        'child__mother',
-        'vaccination'
-    ).filter(
-        completed=False,
-        scheduled_date__in=[today, tomorrow],
-        child__mother__consent=True
-    )
 
-    for cv in vaccinations:
-        mother = cv.child.mother
-        phone = format_phone(mother.phone)
+def describe_doses(children, words):
+    """
+    "Amina (BCG, OPV 0) and Baraka (BCG, OPV 0)", with the joining word and
+    the name for an unnamed child taken from the language's `words`.
+    """
+    parts = [
+        f"{name or words['your_child']} ({', '.join(vaccines)})"
+        for name, vaccines in children.values()
+    ]
+    if len(parts) == 1:
+        return parts[0]
+    return f"{', '.join(parts[:-1])} {words['and']} {parts[-1]}"
 
-        if cv.scheduled_date == tomorrow:
-            message = (
-                f"Hello {mother.name}, reminder: "
-                f"{cv.child.name or 'your child'} is due for "
-                f"{cv.vaccination.name} vaccination tomorrow."
-            )
-        else:
-            message = (
-                f"Hello {mother.name}, today is the vaccination day for "
-                f"{cv.child.name or 'your child'} "
-                f"({cv.vaccination.name}). "
-                f"Please visit {mother.hospital}."
-            )
 
-        send_sms(phone, message)
+def build_context(mother_name, hospital, children, words):
+    """
+    Flat template context for a vaccine reminder. `children` maps child id
+    to (child name, [vaccine names]).
+    """
+    return {
+        'name': mother_name,
+        'hospital': hospital,
+        'doses': describe_doses(children, words),
+        'verb': 'is' if len(children) == 1 else 'are',
+    }
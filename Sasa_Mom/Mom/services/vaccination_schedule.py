@@ -0,0 +1,193 @@
+from dataclasses import dataclass, field
+from datetime import timedelta
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from Mom.models import Child, ChildVaccination
+from Mom.services import next_due, page_cache, reminder_events
+from Mom.services.vaccination_catalog import get_catalog
+from Mom.utils.metrics import SCHEDULE_SECONDS, SCHEDULED_DOSES
+
+
+@dataclass
+class ScheduleReport:
+    """
+    Structured outcome of planning one child's vaccination schedule.
+    """
+    child_id: int
+    created: list = field(default_factory=list)
+    already_scheduled: list = field(default_factory=list)
+    in_past: list = field(default_factory=list)
+
+    @property
+    def created_count(self):
+        return len(self.created)
+
+    def as_dict(self):
+        return {
+            'child_id': self.child_id,
+            'created': [(cv.vaccination_id, cv.scheduled_date) for cv in self.created],
+            'already_scheduled': list(self.already_scheduled),
+            'in_past': list(self.in_past),
+        }
+
+
+def plan_doses(dob, catalog, today):
+    """
+    Compute every dose due on or after `today` for a child born on `dob`.
+
+    Returns two lists: (vaccination, scheduled_date) pairs that are still due,
+    and the vaccinations whose recommended date has already passed. Dates are
+    computed once per recommended-age bucket of the catalog.
+    """
+    due, past = [], []
+    for age_days, vaccinations in catalog.by_age.items():
+        scheduled_date = dob + timedelta(days=age_days)
+        # 'At birth' vaccines scheduled for today still count as due
+        if scheduled_date >= today:
+            due.extend((vac, scheduled_date) for vac in vaccinations)
+        else:
+            past.extend(vaccinations)
+    return due, past
+
+
+def schedule_child(child, catalog=None, today=None):
+    """
+    Create every missing ChildVaccination row for `child` in one bulk insert.
+
+    Costs a fixed number of queries regardless of catalog size: a lock on
+    the child, one read of its existing rows and one INSERT inside a
+    transaction. The catalog itself comes from the process-wide cache. Safe
+    to run twice at once for the same child: the second run waits for the
+    first and finds its doses already scheduled, and the unique
+    (child, vaccination) constraint drops doses added by other writers.
+    """
+    with SCHEDULE_SECONDS.time(function='schedule_child'):
+        report = _schedule_child(child, catalog, today)
+    SCHEDULED_DOSES.inc(report.created_count)
+    return report
+
+
+def lock_children(child_ids):
+    """
+    Lock the Child rows of a scheduling run until its transaction ends, so
+    concurrent runs for the same children take turns and each one's read
+    of existing doses holds until its insert.
+    """
+    list(Child.objects.select_for_update().filter(pk__in=child_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def _schedule_child(child, catalog, today):
+    report = ScheduleReport(child_id=child.pk)
+    if not child.dob:
+        # Cannot schedule without a date of birth
+        return report
+
+    if catalog is None:
+        catalog = get_catalog()
+    today = today or timezone.localdate()
+
+    due, past = plan_doses(child.dob, catalog, today)
+    report.in_past = [vac.id for vac in past]
+    if not due:
+        return report
+
+    with transaction.atomic():
+        lock_children([child.pk])
+        existing = set(
+            ChildVaccination.objects.filter(child=child).values_list('vaccination_id', flat=True)
+        )
+
+        rows = []
+        for vac, scheduled_date in due:
+            if vac.id in existing:
+                report.already_scheduled.append(vac.id)
+                continue
+            rows.append(ChildVaccination(
+                child=child,
+                vaccination=vac,
+                scheduled_date=scheduled_date,
+            ))
+        if not rows:
+            return report
+
+        # ignore_conflicts leaves pks unset, so read the rows back. Other
+        # scheduling runs wait on the lock, so only this run's doses match
+        ChildVaccination.objects.bulk_create(rows, ignore_conflicts=True)
+        report.created = list(
+            ChildVaccination.objects.filter(child=child, vaccination_id__in=[row.vaccination_id for row in rows])
+            .order_by('scheduled_date', 'id')
+        )
+        next_due.refresh([child.pk], today)
+        reminder_events.sync_child_vaccinations([cv.pk for cv in report.created])
+
+    # bulk_create sends no signals; callers may hold an outer transaction
+    transaction.on_commit(partial(page_cache.bump, 'child', [child.pk]))
+    transaction.on_commit(partial(page_cache.bump, 'mother', [child.mother_id]))
+    return report
+
+
+def schedule_many(children, catalog=None, today=None, batch_size=1000):
+    """
+    Bulk version of schedule_child for (child_id, dob) pairs.
+
+    Locks the children, reads their existing (child, vaccination) pairs in
+    one query and inserts every missing due dose in the same transaction.
+    Returns the number of rows this call created.
+    """
+    with SCHEDULE_SECONDS.time(function='schedule_many'):
+        created = _schedule_many(children, catalog, today, batch_size)
+    SCHEDULED_DOSES.inc(created)
+    return created
+
+
+def _schedule_many(children, catalog, today, batch_size):
+    children = [(child_id, dob) for child_id, dob in children if dob]
+    if not children:
+        return 0
+    if catalog is None:
+        catalog = get_catalog()
+    today = today or timezone.localdate()
+
+    planned = [(child_id, plan_doses(dob, catalog, today)[0]) for child_id, dob in children]
+
+    with transaction.atomic():
+        all_child_ids = [child_id for child_id, _ in children]
+        lock_children(all_child_ids)
+        existing = set(
+            ChildVaccination.objects.filter(child_id__in=all_child_ids).values_list('child_id', 'vaccination_id')
+        )
+
+        rows = []
+        for child_id, due in planned:
+            for vac, scheduled_date in due:
+                if (child_id, vac.id) in existing:
+                    continue
+                rows.append(ChildVaccination(
+                    child_id=child_id,
+                    vaccination_id=vac.id,
+                    scheduled_date=scheduled_date,
+                ))
+        if not rows:
+            return 0
+
+        child_ids = {row.child_id for row in rows}
+        inserted = {(row.child_id, row.vaccination_id) for row in rows}
+        # Doses a writer outside the lock added since `existing` was read are
+        # skipped by the unique constraint; ignore_conflicts leaves pks
+        # unset, so read the rows back
+        ChildVaccination.objects.bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+        ids = [
+            pk for pk, child_id, vaccination_id in ChildVaccination.objects.filter(child_id__in=child_ids)
+            .values_list('pk', 'child_id', 'vaccination_id')
+            if (child_id, vaccination_id) in inserted
+        ]
+        next_due.refresh(child_ids, today)
+        reminder_events.sync_child_vaccinations(ids)
+
+    # bulk_create sends no signals; callers such as the registry import
+    # hold an outer transaction
+    transaction.on_commit(partial(page_cache.bump_children, child_ids))
+    return len(ids)
@@ -0,0 +1,74 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Child, ChildVaccination, MessageTemplate, Mother, Pregnancy, ScheduledVaccination, Vaccination
+from .services import message_templates, next_due, page_cache, reminder_events, vaccination_catalog
+
+
+# Caches are invalidated once the writer's transaction commits: bumping
+# earlier would let a concurrent render cache pre-commit rows under the new
+# version. Outside a transaction on_commit runs the callback at once.
+
+@receiver([post_save, post_delete], sender=Vaccination)
+def invalidate_vaccination_catalog(sender, **kwargs):
+    transaction.on_commit(vaccination_catalog.invalidate)
+
+
+@receiver([post_save, post_delete], sender=MessageTemplate)
+def invalidate_message_templates(sender, **kwargs):
+    transaction.on_commit(message_templates.invalidate)
+
+
+# Page cache versions for motherPage and child_detail. Bulk .update() and
+# bulk_create() bypass these, so code using them bumps versions itself.
+# Arguments are read now: a deleted instance has lost its pk by commit time.
+
+@receiver([post_save, post_delete], sender=Mother)
+def bump_mother_page(sender, instance, **kwargs):
+    transaction.on_commit(partial(page_cache.bump, 'mother', [instance.pk]))
+    # Child pages show the mother's name
+    child_ids = list(Child.objects.filter(mother_id=instance.pk).values_list('pk', flat=True))
+    transaction.on_commit(partial(page_cache.bump, 'child', child_ids))
+
+
+@receiver([post_save, post_delete], sender=Pregnancy)
+def bump_pregnancy_pages(sender, instance, **kwargs):
+    transaction.on_commit(partial(page_cache.bump, 'mother', [instance.mother_id]))
+
+
+@receiver([post_save, post_delete], sender=Child)
+def bump_child_pages(sender, instance, **kwargs):
+    transaction.on_commit(partial(page_cache.bump, 'child', [instance.pk]))
+    transaction.on_commit(partial(page_cache.bump, 'mother', [instance.mother_id]))
+
+
+@receiver([post_save, post_delete], sender=ChildVaccination)
+def bump_child_vaccination_pages(sender, instance, **kwargs):
+    transaction.on_commit(partial(page_cache.bump_children, [instance.child_id]))
+
+
+@receiver([post_save, post_delete], sender=ChildVaccination)
+def refresh_child_next_due(sender, instance, **kwargs):
+    # Runs inside the caller's transaction, so Child stays consistent with its doses
+    next_due.refresh([instance.child_id])
+
+
+# ReminderEvent rows follow their sources; bulk paths call the sync
+# functions themselves
+
+@receiver(post_save, sender=ChildVaccination)
+def sync_child_vaccination_reminders(sender, instance, **kwargs):
+    reminder_events.sync_child_vaccinations([instance.pk])
+
+
+@receiver(post_save, sender=Pregnancy)
+def sync_pregnancy_reminders(sender, instance, **kwargs):
+    reminder_events.sync_pregnancies([instance.pk])
+
+
+@receiver(post_save, sender=ScheduledVaccination)
+def sync_scheduled_vaccination_reminders(sender, instance, **kwargs):
+    reminder_events.sync_scheduled_vaccinations([instance.pk])
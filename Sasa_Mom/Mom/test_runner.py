@@ -0,0 +1,49 @@
+import unittest
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class CacheResetMixin:
+    """
+    Start every test with an empty cache. Invalidation waits for commit
+    (see Mom/signals.py) and TestCase rolls back, so a catalog or page cached
+    by one test would otherwise outlive the rows it was built from.
+    """
+
+    def startTest(self, test):
+        from Mom.services import message_templates, vaccination_catalog
+
+        cache.clear()
+        vaccination_catalog.invalidate()
+        message_templates.invalidate()
+        super().startTest(test)
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Like Django's own switch to the locmem email backend, route every SMS sent
+    during tests to Mom.utils.sms.outbox so test runs never make network calls.
+    The shared cache is swapped for a locmem one too, so cached pages and
+    catalogs from the development database never leak into a test.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._original_sms_backend = settings.SMS_BACKEND
+        settings.SMS_BACKEND = "Mom.utils.sms_backends.LocmemBackend"
+        self._cache_override = override_settings(
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "mom-tests"}},
+        )
+        self._cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache_override.disable()
+        settings.SMS_BACKEND = self._original_sms_backend
+        super().teardown_test_environment(**kwargs)
+
+    def get_resultclass(self):
+        base = super().get_resultclass() or unittest.TextTestResult
+        return type(base.__name__, (CacheResetMixin, base), {})
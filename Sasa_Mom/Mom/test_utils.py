@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+
+from django.urls import reverse
+
+from .utils.query_stats import budget_for, track_queries
+
+
+def describe(stats):
+    lines = [f"{stats.queries} queries, {stats.db_time * 1000:.1f} ms in the database"]
+    for sql, count in list(stats.duplicates().items())[:5]:
+        lines.append(f"  {count}x {sql[:200]}")
+    return "\n".join(lines)
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin asserting how many queries a page or block may run:
+
+        class ChildListTests(QueryBudgetMixin, TestCase):
+            def test_budget(self):
+                self.assertQueryBudget('child_list', 5, max_repeats=1)
+
+    Failures list the most repeated statements, which usually point at the
+    N+1. Budgets default to settings.QUERY_BUDGETS / QUERY_BUDGET, the same
+    numbers QueryStatsMiddleware flags in production.
+    """
+
+    def assertQueryBudget(self, url_name, budget=None, args=None, kwargs=None, data=None,
+                          method='get', status=200, max_repeats=None):
+        """
+        Request `url_name` with self.client and fail if it runs more than
+        `budget` queries, or any one statement more than `max_repeats`
+        times. Returns the response with its QueryStats as `.query_stats`.
+        """
+        url = reverse(url_name, args=args, kwargs=kwargs)
+        budget = budget_for(url_name) if budget is None else budget
+        with track_queries() as stats:
+            response = getattr(self.client, method)(url, data)
+        self.assertEqual(response.status_code, status, f"{method.upper()} {url}")
+        self.check_stats(stats, budget, max_repeats, url_name)
+        response.query_stats = stats
+        return response
+
+    @contextmanager
+    def assertMaxQueries(self, budget, max_repeats=None):
+        """Like assertNumQueries, but an upper bound with a duplicate report."""
+        with track_queries() as stats:
+            yield stats
+        self.check_stats(stats, budget, max_repeats, 'block')
+
+    def check_stats(self, stats, budget, max_repeats, label):
+        if stats.queries > budget:
+            self.fail(f"{label} ran over its budget of {budget}: {describe(stats)}")
+        if max_repeats is not None and stats.duplicates(max_repeats + 1):
+            self.fail(f"{label} repeated a query more than {max_repeats} times: {describe(stats)}")
@@ -1,3 +1,1130 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .forms import ChildSearchForm, ChildVaccinationForm, MotherForm
+from .models import (
+    Child, ChildVaccination, HospitalDailyStats, MessageTemplate, Mother, OutboundMessage, Pregnancy, ReminderEvent,
+    SchedulerLock, Vaccination, prefix_range,
+)
+from .services import (
+    dashboard_stats, message_templates, next_due, outbox, scheduler, sms_delivery, vaccination_catalog,
+    vaccination_schedule,
+)
+from .services.reminder_events import dispatch_due, end_of_day
+from .services.sms_delivery import DeliveryResult, OutgoingMessage
+from .test_utils import QueryBudgetMixin
+from .utils import metrics, sms
+from .utils.phone import format_phone
+from .utils.query_stats import fingerprint
+from .views import MOTHER_SEARCH_LIMIT
+
+
+class ChildListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('staff', password='secret')
+        self.client.force_login(self.user)
+
+    def add_children(self, count):
+        start = Mother.objects.count()
+        for i in range(count):
+            mother = Mother.objects.create(name=f"Mother {i}", phone=f"0700{start + i:06d}", hospital="Kisumu")
+            Child.objects.create(mother=mother, name=f"Child {i}")
+
+    def count_list_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('child_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_children(self):
+        self.add_children(2)
+        few = self.count_list_queries()
+
+        self.add_children(30)
+        many = self.count_list_queries()
+
+        self.assertEqual(few, many)
+
+    def test_search_by_mother_name(self):
+        self.add_children(3)
+        response = self.client.get(reverse('child_list'), {'mother': 'mother 1'})
+        self.assertEqual([c.name for c in response.context['children']], ["Child 1"])
+
+    def test_name_searches_are_index_range_scans(self):
+        self.add_children(3)
+        response = self.client.get(reverse('child_list'), {'name': 'child 2'})
+        self.assertEqual([c.name for c in response.context['children']], ["Child 2"])
+
+        for params, index in [({'name': 'ch'}, 'child_name_upper_idx'), ({'mother': 'mo'}, 'mother_name_upper_idx')]:
+            form = ChildSearchForm(params)
+            self.assertTrue(form.is_valid())
+            self.assertIn(index, form.filter(Child.objects.all()).explain())
+
+
+class MotherStatusTests(TestCase):
+    def test_with_status_matches_get_current_status(self):
+        today = timezone.localdate()
+        day = datetime.timedelta(days=1)
+
+        def mother(name, pregnancies=(), children=()):
+            m = Mother.objects.create(name=name, phone=f"07440{Mother.objects.count():05d}", hospital="Kisumu")
+            for due_date in pregnancies:
+                Pregnancy.objects.create(mother=m, due_date=due_date)
+            for dob in children:
+                Child.objects.create(mother=m, name=f"{name} child", dob=dob)
+            return m
+
+        mother("No pregnancy")
+        mother("Pregnant", pregnancies=[today + 30 * day])
+        mother("Due today", pregnancies=[today])
+        mother("Overdue pregnancy", pregnancies=[today - 3 * day])
+        mother("Delivered", pregnancies=[today - 3 * day], children=[today - 3 * day])
+        mother("Child only", children=[today - 400 * day])
+        mother("Pregnant again", pregnancies=[today - 400 * day, today + 90 * day], children=[today - 400 * day])
+        mother("Undated pregnancy", pregnancies=[None])
+        several = mother(
+            "Several children", pregnancies=[today - 10 * day],
+            children=[today - 10 * day, today - 10 * day, today - 800 * day],
+        )
+        vaccination = Vaccination.objects.create(name="OPV 1", recommended_age_days=42)
+        ChildVaccination.objects.create(child=several.children.first(), vaccination=vaccination, scheduled_date=today - 5 * day)
+
+        annotated = dict(Mother.objects.with_status().values_list('name', 'current_status'))
+        expected = {m.name: m.get_current_status() for m in Mother.objects.all()}
+        self.assertEqual(annotated, expected)
+        self.assertEqual(len(set(expected.values())), 4)
+
+
+class DuplicatePhoneTests(TestCase):
+    def setUp(self):
+        self.mother = Mother.objects.create(name="Amina", phone="0722000001", hospital="Kisumu")
+
+    def form_data(self, phone):
+        return {'name': "Other", 'phone': phone, 'language': 'en', 'hospital': "Kisumu"}
+
+    def test_rejects_another_spelling_of_a_registered_phone(self):
+        for phone in ["0722000001", "+254722000001", "254 722 000 001"]:
+            form = MotherForm(self.form_data(phone))
+            self.assertFalse(form.is_valid(), phone)
+            self.assertIn("already registered to Amina", form.errors['phone'][0])
+
+    def test_admin_form_rejects_duplicates(self):
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_superuser('admin', password='secret')
+        form_class = admin.site._registry[Mother].get_form(request)
+        form = form_class(self.form_data("+254722000001"))
+        self.assertFalse(form.is_valid())
+        self.assertIn("already registered to Amina", form.errors['phone'][0])
+
+    def test_format_phone_accepts_only_complete_numbers(self):
+        self.assertEqual(format_phone("0712-345 678"), "+254712345678")
+        self.assertEqual(format_phone("254112345678"), "+254112345678")
+        self.assertEqual(format_phone("+44 20 7946 0958"), "+442079460958")
+        for phone in ["", "12345", "0712 345", "+25471234567890", "+0712345678"]:
+            self.assertIsNone(format_phone(phone), phone)
+
+    def test_forms_reject_invalid_numbers(self):
+        request = RequestFactory().get('/')
+        request.user = User.objects.create_superuser('admin', password='secret')
+        admin_form_class = admin.site._registry[Mother].get_form(request)
+        for form_class in [MotherForm, admin_form_class]:
+            form = form_class(self.form_data("0722 123"))
+            self.assertFalse(form.is_valid())
+            self.assertIn("Enter a valid phone number", form.errors['phone'][0])
+
+    def test_database_refuses_a_second_registration(self):
+        # Bulk paths skip the forms; the constraint still holds
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Mother.objects.create(name="Other", phone="254 722 000 001", hospital="Kisumu")
+        # Numbers that failed normalization are stored blank and not compared
+        Mother.objects.create(name="First", phone="12345", hospital="Kisumu")
+        Mother.objects.create(name="Second", phone="6789", hospital="Kisumu")
+        self.assertEqual(Mother.objects.filter(phone_e164='').count(), 2)
+
+    def test_editing_a_mother_keeps_her_own_phone(self):
+        form = MotherForm(self.form_data("+254722000001"), instance=self.mother)
+        self.assertTrue(form.is_valid(), form.errors)
+
+
+class MotherSearchTests(TestCase):
+    def setUp(self):
+        for name, phone in [("Amina", "0722000001"), ("amani", "0733000002"), ("Baraka", "0722000003")]:
+            Mother.objects.create(name=name, phone=phone, hospital="Kisumu")
+
+    def search(self, term):
+        return sorted(Mother.objects.prefix_search(term).values_list('name', flat=True))
+
+    def test_name_and_phone_prefixes(self):
+        self.assertEqual(self.search("am"), ["Amina", "amani"])
+        self.assertEqual(self.search("AMI"), ["Amina"])
+        self.assertEqual(self.search("0722"), ["Amina", "Baraka"])
+        self.assertEqual(self.search("+25473"), ["amani"])
+
+    def test_prefix_range_bounds(self):
+        self.assertEqual(prefix_range("AM"), ("AM", "AN"))
+        self.assertEqual(prefix_range("+2547"), ("+2547", "+2548"))
+        self.assertEqual(prefix_range("A\U0010ffff"), ("A\U0010ffff", "B"))
+        self.assertEqual(prefix_range(""), ("", None))
+
+    def test_prefix_upper_bound_excludes_longer_neighbours(self):
+        # Characters past U+FFFF sorted after the old prefix + '\uffff' bound
+        Mother.objects.create(name="Am\U0001f600", phone="0722000004", hospital="Kisumu")
+        Mother.objects.create(name="An", phone="0722000005", hospital="Kisumu")
+        self.assertEqual(self.search("am"), ["Amina", "Am\U0001f600", "amani"])
+
+    def test_prefixes_are_index_range_scans(self):
+        self.assertIn('mother_name_upper_idx', Mother.objects.prefix_search("am").explain())
+        self.assertRegex(Mother.objects.prefix_search("0722").explain(), r'(?i)index \S*phone_e164')
+
+    def get_results(self, term):
+        response = self.client.get(reverse('mother_search'), {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_endpoint_needs_login(self):
+        response = self.client.get(reverse('mother_search'), {'q': "am"})
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(settings.LOGIN_URL, response['Location'])
+
+    def test_endpoint_returns_the_autocomplete_shape(self):
+        self.client.force_login(User.objects.create_user('staff', password='secret'))
+        amina = Mother.objects.get(name="Amina")
+        # The widget reads `id` into the hidden input and shows `text`
+        self.assertEqual(self.get_results("ami"), [{'id': amina.pk, 'text': "Amina — 0722000001"}])
+        self.assertEqual([result['text'] for result in self.get_results("0733")], ["amani — 0733000002"])
+        self.assertEqual(self.get_results("  "), [])
+
+    def test_endpoint_caps_results(self):
+        self.client.force_login(User.objects.create_user('staff', password='secret'))
+        for i in range(MOTHER_SEARCH_LIMIT + 5):
+            Mother.objects.create(name=f"Zawadi {i:02d}", phone=f"0744{i:06d}", hospital="Kisumu")
+        results = self.get_results("zaw")
+        self.assertEqual(len(results), MOTHER_SEARCH_LIMIT)
+        self.assertEqual(results[0]['text'], "Zawadi 00 — 0744000000")
+
+
+class FakeRegistryTests(TestCase):
+    def generate(self, **kwargs):
+        call_command('generate_fake_registry', mothers=30, seed=7, today='2026-01-15', stdout=io.StringIO(), **kwargs)
+
+    def snapshot(self, phone_start):
+        mothers = Mother.objects.filter(phone_e164__gte=f"+2547{phone_start:08d}").order_by('phone_e164')
+        return [
+            (m.name, m.hospital, m.language, sorted((c.name, c.dob) for c in m.children.all()))
+            for m in mothers.prefetch_related('children')
+        ]
+
+    def test_same_seed_gives_same_registry(self):
+        self.generate()
+        first = self.snapshot(0)
+        Mother.objects.all().delete()
+
+        self.generate(chunk_size=7)
+        self.assertEqual(self.snapshot(0), first)
+        self.assertEqual(len(first), 30)
+
+    def test_refuses_phone_range_already_in_use(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+
+
+class RegistryImportTests(TestCase):
+    def import_csv(self, rows, header="name,phone,hospital,due_date,child_name,child_dob", **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'registry.csv')
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                f.write(f"{header}\n")
+                f.writelines(f"{row}\n" for row in rows)
+            call_command('import_registry', path, stdout=io.StringIO(), **options)
+            rejects_path = os.path.join(tmp, 'registry.rejects.csv')
+            if not os.path.exists(rejects_path):
+                return []
+            with open(rejects_path, newline='', encoding='utf-8') as f:
+                return [(int(row['line']), row['error']) for row in csv.DictReader(f)]
+
+    def test_invalid_rows_go_to_the_reject_file(self):
+        Mother.objects.create(name="Registered", phone="0722999999", hospital="Kisumu")
+        tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+
+        rejects = self.import_csv([
+            "Amina,0722000001,Kisumu,,Baraka,2026-01-10",
+            "Amina,+254722000001,Kisumu,,Zawadi,2026-01-10",
+            "No Hospital,0722000002,,,,",
+            "Bad Phone,12345,Kisumu,,,",
+            "Bad Date,0722000003,Kisumu,31/31/2026,,",
+            f"Future Child,0722000004,Kisumu,,Imani,{tomorrow}",
+            "Again,0722 999 999,Kisumu,,,",
+        ], chunk_size=2)
+
+        self.assertEqual(rejects, [
+            (4, "missing hospital"),
+            (5, "invalid phone '12345'"),
+            (6, "invalid date '31/31/2026'"),
+            (7, "child_dob is in the future"),
+            (8, "phone +254722999999 is already registered"),
+        ])
+        amina = Mother.objects.get(phone_e164="+254722000001")
+        self.assertEqual(sorted(amina.children.values_list('name', flat=True)), ["Baraka", "Zawadi"])
+        self.assertEqual(Mother.objects.count(), 2)
+
+    def test_missing_required_column_is_a_command_error(self):
+        with self.assertRaisesMessage(CommandError, "CSV header is missing: hospital"):
+            self.import_csv(["Amina,0722000001"], header="name,phone")
+        self.assertFalse(Mother.objects.exists())
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('staff', password='secret', is_staff=True)
+        self.client.force_login(self.user)
+        for i in range(20):
+            mother = Mother.objects.create(name=f"Mother {i}", phone=f"0711{i:06d}", hospital="Kisumu")
+            Child.objects.create(mother=mother, name=f"Child {i}")
+        self.mother = mother
+
+    def test_list_pages_have_no_repeated_queries(self):
+        self.assertQueryBudget('child_list', 4, max_repeats=1)
+        self.assertQueryBudget('staff_dashboard', 5, max_repeats=1)
+
+    def test_mother_page_budget(self):
+        self.assertQueryBudget('motherPage', 10, args=[self.mother.pk])
+
+    def test_repeated_queries_are_reported(self):
+        with self.assertRaisesMessage(AssertionError, "repeated a query"):
+            with self.assertMaxQueries(50, max_repeats=1):
+                for child in Child.objects.all()[:3]:
+                    child.mother.name
+
+    def test_fingerprint_ignores_parameters(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s) AND "n" = \'x\' LIMIT 21'),
+            'SELECT * FROM "t" WHERE "id" IN (...) AND "n" = ? LIMIT ?',
+        )
+
+    @override_settings(DEBUG=True, QUERY_BUDGETS={'child_list': 1})
+    def test_middleware_headers_and_budget_flag(self):
+        with self.settings(MIDDLEWARE=['Mom.middleware.QueryStatsMiddleware', *settings.MIDDLEWARE]):
+            with self.assertLogs('Mom.query_stats', 'WARNING') as logs:
+                response = self.client.get(reverse('child_list'))
+        self.assertIn('X-DB-Query-Count', response)
+        self.assertIn('X-Render-Time-Ms', response)
+        self.assertTrue(response['X-DB-Query-Budget-Exceeded'].endswith('/1'))
+        self.assertIn('"url_name": "child_list"', logs.output[0])
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+        registered = timezone.make_aware(datetime.datetime(2026, 3, 10, 9, 0))
+        self.amina = Mother.objects.create(name="Amina", phone="0722000001", hospital="Kisumu", created_at=registered)
+        self.wanjiru = Mother.objects.create(
+            name="=HYPERLINK(\"http://x\")", phone="0722000002", hospital="Nakuru",
+            created_at=registered + datetime.timedelta(days=30),
+        )
+        Child.objects.create(mother=self.amina, name="Baraka", dob=datetime.date(2026, 1, 5))
+        Child.objects.create(mother=self.wanjiru, name="-Zawadi", dob=datetime.date(2026, 5, 5))
+
+    def download(self, kind, **params):
+        response = self.client.get(reverse('export_data', args=[kind]), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def csv_rows(self, kind, **params):
+        return list(csv.DictReader(io.StringIO(self.download(kind, **params).decode())))
+
+    def test_csv_and_json_carry_the_same_rows(self):
+        rows = self.csv_rows('mothers')
+        self.assertEqual([row['phone'] for row in rows], ["+254722000001", "+254722000002"])
+        records = json.loads(self.download('mothers', format='json'))
+        self.assertEqual([record['id'] for record in records], [int(row['id']) for row in rows])
+        self.assertEqual(records[0]['name'], "Amina")
+
+    def test_gzip_stream_decompresses_to_the_plain_export(self):
+        plain = self.download('children')
+        self.assertEqual(gzip.decompress(self.download('children', gzip='on')), plain)
+
+    def test_each_filter_narrows_the_rows(self):
+        def names(kind, **params):
+            return [row['name'] for row in self.csv_rows(kind, **params)]
+
+        self.assertEqual(names('mothers', hospital="Kisumu"), ["Amina"])
+        self.assertEqual(names('children', hospital="Kisumu"), ["Baraka"])
+        # Registration datetimes compare against whole local days
+        self.assertEqual(names('mothers', date_from="2026-04-09"), ["'=HYPERLINK(\"http://x\")"])
+        self.assertEqual(names('mothers', date_to="2026-03-10"), ["Amina"])
+        self.assertEqual(names('children', date_from="2026-02-01", date_to="2026-06-01"), ["'-Zawadi"])
+
+    def test_free_text_cells_cannot_become_formulas(self):
+        names = {row['name'] for row in self.csv_rows('mothers')}
+        self.assertIn("'=HYPERLINK(\"http://x\")", names)
+        # JSON is not opened by spreadsheets and keeps the value as typed
+        records = json.loads(self.download('mothers', format='json'))
+        self.assertEqual(records[1]['name'], "=HYPERLINK(\"http://x\")")
+
+    def test_header_is_sent_before_the_rows(self):
+        response = self.client.get(reverse('export_data', args=['mothers']))
+        self.assertEqual(next(response.streaming_content), b"id,name,phone,language,consent,hospital,registered_at\r\n")
+
+    def test_staff_only(self):
+        self.client.force_login(User.objects.create_user('nurse', password='secret'))
+        response = self.client.get(reverse('export_data', args=['mothers']))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(settings.LOGIN_URL, response['Location'])
+
+
+class CheckScheduledVaccinationsTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        day = datetime.timedelta(days=1)
+        bcg = Vaccination.objects.create(name="BCG", recommended_age_days=0)
+        opv = Vaccination.objects.create(name="OPV 1", recommended_age_days=42)
+        measles = Vaccination.objects.create(name="Measles", recommended_age_days=270)
+        kisumu = Mother.objects.create(name="Amina", phone="0722000001", hospital="Kisumu")
+        nakuru = Mother.objects.create(name="Wanjiru", phone="0722000002", hospital="Nakuru")
+        baraka = Child.objects.create(mother=kisumu, name="Baraka")
+        zawadi = Child.objects.create(mother=nakuru, name="Zawadi")
+        ChildVaccination.objects.create(child=baraka, vaccination=bcg, scheduled_date=self.today - 10 * day,
+                                        completed=True)
+        ChildVaccination.objects.create(child=baraka, vaccination=opv, scheduled_date=self.today - 2 * day)
+        ChildVaccination.objects.create(child=baraka, vaccination=measles, scheduled_date=self.today + day)
+        ChildVaccination.objects.create(child=zawadi, vaccination=bcg, scheduled_date=self.today + 30 * day)
+
+    def run_command(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('check_scheduled_vaccinations', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def csv_report(self, *args):
+        out, _ = self.run_command('--format', 'csv', *args)
+        return list(csv.DictReader(io.StringIO(out)))
+
+    def test_date_and_hospital_filters(self):
+        since = (self.today - datetime.timedelta(days=5)).isoformat()
+        until = self.today.isoformat()
+        self.assertEqual([row['vaccine'] for row in self.csv_report('--from', since, '--to', until)], ["OPV 1"])
+        self.assertEqual([row['child'] for row in self.csv_report('--hospital', 'Nakuru')], ["Zawadi"])
+
+    def test_status_filters(self):
+        def vaccines(status):
+            return [row['vaccine'] for row in self.csv_report('--status', status)]
+
+        self.assertEqual(vaccines('overdue'), ["OPV 1"])
+        self.assertEqual(vaccines('completed'), ["BCG"])
+        self.assertEqual(vaccines('due'), ["Measles"])
+        self.assertEqual(vaccines('upcoming'), ["BCG"])
+        self.assertEqual(len(self.csv_report('--status', 'pending')), 3)
+
+    def test_output_formats(self):
+        rows = self.csv_report()
+        self.assertEqual([row['status'] for row in rows], ["completed", "overdue", "due", "upcoming"])
+
+        out, _ = self.run_command('--format', 'jsonl')
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([record['id'] for record in records], [int(row['id']) for row in rows])
+        self.assertIs(records[0]['day_before_sent'], False)
+
+        out, err = self.run_command()
+        lines = out.splitlines()
+        self.assertTrue(lines[0].startswith("id"))
+        self.assertEqual(len(lines), 2 + len(rows))
+        self.assertIn("4 rows", err)
+
+    def test_summary_totals_per_hospital(self):
+        summary = {row['hospital']: row for row in self.csv_report('--summary')}
+        self.assertEqual(summary['Kisumu'], {
+            'hospital': 'Kisumu', 'total': '3', 'completed': '1', 'overdue': '1', 'due': '1',
+            'upcoming': '0', 'day_before_unsent': '2', 'on_day_unsent': '2',
+        })
+        self.assertEqual((summary['Nakuru']['total'], summary['Nakuru']['upcoming']), ('1', '1'))
+
+    def test_invalid_date_is_a_command_error(self):
+        with self.assertRaisesMessage(CommandError, "Invalid --from"):
+            self.run_command('--from', '18/10/2026')
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        day = datetime.timedelta(days=1)
+        vaccination = Vaccination.objects.create(name="BCG", recommended_age_days=0)
+        self.kisumu = Mother.objects.create(name="Amina", phone="0722000001", hospital="Kisumu", consent=True)
+        Mother.objects.create(name="Akinyi", phone="0722000002", hospital="Kisumu")
+        nakuru = Mother.objects.create(name="Wanjiru", phone="0722000003", hospital="Nakuru", consent=True)
+        Pregnancy.objects.create(mother=self.kisumu, due_date=self.today + 3 * day)
+        Pregnancy.objects.create(mother=nakuru, due_date=self.today + 60 * day)
+        Pregnancy.objects.create(mother=nakuru, due_date=self.today - day)
+        for mother, offsets in [(self.kisumu, [0, 0, 1, -4]), (nakuru, [-1, 9])]:
+            for i, offset in enumerate(offsets):
+                child = Child.objects.create(mother=mother, name=f"Child {i}")
+                ChildVaccination.objects.create(child=child, vaccination=vaccination,
+                                                scheduled_date=self.today + offset * day)
+
+    def test_compute_counts_per_hospital(self):
+        stats = dashboard_stats.compute(self.today)
+        self.assertEqual(dict(stats['Kisumu']), {
+            'due_today': 2, 'due_tomorrow': 1, 'overdue': 1, 'active_pregnancies': 1,
+            'deliveries_this_week': 1, 'mothers': 2, 'consenting_mothers': 1,
+        })
+        self.assertEqual(dict(stats['Nakuru']), {
+            'due_today': 0, 'due_tomorrow': 0, 'overdue': 1, 'active_pregnancies': 1,
+            'deliveries_this_week': 0, 'mothers': 1, 'consenting_mothers': 1,
+        })
+
+    def test_pending_doses_are_read_through_their_partial_index(self):
+        doses = ChildVaccination.objects.filter(completed=False, scheduled_date__lte=self.today)
+        self.assertIn('childvacc_pending_date_idx', doses.explain())
+
+    def test_refresh_is_idempotent_and_zeroes_emptied_hospitals(self):
+        self.assertEqual(dashboard_stats.refresh(self.today), 2)
+        self.assertEqual(dashboard_stats.refresh(self.today), 2)
+        self.assertEqual(HospitalDailyStats.objects.filter(date=self.today).count(), 2)
+
+        Mother.objects.filter(hospital="Nakuru").delete()
+        call_command('refresh_dashboard_stats', stdout=io.StringIO())
+        nakuru = HospitalDailyStats.objects.get(date=self.today, hospital="Nakuru")
+        self.assertEqual([getattr(nakuru, field) for field in dashboard_stats.COUNTER_FIELDS],
+                         [0] * len(dashboard_stats.COUNTER_FIELDS))
+
+    def test_for_day_totals_every_hospital(self):
+        dashboard_stats.refresh(self.today)
+        rows, totals = dashboard_stats.for_day(self.today)
+        self.assertEqual([row.hospital for row in rows], ["Kisumu", "Nakuru"])
+        self.assertEqual((totals.overdue, totals.mothers, totals.due_today), (2, 3, 2))
+
+        rows, totals = dashboard_stats.for_day(self.today, hospital="Nakuru")
+        self.assertEqual((len(rows), totals.mothers), (1, 1))
+
+    def test_dashboard_renders_from_the_table(self):
+        self.client.force_login(User.objects.create_user('staff', password='secret'))
+        dashboard_stats.refresh(self.today)
+        # Live rows added after the refresh do not show until the next one
+        Mother.objects.create(name="Late", phone="0722000009", hospital="Kisumu")
+        HospitalDailyStats.objects.filter(hospital="Kisumu").update(due_tomorrow=41)
+
+        response = self.client.get(reverse('staff_dashboard'))
+        stats = response.context['stats']
+        self.assertEqual((stats.mothers, stats.due_tomorrow), (3, 41))
+        self.assertContains(response, '<div class="fs-4 fw-bold">41</div>', html=False)
+
+
+class VaccinationCatalogTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bcg = Vaccination.objects.create(name="BCG", recommended_age_days=0, dose_order=1)
+
+    def catalog_in_another_process(self):
+        """get_catalog() as seen by a process still holding an older copy."""
+        stale = dict(vaccination_catalog._local)
+        vaccination_catalog._local.update(self.other_process)
+        try:
+            return vaccination_catalog.get_catalog()
+        finally:
+            self.other_process = dict(vaccination_catalog._local)
+            vaccination_catalog._local.update(stale)
+
+    def test_saves_and_deletes_reach_other_processes(self):
+        vaccination_catalog.get_catalog()
+        self.other_process = dict(vaccination_catalog._local)
+        self.assertEqual([v.name for v in self.catalog_in_another_process()], ["BCG"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            opv = Vaccination.objects.create(name="OPV 0", recommended_age_days=0, dose_order=2)
+        self.assertEqual([v.name for v in self.catalog_in_another_process()], ["BCG", "OPV 0"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            opv.delete()
+        self.assertEqual([v.name for v in self.catalog_in_another_process()], ["BCG"])
+
+    def test_cached_catalog_skips_the_database(self):
+        vaccination_catalog.get_catalog()
+        vaccination_catalog._local.update(version=None, catalog=None)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(vaccination_catalog.get_catalog()), 1)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('staff', password='secret'))
+        self.mother = Mother.objects.create(name="Akinyi", phone="0700000001", hospital="Kisumu")
+        self.pregnancy = Pregnancy.objects.create(mother=self.mother, next_visit=datetime.date(2030, 3, 1),
+                                                  due_date=datetime.date(2030, 6, 1))
+        self.child = Child.objects.create(mother=self.mother, name="Baraka", dob=timezone.localdate())
+        vaccination = Vaccination.objects.create(name="BCG", recommended_age_days=0, dose_order=1)
+        self.dose = ChildVaccination.objects.create(child=self.child, vaccination=vaccination,
+                                                    scheduled_date=datetime.date(2030, 1, 1))
+
+    def pages(self):
+        mother = self.client.get(reverse('motherPage', args=[self.mother.pk])).content.decode()
+        child = self.client.get(reverse('child_detail', args=[self.child.pk])).content.decode()
+        return mother, child
+
+    def test_editing_a_child_refreshes_both_pages(self):
+        self.pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.child.gender = 'Male'
+            self.child.save()
+        mother, child = self.pages()
+        self.assertIn('<span class="text-capitalize">Male</span>', mother)
+        self.assertIn('text-capitalize" style="font-size: 1.15rem;">Male</p>', child)
+
+    def test_editing_a_dose_refreshes_both_pages(self):
+        self.pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dose.scheduled_date = datetime.date(2030, 2, 2)
+            self.dose.save()
+        mother, child = self.pages()
+        self.assertIn("February 02, 2030", mother)
+        self.assertIn("February 02, 2030", child)
+
+    def test_editing_a_pregnancy_refreshes_the_mother_page(self):
+        self.pages()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pregnancy.next_visit = datetime.date(2030, 4, 4)
+            self.pregnancy.save()
+        mother, _ = self.pages()
+        self.assertIn("April 04, 2030", mother)
+        self.assertNotIn("March 01, 2030", mother)
+
+    def test_versions_are_bumped_only_on_commit(self):
+        self.pages()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.child.gender = 'Male'
+            self.child.save()
+            # A render before commit keeps the old fragment rather than
+            # caching this transaction's rows under a new version
+            _, child = self.pages()
+            self.assertIn(">Female</p>", child)
+        for callback in callbacks:
+            callback()
+        _, child = self.pages()
+        self.assertIn(">Male</p>", child)
+
+
+class MessageTemplateTests(TestCase):
+    kind = ReminderEvent.KIND_VISIT_DAY_BEFORE
+    context = {'name': "Amina", 'hospital': "Kisumu"}
+
+    def render(self, language):
+        return message_templates.get_registry().render(language, self.kind, self.context)
+
+    def test_languages_fall_back_to_english(self):
+        english = "Hello Amina, reminder: you have an antenatal clinic visit at Kisumu tomorrow."
+        self.assertEqual(self.render('en'), english)
+        self.assertEqual(self.render('French'), english)
+        self.assertEqual(self.render(''), english)
+        for language in ['sw', 'Kiswahili', 'sw-KE']:
+            self.assertTrue(self.render(language).startswith("Habari Amina"), language)
+
+    def test_saved_overrides_apply_and_invalid_ones_keep_the_default(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            template = MessageTemplate.objects.create(
+                language='sw', kind=self.kind, body="Karibu {name}, {hospital} kesho.",
+            )
+        self.assertEqual(self.render('sw'), "Karibu Amina, Kisumu kesho.")
+
+        # Rows written around MessageTemplateForm are checked again when loaded
+        template.body = "Karibu {name.__class__}"
+        with self.captureOnCommitCallbacks(execute=True):
+            template.save()
+        self.assertTrue(self.render('sw').startswith("Habari Amina"))
+
+    def test_check_refuses_unknown_placeholders(self):
+        with self.assertRaisesMessage(ValueError, "Unknown placeholder {doses}"):
+            message_templates.check(self.kind, "Hello {doses}")
+        with self.assertRaisesMessage(ValueError, "without a format spec"):
+            message_templates.check(self.kind, "Hello {name!r}")
+
+
+class SchedulerLockTests(TestCase):
+    def scheduler(self, logs):
+        return scheduler.ReminderScheduler(sms.get_connection(), log=logs.append, lock_ttl=60)
+
+    def test_only_one_owner_holds_the_lease(self):
+        self.assertTrue(scheduler.acquire_lock('a', ttl=60))
+        self.assertFalse(scheduler.acquire_lock('b', ttl=60))
+        self.assertTrue(scheduler.acquire_lock('a', ttl=60))
+
+        # The holder died: its lease runs out
+        SchedulerLock.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertTrue(scheduler.acquire_lock('b', ttl=60))
+        self.assertFalse(scheduler.acquire_lock('a', ttl=60))
+
+        scheduler.release_lock('b')
+        self.assertTrue(scheduler.acquire_lock('a', ttl=60))
+
+    def test_standby_instance_takes_over_a_lost_lease(self):
+        logs = []
+        active, standby = self.scheduler(logs), self.scheduler(logs)
+        active.heartbeat()
+        standby.heartbeat()
+        self.assertEqual((active.has_lock, standby.has_lock), (True, False))
+        self.assertTrue(active.heap)
+
+        SchedulerLock.objects.update(expires_at=timezone.now() - datetime.timedelta(seconds=1))
+        standby.heartbeat()
+        self.assertTrue(standby.has_lock)
+
+        # The old holder notices when renewing between batches of a long job
+        active.heap.clear()
+        active.job_long = lambda now, payload: active.renew_lease()
+        active.push(timezone.now(), 'long')
+        active.next_heartbeat = 0.0
+        active.run_due_jobs()
+        self.assertFalse(active.has_lock)
+        self.assertIn("⚠️ Lock lost to another scheduler during long, standing by", logs)
+
+    def test_failed_job_is_retried_later(self):
+        logs = []
+        instance = self.scheduler(logs)
+        instance.job_fail = lambda now, payload: 1 / 0
+        now = timezone.now()
+        instance.push(now, 'fail', 'payload')
+        instance.run_due_jobs()
+
+        [(run_at, _, job, payload)] = instance.heap
+        self.assertEqual((job, payload), ('fail', 'payload'))
+        self.assertGreaterEqual(run_at, now + datetime.timedelta(seconds=instance.retry_delay))
+        self.assertTrue(any(line.startswith("❌ fail failed") for line in logs))
+
+
+class MetricsTests(TestCase):
+    def test_histogram_text_format(self):
+        registry = metrics.Registry()
+        histogram = metrics.Histogram('test_seconds', 'Test.', ['job'], buckets=[0.1, 1], registry=registry)
+        histogram.observe(0.05, job='a')
+        histogram.observe(0.5, job='a')
+        self.assertEqual(registry.render().splitlines()[2:], [
+            'test_seconds_bucket{job="a",le="0.1"} 1',
+            'test_seconds_bucket{job="a",le="1.0"} 2',
+            'test_seconds_bucket{job="a",le="+Inf"} 2',
+            'test_seconds_sum{job="a"} 0.55',
+            'test_seconds_count{job="a"} 2',
+        ])
+
+    def test_metrics_endpoint_is_staff_only(self):
+        url = reverse('metrics')
+        self.client.force_login(User.objects.create_user('clerk', password='secret'))
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.client.force_login(User.objects.create_user('staff', password='secret', is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE mom_sms_send_seconds histogram', response.content.decode())
+        self.assertIn('mom_view_seconds_count{view="metrics",method="GET",status="3xx"}', response.content.decode())
+
+
+class ProviderError(Exception):
+    def __init__(self, status):
+        super().__init__(f"provider returned {status}")
+        self.status = status
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ScheduleVaccinationsCommandTests(TestCase):
+    def setUp(self):
+        Vaccination.objects.create(name="Measles", recommended_age_days=270)
+        mother = Mother.objects.create(name="Amina", phone="0722000001", hospital="Kisumu")
+        self.children = [
+            Child.objects.create(mother=mother, name=f"Child {i}", dob=timezone.localdate()) for i in range(5)
+        ]
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.checkpoint = os.path.join(tmp.name, "schedule.checkpoint")
+
+    def backfill(self, schedule_many=vaccination_schedule.schedule_many):
+        """Run the command in chunks of two; return the child ids of each chunk."""
+        chunks = []
+
+        def record(chunk, *args):
+            chunks.append([child_id for child_id, _ in chunk])
+            return schedule_many(chunk, *args)
+
+        out, err = io.StringIO(), io.StringIO()
+        path = 'Mom.management.commands.schedule_vaccinations.schedule_many'
+        with mock.patch(path, record):
+            call_command('schedule_vaccinations', '--chunk-size', '2', '--checkpoint', self.checkpoint,
+                         stdout=out, stderr=err)
+        return chunks, out.getvalue(), err.getvalue()
+
+    def test_interrupted_run_resumes_after_the_last_chunk_done(self):
+        def fail_on_second_chunk(chunk, *args):
+            if ChildVaccination.objects.exists():
+                raise KeyboardInterrupt
+            return vaccination_schedule.schedule_many(chunk, *args)
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.backfill(fail_on_second_chunk)
+        self.assertTrue(os.path.exists(self.checkpoint))
+
+        ids = [child.pk for child in self.children]
+        chunks, out, _ = self.backfill()
+        self.assertIn(f"Resuming after child id {ids[1]}", out)
+        self.assertEqual(chunks, [ids[2:4], ids[4:]])
+        self.assertIn("Total new vaccinations scheduled: 3 for 3 children", out)
+        self.assertEqual(ChildVaccination.objects.count(), 5)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_missing_or_corrupt_checkpoint_starts_from_the_first_child(self):
+        chunks, _, err = self.backfill()
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(err, "")
+
+        for content in ["{not json", "[]", '{"last_child_id": "x"}']:
+            with open(self.checkpoint, "w") as fh:
+                fh.write(content)
+            chunks, _, err = self.backfill()
+            self.assertEqual(chunks[0][0], self.children[0].pk, content)
+            self.assertIn("Ignoring unreadable checkpoint", err)
+        # Every dose was already scheduled, so the reruns added none
+        self.assertEqual(ChildVaccination.objects.count(), 5)
+
+
+class SmsDeliveryTests(TestCase):
+    def failing_send(self, *errors):
+        """A send() raising `errors` in turn, then succeeding."""
+        calls = []
+
+        def send(to, body):
+            calls.append(to)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return f"SM{len(calls)}"
+        return send, calls
+
+    def send_one(self, send, max_attempts=3):
+        message = OutgoingMessage(key=1, to="+254722000001", body="Hello")
+        return sms_delivery.send_with_retry(message, send, sms_delivery.TokenBucket(0), max_attempts, backoff=0)
+
+    def test_transient_errors_are_retried(self):
+        for error in [ConnectionError("reset"), ProviderError(429), ProviderError(503)]:
+            send, calls = self.failing_send(error, error)
+            result = self.send_one(send)
+            self.assertEqual((result.ok, result.attempts, result.provider_id), (True, 3, "SM3"), error)
+
+    def test_retries_stop_at_the_attempt_cap(self):
+        send, calls = self.failing_send(*[ProviderError(500)] * 5)
+        result = self.send_one(send, max_attempts=3)
+        self.assertEqual((result.ok, result.attempts, len(calls)), (False, 3, 3))
+        self.assertEqual(result.error, "provider returned 500")
+
+    def test_client_errors_fail_at_once(self):
+        send, calls = self.failing_send(ProviderError(400))
+        result = self.send_one(send)
+        self.assertEqual((result.ok, result.attempts, len(calls)), (False, 1, 1))
+        self.assertFalse(sms_delivery.is_retryable(ProviderError(404)))
+
+    def test_concurrent_delivery_reports_results_in_input_order(self):
+        def send(to, body):
+            # Later messages finish first
+            time.sleep((40 - int(to[-2:])) / 4000)
+            return f"SM{to[-2:]}"
+
+        messages = [OutgoingMessage(key=i, to=f"+2547220000{i:02d}", body="Hello") for i in range(40)]
+        report = sms_delivery.deliver(messages, send, workers=8, rate=0)
+        self.assertEqual([result.message.key for result in report.results], list(range(40)))
+        self.assertEqual(report.results[7].provider_id, "SM07")
+
+        batches = []
+        report = sms_delivery.deliver(messages, send, workers=8, rate=0, batch_size=15, on_batch=batches.append)
+        self.assertEqual(sorted(result.message.key for batch in batches for result in batch), list(range(40)))
+        self.assertEqual((report.sent, report.results), (40, []))
+
+    def test_token_bucket_throttles_to_the_rate(self):
+        clock = FakeClock()
+        bucket = sms_delivery.TokenBucket(2, clock=clock, sleep=clock.sleep)
+        for _ in range(6):
+            bucket.acquire()
+        # Two tokens to start with, then one every half second
+        self.assertAlmostEqual(clock.now, 2.0)
+
+        unlimited = sms_delivery.TokenBucket(0, clock=clock, sleep=clock.sleep)
+        for _ in range(100):
+            unlimited.acquire()
+        self.assertAlmostEqual(clock.now, 2.0)
+
+
+class OutboxTests(TestCase):
+    def enqueue(self, count):
+        return outbox.enqueue([OutboundMessage(to=f"+2547220000{i:02d}", body=f"Message {i}") for i in range(count)])
+
+    def test_leases_are_exclusive_until_they_expire(self):
+        self.enqueue(3)
+        first = outbox.lease_batch(2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(outbox.lease_batch(10)), 1)
+        self.assertEqual(outbox.lease_batch(10), [])
+
+        # A worker died holding the first batch
+        OutboundMessage.objects.filter(pk__in=[row.pk for row in first]).update(
+            leased_until=timezone.now() - datetime.timedelta(seconds=1),
+        )
+        self.assertEqual({row.pk for row in outbox.lease_batch(10)}, {row.pk for row in first})
+
+    def test_results_from_an_expired_lease_are_dropped(self):
+        self.enqueue(2)
+        slow = outbox.lease_batch(10)
+        OutboundMessage.objects.update(leased_until=timezone.now() - datetime.timedelta(seconds=1))
+        fast = outbox.lease_batch(1)
+
+        # The second worker delivers the re-leased message first
+        outbox.record_results({row.id: row for row in fast}, [
+            DeliveryResult(OutgoingMessage(fast[0].id, fast[0].to, fast[0].body), ok=True, attempts=1, provider_id='SM1'),
+        ])
+        # The slow worker's failures only land on the row it still holds
+        results = [DeliveryResult(OutgoingMessage(row.id, row.to, row.body), ok=False, attempts=1, error="timeout")
+                   for row in slow]
+        with self.assertLogs('Mom.outbox', 'WARNING'):
+            self.assertEqual(outbox.record_results({row.id: row for row in slow}, results), 1)
+
+        taken_over = OutboundMessage.objects.get(pk=fast[0].pk)
+        self.assertEqual((taken_over.status, taken_over.attempts, taken_over.provider_id),
+                         (OutboundMessage.STATUS_SENT, 1, 'SM1'))
+        kept = OutboundMessage.objects.exclude(pk=fast[0].pk).get()
+        self.assertEqual((kept.status, kept.attempts), (OutboundMessage.STATUS_PENDING, 1))
+
+    @override_settings(SMS_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_messages_back_off_then_fail(self):
+        [message] = self.enqueue(1)
+        failing = sms.get_connection('Mom.utils.sms_backends.FakeBackend', latency=0, failure_rate=1.0)
+        options = {'workers': 1, 'rate': 0, 'max_attempts': 1}
+
+        self.assertEqual(outbox.drain(failing, **options), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboundMessage.STATUS_PENDING, 1))
+        self.assertGreater(message.available_at, timezone.now())
+        self.assertIn("simulated failure", message.last_error)
+        # Not deliverable again until its backoff has elapsed
+        self.assertEqual(outbox.drain(failing, **options), (0, 0))
+
+        OutboundMessage.objects.filter(pk=message.pk).update(available_at=timezone.now())
+        outbox.drain(failing, **options)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboundMessage.STATUS_FAILED, 2))
+
+    @override_settings(SMS_BACKEND='Mom.utils.sms_backends.FileBackend', SMS_FILE_PATH='')
+    def test_drain_command_reports_misconfigured_backend(self):
+        with self.assertRaisesMessage(CommandError, "SMS backend is not configured"):
+            call_command('drain_outbox', stdout=io.StringIO())
+
+    def test_file_backend_appends_without_holding_the_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = sms.get_connection('Mom.utils.sms_backends.FileBackend', file_path=tmp)
+            backend.send("+254722000001", "First")
+            backend.send("+254722000002", "Second")
+            with open(backend.path, encoding='utf-8') as f:
+                log = f.read()
+        self.assertIn("To: +254722000001\nId: CONSOLE00000001\nFirst\n", log)
+        self.assertIn("To: +254722000002\nId: CONSOLE00000002\nSecond\n", log)
+
+    def test_fake_backend_counts_without_keeping_messages(self):
+        sms.outbox.clear()
+        backend = sms.get_connection('Mom.utils.sms_backends.FakeBackend', latency=0)
+        report = backend.send_many(
+            [OutgoingMessage(key=i, to=f"+2547220000{i:02d}", body="Hello") for i in range(20)], workers=4, rate=0,
+        )
+        self.assertEqual((report.sent, backend.sent), (20, 20))
+        self.assertEqual(len({result.provider_id for result in report.results}), 20)
+        self.assertEqual(sms.outbox, [])
+
+    def test_drain_delivers_and_records_provider_ids(self):
+        self.enqueue(2)
+        sms.outbox.clear()
+        self.assertEqual(outbox.drain(sms.get_connection(), workers=2, rate=0), (2, 0))
+        self.assertEqual(len(sms.outbox), 2)
+        self.assertFalse(OutboundMessage.objects.exclude(status=OutboundMessage.STATUS_SENT).exists())
+        self.assertFalse(OutboundMessage.objects.filter(provider_id='').exists())
+
+
+class VaccinationScheduleTests(TestCase):
+    def setUp(self):
+        call_command('seed_vaccinations', stdout=io.StringIO())
+        mother = Mother.objects.create(name="Amina", phone="0722000001", hospital="Kisumu", consent=True)
+        self.child = Child.objects.create(mother=mother, name="Baraka", dob=timezone.localdate())
+
+    def race_first_dose(self):
+        """Patch plan_doses so another run schedules the first dose meanwhile."""
+        real_plan_doses = vaccination_schedule.plan_doses
+
+        def plan_then_race(dob, catalog, today):
+            due, past = real_plan_doses(dob, catalog, today)
+            vaccination, scheduled_date = due[0]
+            ChildVaccination.objects.create(child=self.child, vaccination=vaccination, scheduled_date=scheduled_date)
+            return due, past
+
+        return mock.patch.object(vaccination_schedule, 'plan_doses', plan_then_race)
+
+    def test_dose_inserted_by_a_concurrent_run_is_skipped(self):
+        with self.race_first_dose():
+            created = vaccination_schedule.schedule_many([(self.child.pk, self.child.dob)])
+
+        doses = ChildVaccination.objects.filter(child=self.child)
+        self.assertEqual(doses.count(), Vaccination.objects.count())
+        # Only the doses this run inserted are counted
+        self.assertEqual(created, doses.count() - 1)
+        # Every inserted dose got its reminders, though bulk_create returned no pks
+        self.assertEqual(
+            ReminderEvent.objects.filter(kind=ReminderEvent.KIND_VACCINE_ON_DAY).count(), doses.count(),
+        )
+
+    def test_report_leaves_out_doses_of_a_concurrent_run(self):
+        with self.race_first_dose():
+            report = vaccination_schedule.schedule_child(self.child)
+
+        raced = ChildVaccination.objects.filter(child=self.child).order_by('id').first()
+        self.assertEqual(report.already_scheduled, [raced.vaccination_id])
+        self.assertNotIn(raced.pk, [cv.pk for cv in report.created])
+        self.assertEqual(report.created_count, Vaccination.objects.count() - 1)
+
+    def test_form_rejects_a_vaccine_already_on_the_schedule(self):
+        vaccination_schedule.schedule_child(self.child)
+        dose = self.child.vaccinations.first()
+        form = ChildVaccinationForm(
+            {'vaccination': dose.vaccination_id, 'scheduled_date': dose.scheduled_date},
+            instance=ChildVaccination(child=self.child),
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("already on this child's schedule", form.errors['vaccination'][0])
+
+
+class NextDueTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        mother = Mother.objects.create(name="Amina", phone="0722000001", hospital="Kisumu")
+        self.child = Child.objects.create(mother=mother, name="Baraka", dob=self.today - datetime.timedelta(days=50))
+        self.bcg = Vaccination.objects.create(name="BCG", recommended_age_days=0)
+        self.opv = Vaccination.objects.create(name="OPV 1", recommended_age_days=42)
+
+    def next_due(self):
+        self.child.refresh_from_db()
+        return self.child.next_due_date, self.child.next_due_vaccination_id, self.child.overdue_count
+
+    def test_saving_doses_refreshes_the_child(self):
+        day = datetime.timedelta(days=1)
+        overdue = ChildVaccination.objects.create(
+            child=self.child, vaccination=self.bcg, scheduled_date=self.today - 8 * day,
+        )
+        ChildVaccination.objects.create(child=self.child, vaccination=self.opv, scheduled_date=self.today + 2 * day)
+        self.assertEqual(self.next_due(), (self.today - 8 * day, self.bcg.pk, 1))
+        self.assertEqual(list(Child.objects.defaulters(self.today)), [self.child])
+
+        overdue.completed = True
+        overdue.save()
+        self.assertEqual(self.next_due(), (self.today + 2 * day, self.opv.pk, 0))
+        self.assertEqual(list(Child.objects.due_between(self.today, self.today + 6 * day)), [self.child])
+        self.assertEqual(list(Child.objects.up_to_date(self.today)), [self.child])
+
+        # Counts roll over as doses fall due
+        next_due.refresh([self.child.pk], today=self.today + 3 * day)
+        self.assertEqual(self.next_due(), (self.today + 2 * day, self.opv.pk, 1))
+
+    def test_repair_command_fixes_bulk_changes(self):
+        dose = ChildVaccination.objects.create(child=self.child, vaccination=self.opv, scheduled_date=self.today)
+        # .update() bypasses the signals that keep Child in step
+        ChildVaccination.objects.filter(pk=dose.pk).update(completed=True)
+        self.assertEqual(self.next_due(), (self.today, self.opv.pk, 0))
+
+        call_command('repair_next_due', stdout=io.StringIO())
+        self.assertEqual(self.next_due(), (None, None, 0))
+
+
+class ReminderDispatchTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.mother = Mother.objects.create(name="Amina", phone="0722000001", hospital="Kisumu", consent=True)
+        self.child = Child.objects.create(mother=self.mother, name="Baraka", dob=self.today - datetime.timedelta(days=42))
+
+    def add_dose(self, name, scheduled_date, age_days=42, dose_order=1):
+        vaccination = Vaccination.objects.create(name=name, recommended_age_days=age_days, dose_order=dose_order)
+        return ChildVaccination.objects.create(child=self.child, vaccination=vaccination, scheduled_date=scheduled_date)
+
+    def test_daily_run_before_send_hour_sends_todays_reminders(self):
+        dose = self.add_dose("OPV 1", self.today + datetime.timedelta(days=1))
+        # The day-before reminder is due later today, after this run
+        dose.reminder_events.filter(kind=ReminderEvent.KIND_VACCINE_DAY_BEFORE).update(send_at=end_of_day(self.today))
+
+        call_command('send_vaccine_reminders', no_drain=True, stdout=io.StringIO())
+
+        states = dict(dose.reminder_events.values_list('kind', 'state'))
+        self.assertEqual(states, {
+            ReminderEvent.KIND_VACCINE_DAY_BEFORE: ReminderEvent.STATE_SENT,
+            ReminderEvent.KIND_VACCINE_ON_DAY: ReminderEvent.STATE_PENDING,
+        })
+        self.assertEqual(OutboundMessage.objects.filter(mother=self.mother).count(), 1)
+
+    def test_reminders_to_an_invalid_phone_are_skipped(self):
+        Mother.objects.filter(pk=self.mother.pk).update(phone="12345", phone_e164='')
+        dose = self.add_dose("OPV 1", self.today)
+
+        dispatch_due(end_of_day(self.today))
+
+        self.assertFalse(OutboundMessage.objects.exists())
+        self.assertEqual(
+            dose.reminder_events.get(kind=ReminderEvent.KIND_VACCINE_ON_DAY).state, ReminderEvent.STATE_SKIPPED,
+        )
+
+    def test_same_day_doses_coalesce_into_one_sms_per_mother(self):
+        tomorrow = self.today + datetime.timedelta(days=1)
+        twin = Child.objects.create(mother=self.mother, name="Zawadi", dob=self.child.dob)
+        bcg = self.add_dose("BCG", tomorrow, age_days=0)
+        ChildVaccination.objects.create(child=twin, vaccination=bcg.vaccination, scheduled_date=tomorrow)
+        silent = Mother.objects.create(name="Wanjiru", phone="0722000002", hospital="Kisumu", consent=False)
+        self.child = Child.objects.create(mother=silent, name="Imani", dob=self.child.dob)
+        self.add_dose("OPV 0", tomorrow, age_days=0)
+
+        sms.outbox.clear()
+        call_command('send_vaccine_reminders', workers=1, rate=0, stdout=io.StringIO())
+        call_command('send_vaccine_reminders', workers=1, rate=0, stdout=io.StringIO())
+
+        self.assertEqual(len(sms.outbox), 1)
+        _, to, body = sms.outbox[0]
+        self.assertEqual(to, self.mother.phone_e164)
+        self.assertIn("Baraka (BCG) and Zawadi (BCG) are due for vaccination tomorrow", body)
+        self.assertEqual(ChildVaccination.objects.filter(reminder_day_before_sent=True).count(), 2)
+        self.assertEqual(
+            ReminderEvent.objects.get(mother=silent, kind=ReminderEvent.KIND_VACCINE_DAY_BEFORE).state,
+            ReminderEvent.STATE_SKIPPED,
+        )
+
+    def test_batches_keep_each_mothers_doses_in_one_message(self):
+        twin = Child.objects.create(mother=self.mother, name="Zawadi", dob=self.child.dob)
+        self.add_dose("Measles", self.today, age_days=270)
+        self.add_dose("OPV 1", self.today)
+        ChildVaccination.objects.create(child=twin, vaccination=Vaccination.objects.get(name="OPV 1"), scheduled_date=self.today)
+        other = Mother.objects.create(name="Wanjiru", phone="0722000002", hospital="Kisumu", consent=True)
+        self.child = Child.objects.create(mother=other, name="Imani", dob=self.child.dob)
+        self.add_dose("BCG", self.today, age_days=0)
+
+        self.assertEqual(dispatch_due(due_by=end_of_day(self.today), batch_size=1), 4)
+
+        bodies = dict(OutboundMessage.objects.values_list('mother_id', 'body'))
+        self.assertEqual(len(bodies), 2)
+        self.assertIn("Baraka (OPV 1, Measles) and Zawadi (OPV 1)", bodies[self.mother.pk])
@@ -11,6 +11,8 @@ urlpatterns = [
     path('mother/<int:pk>/', views.motherPage, name='motherPage'),
     path("staffLogout/", LogoutView.as_view(next_page='staff_login'), name="staff_logout"),
     path('staffDashboard/', views.staff_dashboard, name='staff_dashboard'),
+    path('mothers/search/', views.mother_search, name='mother_search'),
+    path('exports/<str:kind>/', views.export_data, name='export_data'),
     path('pregnancy/<int:pregnancy_id>/next-visit/', update_next_visit, name='update_next_visit'),
     path('vaccinations/', views.vaccination_list, name='vaccination_list'),
     path('vaccinationsAdd/', views.vaccination_create, name='vaccination_create'),
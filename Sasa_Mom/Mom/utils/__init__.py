@@ -0,0 +1,15 @@
+# Mom/utils/__init__.py
+
+
+def schedule_initial_vaccinations(child):
+    """
+    Schedules all required vaccinations for a new child based on their DOB
+    and the recommended ages in the Vaccination model.
+
+    Returns a ScheduleReport describing which doses were created, which were
+    already on the child's schedule and which fell in the past.
+    """
+    # Imported here so Mom.models can use the helpers in this package
+    from Mom.services.vaccination_schedule import schedule_child
+
+    return schedule_child(child)
@@ -0,0 +1,184 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters and histograms live in this process's memory: recording is a
+dict lookup and a lock-protected add, cheap enough for every request and
+every SMS. Web workers expose their own numbers at /metrics; management
+commands write theirs to a file with `write_textfile` (e.g. for the node
+exporter's textfile collector).
+"""
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds; spans a fast query up to a slow provider call or nightly run
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+        (registry or REGISTRY).register(self)
+
+    def key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted(self.values.items())
+            lines.extend(self.render_samples(items))
+        return lines
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render_samples(self, items):
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render_samples(self, items):
+        bounds = [*self.buckets, float('inf')]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [('le', _format_number(bound))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_number(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def render(self):
+        lines = []
+        for name in sorted(self.metrics):
+            lines.extend(self.metrics[name].render())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for metric in self.metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def write_textfile(path, registry=None):
+    """Atomically write the registry to `path` so a scraper never reads half a file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write((registry or REGISTRY).render())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# --- Application metrics ---
+
+SMS_SEND_SECONDS = Histogram(
+    'mom_sms_send_seconds', 'Duration of one SMS provider call.', ['outcome'],
+)
+SMS_MESSAGES = Counter(
+    'mom_sms_messages_total', 'SMS delivery outcomes after retries.', ['outcome'],
+)
+OUTBOX_LOST_RESULTS = Counter(
+    'mom_outbox_lost_results_total', 'Delivery results dropped because their outbox lease had been taken over.',
+)
+REMINDER_SELECT_SECONDS = Histogram(
+    'mom_reminder_select_seconds', 'Time to lock and load one batch of due reminders.',
+)
+REMINDER_DISPATCH_SECONDS = Histogram(
+    'mom_reminder_dispatch_seconds', 'Duration of one full reminder dispatch run.',
+)
+REMINDER_EVENTS = Counter(
+    'mom_reminder_events_total', 'Due reminders handled by the dispatcher.', ['kind', 'state'],
+)
+SCHEDULE_SECONDS = Histogram(
+    'mom_vaccination_schedule_seconds', 'Duration of vaccination scheduling calls.', ['function'],
+)
+SCHEDULED_DOSES = Counter(
+    'mom_vaccination_doses_scheduled_total', 'ChildVaccination rows created by scheduling.',
+)
+VIEW_SECONDS = Histogram(
+    'mom_view_seconds', 'Request latency by view.', ['view', 'method', 'status'],
+)
@@ -1,7 +1,45 @@
-def format_phone(phone):
-    phone = phone.strip()
+import re
+
+# '+', a country code and subscriber number: 8 to 15 digits in all
+E164_RE = re.compile(r'^\+[1-9]\d{7,14}$')
+# Kenyan numbers carry a 9-digit subscriber number after +254
+KENYA_RE = re.compile(r'^\+254\d{9}$')
+
+
+def normalize_phone(phone):
+    """
+    Rewrite a whole or partial Kenyan phone number towards E.164, without
+    checking it: local numbers (07.. / 01..) get +254, numbers with the
+    country code but no '+' (2547..) get the '+', and spaces, dashes and
+    brackets are dropped. Unrecognised input comes back as bare digits.
+
+    Used for prefix searches; use format_phone() for numbers to store.
+    """
+    phone = (phone or "").strip()
+    digits = "".join(ch for ch in phone if ch.isdigit())
+
+    if phone.startswith("+"):
+        return "+" + digits
 
-    if phone.startswith("07") or phone.startswith("01"):
-        return "+254" + phone[1:]
+    if digits.startswith("07") or digits.startswith("01"):
+        return "+254" + digits[1:]
+
+    if digits.startswith("254"):
+        return "+" + digits
+
+    return digits
+
+
+def format_phone(phone):
+    """
+    Normalize a Kenyan phone number to E.164 (+2547XXXXXXXX).
 
+    Accepts the same spellings as normalize_phone() and returns None unless
+    the result is a complete E.164 number that an SMS can be sent to.
+    """
+    phone = normalize_phone(phone)
+    if not E164_RE.match(phone):
+        return None
+    if phone.startswith("+254") and not KENYA_RE.match(phone):
+        return None
     return phone
@@ -0,0 +1,130 @@
+"""
+Per-request SQL and template timing, used by Mom.middleware.QueryStatsMiddleware
+and the query budget test helpers in Mom.test_utils.
+"""
+import contextvars
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+# Literals collapse to '?' so queries differing only in parameters match
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\bIN \((?:\s*(?:\?|%s)\s*,?)+\)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+_current = contextvars.ContextVar('query_stats', default=None)
+
+
+def fingerprint(sql):
+    """
+    SELECT ... WHERE "id" = 42        -> SELECT ... WHERE "id" = ?
+    SELECT ... WHERE "id" IN (1, 2, 3) -> SELECT ... WHERE "id" IN (...)
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+@dataclass
+class QueryStats:
+    queries: int = 0
+    db_time: float = 0.0
+    render_time: float = 0.0
+    total_time: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+    # Template.render nesting; only the outermost render is timed
+    render_depth: int = 0
+
+    def duplicates(self, minimum=2):
+        """{fingerprint: count} for statements run at least `minimum` times."""
+        return {sql: count for sql, count in self.fingerprints.most_common() if count >= minimum}
+
+    def as_dict(self, duplicate_limit=5):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'render_ms': round(self.render_time * 1000, 2),
+            'total_ms': round(self.total_time * 1000, 2),
+            'duplicate_queries': sum(count - 1 for count in self.fingerprints.values()),
+            'top_duplicates': [
+                {'sql': sql[:300], 'count': count}
+                for sql, count in list(self.duplicates().items())[:duplicate_limit]
+            ],
+        }
+
+
+def budget_for(url_name):
+    """settings.QUERY_BUDGETS[url_name], else settings.QUERY_BUDGET."""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(url_name, getattr(settings, 'QUERY_BUDGET', 20))
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if stats is not None:
+            stats.db_time += time.perf_counter() - started
+            stats.queries += 1
+            stats.fingerprints[fingerprint(sql)] += 1
+
+
+_original_render = Template.render
+
+
+def _timed_render(self, context):
+    stats = _current.get()
+    if stats is None or stats.render_depth:
+        return _original_render(self, context)
+    stats.render_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        stats.render_time += time.perf_counter() - started
+        stats.render_depth -= 1
+
+
+def install_render_timer():
+    """
+    Time Template.render for tracked requests. Patched once per process,
+    the way Django's test environment instruments template rendering;
+    untracked renders only pay a context variable lookup.
+    """
+    Template.render = _timed_render
+
+
+@contextmanager
+def track_queries():
+    """
+    Count queries, DB time, duplicate statements and template render time
+    on every database connection inside the block:
+
+        with track_queries() as stats:
+            client.get(url)
+        stats.queries, stats.duplicates()
+
+    Works with DEBUG off; queries are observed through execute wrappers
+    rather than connection.queries.
+    """
+    stats = QueryStats()
+    token = _current.set(stats)
+    started = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_record_query))
+            yield stats
+    finally:
+        stats.total_time = time.perf_counter() - started
+        _current.reset(token)
@@ -1,14 +1,45 @@
-from twilio.rest import Client
+import threading
+
 from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Messages captured by the locmem backend (see Mom.utils.sms_backends)
+outbox = []
+
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+def get_connection(backend=None, **kwargs):
+    """
+    Return an SMS backend instance.
+
+    Without arguments this returns the process-wide instance of
+    settings.SMS_BACKEND, so every reminder path shares one provider client
+    and its HTTP connection pool. Passing `backend` or keyword arguments
+    builds a fresh instance instead.
+    """
+    if backend is None and not kwargs:
+        path = settings.SMS_BACKEND
+        with _connections_lock:
+            if path not in _connections:
+                _connections[path] = import_string(path)()
+            return _connections[path]
+    return import_string(backend or settings.SMS_BACKEND)(**kwargs)
+
+
+def send_sms(to, message, connection=None):
+    """
+    Send one SMS and return the provider's message id.
+    """
+    connection = connection or get_connection()
+    return connection.send(to, message)
+
 
-def send_sms(to, message):
-    client = Client(
-        settings.TWILIO_ACCOUNT_SID,
-        settings.TWILIO_AUTH_TOKEN
-    )
-
-    client.messages.create(
-        body=message,
-        from_=settings.TWILIO_PHONE_NUMBER,
-        to=to
-    )
+def send_many(messages, connection=None, **delivery_options):
+    """
+    Send an iterable of OutgoingMessage concurrently and return a
+    DeliveryReport.
+    """
+    connection = connection or get_connection()
+    return connection.send_many(messages, **delivery_options)
@@ -0,0 +1,156 @@
+"""
+SMS backends, selected with settings.SMS_BACKEND in the same way Django
+selects email backends with EMAIL_BACKEND.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from itertools import count
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from Mom.services.sms_delivery import deliver
+
+
+class BaseSMSBackend:
+    """
+    Base class for SMS backends. Subclasses implement `send(to, body)`, which
+    performs one provider call and returns the provider's message id.
+    """
+
+    def __init__(self, **kwargs):
+        pass
+
+    def send(self, to, body):
+        raise NotImplementedError('subclasses of BaseSMSBackend must provide a send() method')
+
+    def send_many(self, messages, **delivery_options):
+        """
+        Deliver an iterable of OutgoingMessage concurrently, rate limited and
+        with retries. Returns a DeliveryReport.
+        """
+        return deliver(messages, self.send, **delivery_options)
+
+
+class TwilioBackend(BaseSMSBackend):
+    """
+    Sends through Twilio, reusing one client (and its pooled HTTP session)
+    for the lifetime of the backend instead of one per message.
+    """
+
+    def __init__(self, account_sid=None, auth_token=None, from_number=None, **kwargs):
+        super().__init__(**kwargs)
+        self.account_sid = account_sid or settings.TWILIO_ACCOUNT_SID
+        self.auth_token = auth_token or settings.TWILIO_AUTH_TOKEN
+        self.from_number = from_number or settings.TWILIO_PHONE_NUMBER
+
+        if not all([self.account_sid, self.auth_token, self.from_number]):
+            raise ImproperlyConfigured("Twilio credentials missing")
+
+        # Imported here so projects using another backend need not install twilio
+        from requests.adapters import HTTPAdapter
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+
+        http_client = TwilioHttpClient(pool_connections=True)
+        # Size the connection pool to the delivery worker pool
+        pool_size = getattr(settings, 'SMS_DELIVERY_WORKERS', 8)
+        http_client.session.mount('https://', HTTPAdapter(pool_maxsize=pool_size))
+        self.client = Client(self.account_sid, self.auth_token, http_client=http_client)
+
+    def send(self, to, body):
+        message = self.client.messages.create(body=body, from_=self.from_number, to=to)
+        return message.sid
+
+
+class LocmemBackend(BaseSMSBackend):
+    """
+    Keeps messages in Mom.utils.sms.outbox instead of sending them. Used
+    automatically for test runs.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        from Mom.utils import sms
+        self.outbox = sms.outbox
+        self.ids = count(1)
+        self.lock = threading.Lock()
+
+    def send(self, to, body):
+        with self.lock:
+            sid = f"LOCMEM{next(self.ids):08d}"
+            self.outbox.append((sid, to, body))
+        return sid
+
+
+class FakeBackend(BaseSMSBackend):
+    """
+    Local stand-in for a real provider, used to benchmark delivery offline.
+
+    Each send sleeps for `latency` seconds (default settings.SMS_FAKE_LATENCY)
+    to mimic an HTTP round-trip and fails with probability `failure_rate`.
+    Messages are only counted in `sent`, not kept, so long load runs use no
+    memory per message; use LocmemBackend to inspect what was sent.
+    """
+
+    def __init__(self, latency=None, failure_rate=0.0, seed=None, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = getattr(settings, 'SMS_FAKE_LATENCY', 0.05) if latency is None else latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.sent = 0
+        self.lock = threading.Lock()
+
+    def send(self, to, body):
+        time.sleep(self.latency)
+        with self.lock:
+            if self.random.random() < self.failure_rate:
+                raise ConnectionError("fake provider: simulated failure")
+            self.sent += 1
+            return f"FAKE{self.sent:08d}"
+
+
+class ConsoleBackend(BaseSMSBackend):
+    """
+    Writes each message to a stream (stdout by default).
+    """
+
+    def __init__(self, stream=None, **kwargs):
+        super().__init__(**kwargs)
+        self.stream = stream or sys.stdout
+        self.ids = count(1)
+        self.lock = threading.Lock()
+
+    def send(self, to, body):
+        with self.lock:
+            sid = f"CONSOLE{next(self.ids):08d}"
+            self.write(f"To: {to}\nId: {sid}\n{body}\n{'-' * 40}\n")
+        return sid
+
+    def write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+
+class FileBackend(ConsoleBackend):
+    """
+    Appends messages to a log file in settings.SMS_FILE_PATH, one file per
+    backend instance. The file is opened for each message, so the long-lived
+    shared backend holds no file handle between sends.
+    """
+
+    def __init__(self, file_path=None, **kwargs):
+        file_path = file_path or getattr(settings, 'SMS_FILE_PATH', None)
+        if not file_path:
+            raise ImproperlyConfigured("FileBackend requires settings.SMS_FILE_PATH")
+        os.makedirs(file_path, exist_ok=True)
+        super().__init__(**kwargs)
+        self.path = os.path.join(file_path, f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.log")
+
+    def write(self, text):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(text)
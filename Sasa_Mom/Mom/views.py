@@ -1,7 +1,9 @@
+from django.conf import settings
+from django.db import transaction
 from django.shortcuts import render, redirect, get_object_or_404
 from datetime import timedelta
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
 # NEW IMPORTS for Superuser Restriction
 from django.contrib.auth.decorators import login_required, user_passes_test 
@@ -10,9 +12,18 @@ from django.contrib.auth import logout
 
 from .forms import (
     MotherPregnancyForm, PregnancyNextVisitForm, VaccinationForm,
-    ChildVaccinationForm, ChildForm, MotherForm,PregnancyForm
+    ChildVaccinationForm, ChildForm, MotherForm,PregnancyForm, MotherSearchForm,
+    ChildSearchForm, ExportForm
 )
 from .models import Mother, ChildVaccination, Pregnancy, Vaccination, Child
+from .utils.pagination import keyset_paginate
+from .services import dashboard_stats, exports, page_cache
+from .services.vaccination_catalog import get_catalog
+from .utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as METRICS_REGISTRY
+
+DASHBOARD_PAGE_SIZE = 50
+CHILD_LIST_PAGE_SIZE = 50
+MOTHER_SEARCH_LIMIT = 20
 
 # ----------------------------
 # Access Control Helper
@@ -23,6 +34,10 @@ def is_superuser_check(user):
     # Ensure user is logged in (active) and has superuser status
     return user.is_active and user.is_superuser
 
+def is_staff_check(user):
+    """Custom test function to check if the user is staff (or a superuser)."""
+    return user.is_active and (user.is_staff or user.is_superuser)
+
 
 # ----------------------------
 # Public Views
@@ -84,8 +99,76 @@ def editMother(request, pk):
 
 @login_required
 def staff_dashboard(request):
-    mothers = Mother.objects.all().order_by('-created_at')
-    return render(request, 'Mom/staff_dashboard.html', {'mothers': mothers})
+    search_form = MotherSearchForm(request.GET)
+    mothers = Mother.objects.with_status()
+    hospital = None
+    if search_form.is_valid():
+        mothers = search_form.filter(mothers)
+        hospital = search_form.cleaned_data['hospital'].strip()
+
+    # Headline numbers come from the materialized table, never live aggregates
+    hospital_stats, stats = dashboard_stats.for_day(hospital=hospital)
+
+    # Keyset pagination: each page is one indexed read, however big the registry
+    page = keyset_paginate(
+        mothers, ('-created_at', '-id'),
+        after=request.GET.get('after'), before=request.GET.get('before'),
+        page_size=DASHBOARD_PAGE_SIZE,
+    )
+    return render(request, 'Mom/staff_dashboard.html', {
+        'mothers': page,
+        'page': page,
+        'search_form': search_form,
+        'stats': stats,
+        'hospital_stats': hospital_stats,
+    })
+
+
+@login_required
+def mother_search(request):
+    """
+    JSON prefix search over mother name and phone for the mother picker.
+    """
+    term = request.GET.get('q', '').strip()
+    results = []
+    if term:
+        mothers = (
+            Mother.objects.prefix_search(term)
+            .order_by('name', 'id')
+            .values_list('id', 'name', 'phone')[:MOTHER_SEARCH_LIMIT]
+        )
+        results = [{'id': pk, 'text': f"{name} — {phone}"} for pk, name, phone in mothers]
+    return JsonResponse({'results': results})
+
+
+@user_passes_test(is_staff_check)
+def export_data(request, kind):
+    """
+    Stream a CSV/JSON extract of mothers, children or vaccination records.
+    Rows are read with a server-side cursor and written as they arrive, so
+    memory stays flat and the download starts immediately.
+    ACCESS: Staff only.
+    """
+    if kind not in exports.EXPORTS:
+        raise Http404("Unknown export")
+    form = ExportForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    chunks, content_type, filename = exports.stream_export(kind, **form.export_options())
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@user_passes_test(is_staff_check)
+def metrics(request):
+    """
+    This process's counters and histograms in the Prometheus text format.
+    Each web worker keeps its own numbers.
+    ACCESS: Staff only.
+    """
+    return HttpResponse(METRICS_REGISTRY.render(), content_type=METRICS_CONTENT_TYPE)
 
 
 @login_required
@@ -100,6 +183,9 @@ from django.db.models import Q
 def motherPage(request, pk):
     mother = get_object_or_404(Mother, id=pk)
     
+    # The querysets below are lazy: they only run when the cached fragment in
+    # mother.html is missing or its version was bumped by an edit (see Mom/signals.py)
+
     # 1. Filter out pregnancy records that are effectively empty (no due date)
     active_pregnancies = mother.pregnancies.filter(due_date__isnull=False).order_by('-due_date')
 
@@ -109,13 +195,16 @@ def motherPage(request, pk):
         child__in=child_ids,
         completed=False,
         scheduled_date__gte=timezone.localdate()
-    ).order_by('scheduled_date')
+    ).select_related('child', 'vaccination').order_by('scheduled_date')
 
     context = {
         'mother': mother,
         'upcoming_vaccinations': upcoming_vaccinations,
         # Pass the filtered queryset to the template
         'pregnancies': active_pregnancies, 
+        'cache_version': page_cache.get_version('mother', mother.id),
+        'cache_timeout': settings.PAGE_CACHE_TIMEOUT,
+        'today': timezone.localdate(),
     }
     return render(request, 'Mom/mother.html', context)
 
@@ -140,7 +229,7 @@ def update_next_visit(request, pregnancy_id):
 
 @login_required
 def vaccination_list(request):
-    vaccinations = Vaccination.objects.all().order_by('dose_order')
+    vaccinations = get_catalog().by_dose_order
     return render(request, 'Mom/vaccination_list.html', {'vaccinations': vaccinations})
 
 
@@ -171,11 +260,9 @@ def schedule_child_vaccination(request, pk):
     child = get_object_or_404(Child, id=pk)
 
     if request.method == 'POST':
-        form = ChildVaccinationForm(request.POST)
+        form = ChildVaccinationForm(request.POST, instance=ChildVaccination(child=child))
         if form.is_valid():
-            child_vaccination = form.save(commit=False)
-            child_vaccination.child = child
-            child_vaccination.save()
+            form.save()
 
             return redirect('child_detail', pk=child.id)
 
@@ -191,7 +278,9 @@ def schedule_child_vaccination(request, pk):
 def complete_vaccination(request, pk):
     vaccination = get_object_or_404(ChildVaccination, id=pk)
     vaccination.completed = True
-    vaccination.save()
+    # The post_save signal refreshes Child.next_due_*; commit both together
+    with transaction.atomic():
+        vaccination.save()
     return redirect('child_detail', pk=vaccination.child.id)
 
 # ----------------------------
@@ -200,8 +289,25 @@ def complete_vaccination(request, pk):
 
 @login_required
 def child_list(request):
-    children = Child.objects.all().order_by('name')
-    return render(request, 'Mom/child.html', {'children': children})
+    search_form = ChildSearchForm(request.GET)
+    # One query per page: the mother is joined in, and only displayed columns are read
+    children = Child.objects.select_related('mother').only(
+        'id', 'name', 'gender', 'dob', 'next_due_date', 'overdue_count', 'mother__id', 'mother__name'
+    )
+    if search_form.is_valid():
+        children = search_form.filter(children)
+
+    page = keyset_paginate(
+        children, ('name', 'id'),
+        after=request.GET.get('after'), before=request.GET.get('before'),
+        page_size=CHILD_LIST_PAGE_SIZE,
+    )
+    return render(request, 'Mom/child.html', {
+        'children': page,
+        'page': page,
+        'search_form': search_form,
+        'today': timezone.localdate(),
+    })
 
 
 # RESTRICTED VIEW: Adding a child without mother context (general registry entry)
@@ -266,8 +372,8 @@ def add_child_to_mother(request, mother_id):
             return redirect('motherPage', pk=mother.id)
 
     else:
-        # GET request: Instantiate an empty form
-        form = ChildForm()
+        # GET request: Instantiate an empty form with this mother preselected
+        form = ChildForm(initial={'mother': mother})
 
     # Final Return: Renders the page for GET, or for an invalid POST
     return render(request, 'Mom/child_form.html', {
@@ -288,20 +394,24 @@ def add_child_to_mother(request, mother_id):
 
 @login_required
 def child_detail(request, pk):
-    child = get_object_or_404(Child, id=pk)
+    child = get_object_or_404(Child.objects.select_related('mother'), id=pk)
     
     # FIX APPLIED: Using the correct related_name 'vaccinations'
+    # Both querysets are lazy and only run when the cached fragment is stale
     
     # Upcoming (Completed=False)
-    upcoming_vaccinations = child.vaccinations.filter(completed=False).order_by('scheduled_date')
+    upcoming_vaccinations = child.vaccinations.filter(completed=False).select_related('vaccination').order_by('scheduled_date')
     
     # Completed (Completed=True)
-    completed_vaccinations = child.vaccinations.filter(completed=True).order_by('-scheduled_date')
+    completed_vaccinations = child.vaccinations.filter(completed=True).select_related('vaccination').order_by('-scheduled_date')
 
     return render(request, 'Mom/child_detail.html', {
         'child': child,
         'upcoming_vaccinations': upcoming_vaccinations,
-        'completed_vaccinations': completed_vaccinations 
+        'completed_vaccinations': completed_vaccinations,
+        'cache_version': page_cache.get_version('child', child.id),
+        'cache_timeout': settings.PAGE_CACHE_TIMEOUT,
+        'today': timezone.localdate(),
     })
 
 @login_required
@@ -0,0 +1,27 @@
+from django import forms
+from django.urls import reverse
+
+from .models import Mother
+
+
+class MotherAutocomplete(forms.Widget):
+    """
+    Text box that looks mothers up lazily through the `mother_search` JSON
+    endpoint, instead of rendering every Mother as a <select> option.
+
+    Only the selected mother's id is posted; ModelChoiceField resolves that
+    single row on submit.
+    """
+    template_name = 'Mom/widgets/mother_autocomplete.html'
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ''
+        if value:
+            mother = Mother.objects.filter(pk=value).only('name', 'phone').first()
+            label = str(mother) if mother else ''
+        context['widget'].update({
+            'label': label,
+            'search_url': reverse('mother_search'),
+        })
+        return context
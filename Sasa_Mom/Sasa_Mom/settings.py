@@ -47,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Request latency histogram for /metrics; cheap enough to leave on
+    'Mom.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +58,26 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Opt-in query/latency instrumentation (see Mom.middleware.QueryStatsMiddleware).
+# First in the list so session and auth queries are counted too.
+if os.getenv("QUERY_STATS", "").lower() in ("1", "true", "yes"):
+    MIDDLEWARE.insert(0, 'Mom.middleware.QueryStatsMiddleware')
+
+# Queries a request may run before it is flagged; QUERY_BUDGETS overrides by URL name
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "20"))
+QUERY_BUDGETS = {}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "Mom.query_stats": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 ROOT_URLCONF = 'Sasa_Mom.urls'
 
 TEMPLATES = [
@@ -123,6 +145,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# motherPage/child_detail fragments are versioned and invalidated on edit,
+# so this only bounds how long unused entries linger in the cache
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
 # Authentication redirects
 LOGIN_URL = '/Mom/staffLogin/'
 LOGIN_REDIRECT_URL = '/Mom/staffDashboard/'
@@ -130,6 +156,43 @@ LOGOUT_REDIRECT_URL = '/Mom/staffLogin/'
 
 load_dotenv(os.path.join(BASE_DIR, ".env"))
 
+# Must be shared by every web worker and management command: the vaccination
+# catalog, message templates and page fragment versions are invalidated by
+# signals, which only reach other processes through this cache. Point
+# CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached in production, e.g.
+# django.core.cache.backends.redis.RedisCache and redis://127.0.0.1:6379/1.
+# The default database cache needs `python manage.py createcachetable` once.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache")
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv("CACHE_LOCATION", "mom_cache"),
+    }
+}
+if CACHE_BACKEND.endswith('.DatabaseCache'):
+    # Room for a fragment and a version key per mother and child; an evicted
+    # version only costs a cache miss
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv("CACHE_MAX_ENTRIES", "200000"))}
+
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
+
+# SMS backend, chosen like EMAIL_BACKEND. Alternatives in Mom.utils.sms_backends:
+# LocmemBackend, ConsoleBackend, FileBackend (writes to SMS_FILE_PATH), FakeBackend
+SMS_BACKEND = os.getenv("SMS_BACKEND", "Mom.utils.sms_backends.TwilioBackend")
+SMS_FILE_PATH = os.getenv("SMS_FILE_PATH", os.path.join(BASE_DIR, "sent_sms"))
+# Simulated provider round-trip of FakeBackend, in seconds
+SMS_FAKE_LATENCY = float(os.getenv("SMS_FAKE_LATENCY", "0.05"))
+
+# Test runs never talk to the SMS provider (see Mom.test_runner)
+TEST_RUNNER = "Mom.test_runner.TestRunner"
+
+# SMS delivery: provider messages-per-second quota, concurrent sends and retries
+SMS_MESSAGES_PER_SECOND = float(os.getenv("SMS_MESSAGES_PER_SECOND", "10"))
+SMS_DELIVERY_WORKERS = int(os.getenv("SMS_DELIVERY_WORKERS", "8"))
+SMS_MAX_ATTEMPTS = int(os.getenv("SMS_MAX_ATTEMPTS", "3"))
+# Delivery runs (each up to SMS_MAX_ATTEMPTS sends) before an outbox message is marked failed
+SMS_OUTBOX_MAX_ATTEMPTS = int(os.getenv("SMS_OUTBOX_MAX_ATTEMPTS", "5"))
+# Local hour at which reminders (day-before and on-the-day) are due to go out
+REMINDER_SEND_HOUR = int(os.getenv("REMINDER_SEND_HOUR", "8"))
@@ -16,8 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path,include
+from Mom import views as mom_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('Mom/',include('Mom.urls'))
+    path('Mom/',include('Mom.urls')),
+    path('metrics', mom_views.metrics, name='metrics'),
 ]